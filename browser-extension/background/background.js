@@ -18,44 +18,79 @@ chrome.runtime.onInstalled.addListener((details) => {
     });
 });
 
-// Tab update listener for real-time analysis
+// Tab update listener for real-time analysis. content.js is already injected
+// by the manifest at document_end, so only the engine analysis is requested.
 chrome.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
-    if (changeInfo.status === 'complete' && tab.url && !tab.url.startsWith('chrome://')) {
-        // Trigger analysis after page load
-        setTimeout(() => {
-            performBackgroundAnalysis(tabId, tab.url);
-        }, 2000);
+    if (changeInfo.status === 'complete' && tab.url && /^https?:/.test(tab.url)) {
+        requestEngineAnalysis(tabId, tab.url);
     }
 });
 
 // Message listener for popup communication
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
+    const tabId = request.tabId ?? sender.tab?.id;
     if (request.action === 'getAnalysisData') {
-        const data = analysisCache.get(sender.tab?.id);
-        sendResponse(data || null);
+        const data = analysisCache.get(tabId);
+        sendResponse(data?.page || null);
+    } else if (request.action === 'getEngineAnalysis') {
+        // Asked by the popup; waits for an analysis still in flight, or starts
+        // one when the page-load request has not run (e.g. after a restart)
+        const data = analysisCache.get(tabId);
+        if (data?.engine || !request.url) {
+            sendResponse(data?.engine || null);
+        } else {
+            requestEngineAnalysis(tabId, request.url)
+                .then(() => sendResponse(analysisCache.get(tabId)?.engine || null));
+        }
     } else if (request.action === 'updateAnalysisData') {
-        analysisCache.set(sender.tab?.id, request.data);
+        setTabAnalysis(tabId, { page: request.data });
         
         // Update badge with privacy score
-        updateBadge(sender.tab?.id, request.data.score);
+        updateBadge(tabId, request.data.score);
         
         sendResponse({ success: true });
     }
     return true;
 });
 
-// Perform background analysis
-async function performBackgroundAnalysis(tabId, url) {
+// Keep per-tab entries bounded; results shared across tabs and sessions
+// live in the native host's cache, keyed by origin
+const MAX_CACHED_TABS = 100;
+
+function setTabAnalysis(tabId, update) {
+    if (tabId === undefined) return;
+    const entry = { ...analysisCache.get(tabId), ...update };
+    analysisCache.delete(tabId);
+    analysisCache.set(tabId, entry);
+    while (analysisCache.size > MAX_CACHED_TABS) {
+        analysisCache.delete(analysisCache.keys().next().value);
+    }
+}
+
+// Header, TLS and DNS analysis from the PrivacyLens engine (native messaging host).
+// The host answers from its cache when the site was analyzed recently.
+const NATIVE_HOST = 'org.privacylens.native_host';
+const pendingEngine = new Map();
+
+function requestEngineAnalysis(tabId, url) {
+    // One request per tab at a time; the popup joins a page-load request
+    if (!pendingEngine.has(tabId)) {
+        const request = fetchEngineAnalysis(tabId, url)
+            .finally(() => pendingEngine.delete(tabId));
+        pendingEngine.set(tabId, request);
+    }
+    return pendingEngine.get(tabId);
+}
+
+async function fetchEngineAnalysis(tabId, url) {
     try {
-        // Inject content script if not already present
-        await chrome.scripting.executeScript({
-            target: { tabId: tabId },
-            files: ['background/content.js']
-        });
-        
-        console.log('Background analysis triggered for:', url);
+        const response = await chrome.runtime.sendNativeMessage(NATIVE_HOST, { action: 'analyze', url });
+        if (response?.ok) {
+            setTabAnalysis(tabId, { engine: response.result });
+        }
     } catch (error) {
-        console.error('Failed to inject content script:', error);
+        // The engine is optional; without the host only in-page analysis is shown
+        console.debug('PrivacyLens engine unavailable:', error.message);
     }
 }
 
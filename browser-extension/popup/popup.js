@@ -55,6 +55,10 @@ class PrivacyAnalyzer {
                 this.generateRecommendations();
                 this.updateUI();
             }
+
+            // Header analysis from the PrivacyLens engine, when its native host is installed
+            const engine = await chrome.runtime.sendMessage({ action: 'getEngineAnalysis', tabId: tab.id, url: tab.url });
+            this.updateEngine(engine);
         } catch (error) {
             console.error('Analysis failed:', error);
             this.showError('Failed to analyze page');
@@ -208,6 +212,55 @@ class PrivacyAnalyzer {
         };
     }
 
+    static updateEngine(engine) {
+        const item = document.getElementById('engineRisk');
+        if (!engine) {
+            item.style.display = 'none';
+            return;
+        }
+        item.style.display = '';
+
+        const badge = document.getElementById('engineBadge');
+        const details = document.getElementById('engineDetails');
+        const score = engine.privacy_score;
+        const http = engine.analysis?.http_security || {};
+        const missing = Object.entries(http.headers || {})
+            .filter(([, header]) => !header.present)
+            .map(([name]) => name);
+
+        let riskLevel = 'low-risk';
+        if (score === null || score === undefined) riskLevel = 'medium-risk';
+        else if (score < 50) riskLevel = 'high-risk';
+        else if (score < 70) riskLevel = 'medium-risk';
+
+        // An unreachable host is not scored
+        badge.textContent = score ?? '–';
+        badge.className = `risk-badge ${riskLevel === 'high-risk' ? 'danger' : riskLevel === 'medium-risk' ? 'warning' : 'safe'}`;
+        item.className = `risk-item ${riskLevel}`;
+
+        const lines = [];
+        if (engine.reachable === false) {
+            lines.push(`<div>Not scored: ${escapeHtml(http.error || 'host unreachable')}</div>`);
+        } else {
+            lines.push(`<div>HTTPS: ${http.https_used ? 'yes' : 'no'}</div>`);
+            if (missing.length > 0) {
+                lines.push(`<div>Missing headers:</div><ul>${missing.map(name => `<li>${name}</li>`).join('')}</ul>`);
+            }
+        }
+        details.innerHTML = lines.join('');
+
+        const header = item.querySelector('.risk-header');
+        header.style.cursor = 'pointer';
+        header.onclick = () => {
+            details.classList.toggle('show');
+        };
+
+        for (const rec of engine.recommendations || []) {
+            currentAnalysis.recommendations.push({ text: rec.recommendation, priority: rec.priority });
+        }
+        this.updateRecommendations();
+    }
+
     static updateRecommendations() {
         const list = document.getElementById('recommendationsList');
         
@@ -231,6 +284,12 @@ class PrivacyAnalyzer {
     }
 }
 
+function escapeHtml(text) {
+    const element = document.createElement('span');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
 // Event listeners
 document.addEventListener('DOMContentLoaded', () => {
     // Initial analysis
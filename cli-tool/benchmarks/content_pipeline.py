@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Content pipeline benchmarks
+Parse and classify deterministic synthetic pages with no network access.
+
+    python benchmarks/content_pipeline.py                    # run and compare with the baseline
+    python benchmarks/content_pipeline.py --quick            # small cases only
+    python benchmarks/content_pipeline.py --save-baseline    # record a new baseline
+    python benchmarks/content_pipeline.py --generate out/    # write the corpus as .html files
+
+Every case runs in a fresh interpreter so peak RSS belongs to that page alone.
+Timings are the median of --repeat runs. Memory blocks still alive after
+classification (live_blocks) and the traced peak come from a separate
+tracemalloc pass, so tracing does not distort the timings. Peak RSS needs
+the Unix-only ``resource`` module and is left out elsewhere.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from privacylens.analyzer import PrivacyAnalyzer
+
+
+KB = 1024
+MB = 1024 * KB
+
+# name: (page size in bytes, number of script/img/iframe tags, tracker density)
+CASES = {
+    'tiny-plain': (10 * KB, 0, 0.0),
+    'tiny-dense': (10 * KB, 50, 0.75),
+    'small-mixed': (100 * KB, 500, 0.25),
+    'medium-sparse': (1 * MB, 200, 0.05),
+    'medium-dense': (1 * MB, 2000, 0.75),
+    'large-mixed': (5 * MB, 5000, 0.25),
+    'huge-sparse': (20 * MB, 500, 0.05),
+    'huge-dense': (20 * MB, 5000, 0.75),
+}
+QUICK_CASES = ('tiny-plain', 'tiny-dense', 'small-mixed', 'medium-sparse')
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'content_pipeline.json')
+
+# Tracker sources matched by _classify_script or _is_tracking_resource
+TRACKER_SCRIPTS = (
+    'https://www.google-analytics.com/analytics.js',
+    'https://www.googletagmanager.com/gtm.js?id=GTM-{n}',
+    'https://connect.facebook.net/en_US/fbevents.js',
+    'https://securepubads.g.doubleclick.net/tag/js/gpt.js',
+    'https://pagead2.googlesyndication.com/pagead/js/adsbygoogle.js',
+    'https://static.hotjar.com/c/hotjar-{n}.js',
+    'https://cdn.mxpnl.mixpanel.com/libs/mixpanel-2-latest.min.js',
+    'https://platform.twitter.com/widgets.js',
+    'https://platform.linkedin.com/in.js',
+)
+TRACKER_MEDIA = (
+    'https://www.facebook.com/tr?id={n}&ev=PageView',
+    'https://pixel.example-ads.com/p.gif?u={n}',
+    'https://metrics.example-cdn.net/beacon?session={n}',
+    'https://analytics.example.org/collect?v=1&cid={n}',
+)
+FIRST_PARTY = (
+    '/static/js/app.{n}.js',
+    '/images/photo-{n}.jpg',
+    'https://cdn.example-static.com/lib/vendor.{n}.js',
+    'https://img.example-static.com/thumb/{n}.webp',
+    '/embed/video/{n}',
+)
+WORDS = ('privacy', 'policy', 'cookie', 'consent', 'lorem', 'ipsum', 'dolor', 'sit',
+         'amet', 'data', 'user', 'browser', 'secure', 'header', 'content', 'page')
+
+
+def generate_page(size, tags, density, seed=0):
+    """Return a deterministic synthetic HTML page as bytes
+
+    ``tags`` script/img/iframe elements are spread evenly through at most
+    ``size`` bytes of markup (all ASCII); a ``density`` share of them load
+    trackers. Filler text makes up the rest of the size.
+    """
+    rng = random.Random(f'{seed}:{size}:{tags}:{density}')
+    head = '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Synthetic page</title></head>\n<body>\n'
+    tail = '</body></html>\n'
+    tag_markup = [_tag(rng, n, density) for n in range(tags)]
+
+    filler_budget = max(0, size - len(head) - len(tail) - sum(map(len, tag_markup)))
+    slots = tags + 1
+    parts = [head]
+    written = 0
+    for n in range(slots):
+        # Cumulative targets, so space a slot leaves unused carries over to the next
+        filler = _filler(rng, filler_budget * (n + 1) // slots - written)
+        written += len(filler)
+        parts.append(filler)
+        if n < tags:
+            parts.append(tag_markup[n])
+    parts.append(tail)
+    return ''.join(parts).encode('utf-8')
+
+
+def _tag(rng, n, density):
+    kind = rng.choice(('script', 'script', 'img', 'iframe'))
+    if rng.random() < density:
+        pool = TRACKER_SCRIPTS if kind == 'script' else TRACKER_MEDIA
+    else:
+        pool = FIRST_PARTY
+    src = rng.choice(pool).format(n=n)
+    if kind == 'script':
+        return f'<script async src="{src}"></script>\n'
+    if kind == 'img':
+        return f'<img src="{src}" width="1" height="1" alt="">\n'
+    return f'<iframe src="{src}" title="embed {n}"></iframe>\n'
+
+
+def _filler(rng, size):
+    """Nested paragraphs and links of at most ``size`` bytes"""
+    out = []
+    written = 0
+    while True:
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+        if rng.random() < 0.3:
+            chunk = f'<div class="c{rng.randint(0, 99)}"><p>{words} <a href="/p/{rng.randint(0, 9999)}">more</a></p></div>\n'
+        else:
+            chunk = f'<p>{words}</p>\n'
+        if written + len(chunk) > size:
+            break
+        out.append(chunk)
+        written += len(chunk)
+    # Close the gap with a shorter paragraph
+    room = size - written - len('<p></p>\n')
+    if room > 0:
+        out.append(f'<p>{words[:room].rstrip()}</p>\n')
+    return ''.join(out)
+
+
+def measure(name, repeat):
+    """Benchmark one case in this process; return its metrics"""
+    size, tags, density = CASES[name]
+    page = generate_page(size, tags, density)
+    analyzer = PrivacyAnalyzer(fail_fast=False)
+
+    parse_times = []
+    classify_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = BeautifulSoup(page, 'html.parser')
+        parsed = time.perf_counter()
+        content = analyzer._classify_content(soup)
+        classify_times.append(time.perf_counter() - parsed)
+        parse_times.append(parsed - start)
+        del soup
+
+    # Separate traced pass, so tracing does not skew the timings. The snapshot
+    # counts blocks still alive after classification, not every allocation made
+    tracemalloc.start()
+    soup = BeautifulSoup(page, 'html.parser')
+    analyzer._classify_content(soup)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    live_blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    del soup, snapshot
+
+    peak_rss = None
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak_rss //= 1024  # bytes on macOS, KiB elsewhere
+
+    return {
+        'page_bytes': len(page),
+        'tags': tags,
+        'density': density,
+        'trackers_found': sum(len(entries) for entries in content.values()),
+        'parse_s': statistics.median(parse_times),
+        'classify_s': statistics.median(classify_times),
+        'live_blocks': live_blocks,
+        'peak_traced_kb': peak_traced // 1024,
+        'peak_rss_kb': peak_rss,
+    }
+
+
+def run_case(name, repeat):
+    """Run one case in a fresh interpreter so its peak RSS is isolated"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--case', name, '--repeat', str(repeat)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def compare(name, metrics, baseline, time_tolerance, memory_tolerance):
+    """Return the regressions of one case against its baseline"""
+    if baseline.get('page_bytes') != metrics['page_bytes']:
+        return [f'{name}: page is {metrics["page_bytes"]} bytes, baseline was recorded on a '
+                f'{baseline.get("page_bytes")}-byte page; record a new baseline']
+    regressions = []
+    # (metric, relative tolerance, absolute change ignored as timer/allocator noise)
+    limits = (('parse_s', time_tolerance, 0.005), ('classify_s', time_tolerance, 0.005),
+              ('peak_traced_kb', memory_tolerance, 256), ('peak_rss_kb', memory_tolerance, 4096))
+    for key, tolerance, noise in limits:
+        old, new = baseline.get(key), metrics[key]
+        if old and new is not None and new > old * (1 + tolerance) and new - old > noise:
+            regressions.append(f'{name}: {key} {new:.4g} vs baseline {old:.4g} '
+                               f'(+{(new / old - 1) * 100:.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark content parsing and classification')
+    parser.add_argument('--case', help='Run a single case in this process and print JSON')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help='Cases to run')
+    parser.add_argument('--quick', action='store_true', help='Only run the small cases')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (median reported)')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.25,
+                        help='Allowed slowdown before a case counts as regressed')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10,
+                        help='Allowed memory growth before a case counts as regressed')
+    parser.add_argument('--generate', metavar='DIR', help='Write the corpus pages to DIR and exit')
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(measure(args.case, args.repeat)))
+        return 0
+
+    names = args.cases or (QUICK_CASES if args.quick else tuple(CASES))
+
+    if args.generate:
+        os.makedirs(args.generate, exist_ok=True)
+        for name in names:
+            path = os.path.join(args.generate, f'{name}.html')
+            with open(path, 'wb') as f:
+                f.write(generate_page(*CASES[name]))
+            print(f'{path}')
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('cases', {})
+
+    print(f"{'case':<14} {'size':>9} {'tags':>5} {'found':>5} {'parse':>9} {'classify':>9} "
+          f"{'blocks':>9} {'traced':>9} {'rss':>9}")
+    results = {}
+    regressions = []
+    for name in names:
+        metrics = run_case(name, args.repeat)
+        results[name] = metrics
+        rss = '-' if metrics['peak_rss_kb'] is None else f"{metrics['peak_rss_kb'] // KB}MB"
+        print(f"{name:<14} {metrics['page_bytes'] // KB:>7}KB {metrics['tags']:>5} "
+              f"{metrics['trackers_found']:>5} {metrics['parse_s'] * 1000:>7.1f}ms "
+              f"{metrics['classify_s'] * 1000:>7.1f}ms {metrics['live_blocks']:>9} "
+              f"{metrics['peak_traced_kb'] // KB:>7}MB {rss:>9}")
+        if name in baseline:
+            regressions.extend(compare(name, metrics, baseline[name],
+                                       args.time_tolerance, args.memory_tolerance))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'platform': sys.platform,
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'repeat': args.repeat,
+                'note': ('Timings and RSS are only comparable on the machine that recorded them; '
+                         f'compare with --time-tolerance {args.time_tolerance} and '
+                         f'--memory-tolerance {args.memory_tolerance} or looser'),
+                'cases': {**baseline, **results},
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+
+    if not baseline:
+        print('No baseline to compare against; run with --save-baseline to record one')
+        return 0
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,11 +5,24 @@ A command-line tool for analyzing website privacy and security headers.
 """
 
 import click
-import json
+import itertools
+import requests
 import sys
+import tempfile
+import threading
+import time
 from .analyzer import PrivacyAnalyzer
+from .aggregate import FleetAggregator
+from .archive import DEFAULT_MAX_BODY, analyze_archives
+from .crawler import SiteCrawler
+from .dedup import DEFAULT_CAPACITY, UrlDeduplicator
+from .diff import DEFAULT_CHUNK_ROWS, diff_snapshots
+from .distributed import CoordinatorServer, JobQueue, LeaseLost, Worker, is_loopback
+from .history import DEFAULT_HISTORY, HistoryStore, parse_since
+from .native_host import DEFAULT_CACHE, MANIFEST_DIRS, NativeHost, ResultCache, install_manifest
 from .reporter import Reporter
-from .utils import validate_url
+from .results import ScanResult
+from .utils import iter_results, validate_url
 
 
 @click.group()
@@ -26,7 +39,19 @@ def cli():
 @click.option('--save', '-s', type=click.Path(), help='Save report to file')
 @click.option('--timeout', '-t', default=10, help='Request timeout in seconds')
 @click.option('--verbose', '-v', is_flag=True, help='Verbose output')
-def check(url, output, save, timeout, verbose):
+@click.option('--headers-only', is_flag=True,
+              help='Only check security headers; never download the page body')
+@click.option('--compact', is_flag=True, help='Compact single-line JSON output')
+@click.option('--no-fail-fast', is_flag=True,
+              help='Run every probe even when the host cannot be reached')
+@click.option('--history', type=click.Path(dir_okay=False), is_flag=False, flag_value=DEFAULT_HISTORY,
+              help=f'Append results to a history database (default: {DEFAULT_HISTORY})')
+@click.option('--inspect-scripts', is_flag=True,
+              help='Fetch third-party scripts and check them for fingerprinting')
+@click.option('--ocsp-stapling', is_flag=True,
+              help='Check for a stapled OCSP response (needs pyOpenSSL; costs a second TLS handshake)')
+def check(url, output, save, timeout, verbose, headers_only, compact, no_fail_fast, history,
+          inspect_scripts, ocsp_stapling):
     """Analyze privacy and security of a website"""
     
     # Validate URL
@@ -36,7 +61,9 @@ def check(url, output, save, timeout, verbose):
     
     try:
         # Initialize analyzer
-        analyzer = PrivacyAnalyzer(timeout=timeout, verbose=verbose)
+        analyzer = PrivacyAnalyzer(timeout=timeout, verbose=verbose, headers_only=headers_only,
+                                   fail_fast=not no_fail_fast, inspect_scripts=inspect_scripts,
+                                   ocsp_stapling=ocsp_stapling)
         
         # Perform analysis
         if verbose:
@@ -44,17 +71,21 @@ def check(url, output, save, timeout, verbose):
         
         result = analyzer.analyze(url)
         
+        if history:
+            store = HistoryStore(history)
+            store.record([result])
+            store.close()
+        
         # Generate report
-        reporter = Reporter(output_format=output)
-        report = reporter.generate_report(result)
+        reporter = Reporter(output_format=output, compact=compact)
         
         # Output report
         if save:
             with open(save, 'w', encoding='utf-8') as f:
-                f.write(report)
+                reporter.write_report(result, f)
             click.echo(f"📄 Report saved to {save}")
         else:
-            click.echo(report)
+            click.echo(reporter.generate_report(result))
             
     except KeyboardInterrupt:
         click.echo(click.style('\n⚠️ Analysis interrupted by user', fg='yellow'), err=True)
@@ -68,48 +99,501 @@ def check(url, output, save, timeout, verbose):
 
 
 @cli.command()
-@click.argument('urls', nargs=-1, required=True)
-@click.option('--output', '-o', type=click.Choice(['text', 'json']), default='text',
+@click.argument('urls', nargs=-1)
+@click.option('--input', '-i', 'input_file', type=click.File('r', encoding='utf-8'),
+              help='File with one URL per line (- for stdin)')
+@click.option('--output', '-o', type=click.Choice(['text', 'json', 'ndjson']), default='text',
               help='Output format')
 @click.option('--save-dir', '-d', type=click.Path(exists=True), help='Directory to save reports')
 @click.option('--timeout', '-t', default=10, help='Request timeout in seconds')
-def batch(urls, output, save_dir, timeout):
+@click.option('--headers-only', is_flag=True,
+              help='Only check security headers; never download page bodies')
+@click.option('--compact', is_flag=True, help='Compact JSON output (NDJSON is always compact)')
+@click.option('--adaptive-timeouts', is_flag=True,
+              help='Derive per-probe timeouts from observed latency (--timeout becomes the ceiling)')
+@click.option('--hedge-resolver', multiple=True,
+              help='Alternate DNS resolver for hedged queries (default: other system nameservers)')
+@click.option('--no-fail-fast', is_flag=True,
+              help='Run every probe even when the host cannot be reached')
+@click.option('--history', type=click.Path(dir_okay=False), is_flag=False, flag_value=DEFAULT_HISTORY,
+              help=f'Append results to a history database (default: {DEFAULT_HISTORY})')
+@click.option('--inspect-scripts', is_flag=True,
+              help='Fetch third-party scripts and check them for fingerprinting')
+@click.option('--ocsp-stapling', is_flag=True,
+              help='Check for stapled OCSP responses (needs pyOpenSSL; costs a second TLS handshake)')
+@click.option('--keep-duplicates', is_flag=True,
+              help='Scan every URL as given, without dropping duplicates')
+@click.option('--expected-urls', default=DEFAULT_CAPACITY, type=click.IntRange(min=1),
+              help='Expected number of input URLs, used to size the deduplication filter')
+@click.option('--temp-dir', type=click.Path(exists=True, file_okay=False),
+              help='Directory for the deduplication index (default: system temp)')
+def batch(urls, input_file, output, save_dir, timeout, headers_only, compact, adaptive_timeouts,
+          hedge_resolver, no_fail_fast, history, inspect_scripts, ocsp_stapling, keep_duplicates,
+          expected_urls, temp_dir):
     """Analyze multiple websites in batch"""
     
+    if not urls and not input_file:
+        raise click.UsageError('Give URLs as arguments or with --input')
+    
+    # NDJSON results stream to stdout as they complete, so progress goes to stderr
+    stream_results = output == 'ndjson' and not save_dir
+    
+    # Pre-stage: spool the (deduplicated) targets to disk so huge inventories
+    # never sit in memory and the total is known before scanning starts
+    lines = itertools.chain(urls, input_file or ())
+    targets = tempfile.TemporaryFile('w+', encoding='utf-8', dir=temp_dir)
+    total = 0
+    if keep_duplicates:
+        for line in lines:
+            if line.strip() and not line.startswith('#'):
+                targets.write(line.strip() + '\n')
+                total += 1
+    else:
+        with UrlDeduplicator(capacity=expected_urls, temp_dir=temp_dir) as deduplicator:
+            for url in deduplicator.dedupe(lines):
+                targets.write(url + '\n')
+                total += 1
+            stats = deduplicator.stats
+        click.echo(f"🧹 {stats['lines']} URLs read: {stats['unique']} unique, "
+                   f"{stats['duplicates']} duplicates removed, "
+                   f"{stats['invalid']} invalid skipped", err=stream_results)
+    targets.seek(0)
+    
     results = []
-    analyzer = PrivacyAnalyzer(timeout=timeout)
-    reporter = Reporter(output_format=output)
+    analyzer = PrivacyAnalyzer(timeout=timeout, headers_only=headers_only,
+                               adaptive_timeouts=adaptive_timeouts,
+                               hedge_nameservers=hedge_resolver or None,
+                               fail_fast=not no_fail_fast, inspect_scripts=inspect_scripts,
+                               ocsp_stapling=ocsp_stapling)
+    reporter = Reporter(output_format=output, compact=compact)
+    store = HistoryStore(history) if history else None
     
-    for i, url in enumerate(urls, 1):
-        click.echo(f"[{i}/{len(urls)}] Analyzing {url}...")
+    for i, url in enumerate((line.rstrip('\n') for line in targets), 1):
+        click.echo(f"[{i}/{total}] Analyzing {url}...", err=stream_results)
         
         try:
             result = analyzer.analyze(url)
-            results.append(result)
+            if store:
+                store.record([result])
             
             if save_dir:
                 # Save individual report
                 filename = f"privacy_report_{result['domain']}.{output}"
                 filepath = f"{save_dir}/{filename}"
                 
-                report = reporter.generate_report(result)
                 with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(report)
+                    reporter.write_report(result, f)
                     
                 click.echo(f"  ✅ Report saved to {filepath}")
             else:
                 # Show summary
-                score = result.get('privacy_score', 0)
-                status = '🟢' if score >= 80 else '🟡' if score >= 60 else '🔴'
-                click.echo(f"  {status} Score: {score}/100")
+                if not result.get('reachable', True):
+                    click.echo(f"  ⚫ {result['analysis']['http_security']['error']}",
+                               err=stream_results)
+                else:
+                    score = result.get('privacy_score', 0)
+                    status = '🟢' if score >= 80 else '🟡' if score >= 60 else '🔴'
+                    click.echo(f"  {status} Score: {score}/100", err=stream_results)
+                
+                if stream_results:
+                    reporter.write_results([result], sys.stdout)
+                    sys.stdout.flush()
+                elif output == 'json':
+                    # Kept in compact form until the combined output is written
+                    results.append(ScanResult.from_dict(result))
                 
         except Exception as e:
-            click.echo(f"  ❌ Failed: {str(e)}")
+            click.echo(f"  ❌ Failed: {str(e)}", err=stream_results)
             continue
     
+    if analyzer.latency is not None:
+        click.echo("⏱️ Adaptive timeouts:", err=stream_results)
+        for probe, stats in analyzer.latency.summary().items():
+            p95 = f"{stats['p95']:.2f}s" if stats['p95'] is not None else "n/a"
+            click.echo(f"  {probe}: p95 {p95}, timeout {stats['timeout']:.2f}s, "
+                       f"{stats['samples']} samples", err=stream_results)
+        if analyzer.resolver.hedged:
+            click.echo(f"  dns: {analyzer.resolver.hedged} hedged queries", err=stream_results)
+    
+    if analyzer.certificates.misses:
+        click.echo(f"📜 Certificates: {analyzer.certificates.misses} parsed, "
+                   f"{analyzer.certificates.hits} reused from cache", err=stream_results)
+    
+    if analyzer.scripts is not None:
+        stats = analyzer.scripts.summary()
+        click.echo(f"🧬 Scripts: {stats['unique_scripts']} unique analyzed, {stats['fetched']} downloads, "
+                   f"{stats['cached'] + stats['not_modified']} served from cache "
+                   f"({stats['not_modified']} revalidated)", err=stream_results)
+    
     if not save_dir and output == 'json':
-        # Print combined JSON results
-        click.echo(json.dumps(results, indent=2))
+        # Print combined JSON results, one element at a time
+        reporter.write_results(results, sys.stdout)
+    
+    targets.close()
+    if store:
+        store.close()
+
+
+@cli.command()
+@click.argument('url')
+@click.option('--max-pages', '-n', default=50, help='Maximum number of pages to fetch')
+@click.option('--depth', '-D', default=2, help='Maximum link depth from the start page')
+@click.option('--concurrency', '-c', default=8, help='Pages fetched in parallel')
+@click.option('--ignore-robots', is_flag=True, help='Fetch pages disallowed by robots.txt')
+@click.option('--output', '-o', type=click.Choice(['text', 'json']), default='text',
+              help='Output format (text or json)')
+@click.option('--save', '-s', type=click.Path(), help='Save report to file')
+@click.option('--timeout', '-t', default=10, help='Request timeout in seconds')
+@click.option('--verbose', '-v', is_flag=True, help='Verbose output')
+def crawl(url, max_pages, depth, concurrency, ignore_robots, output, save, timeout, verbose):
+    """Analyze a whole site by crawling same-site pages"""
+    
+    if not validate_url(url):
+        click.echo(click.style('❌ Invalid URL format', fg='red'), err=True)
+        sys.exit(1)
+    
+    try:
+        analyzer = PrivacyAnalyzer(timeout=timeout, verbose=verbose)
+        crawler = SiteCrawler(analyzer, max_pages=max_pages, max_depth=depth,
+                              concurrency=concurrency, respect_robots=not ignore_robots)
+        
+        if verbose:
+            click.echo(f"🕸️ Crawling {url} (up to {max_pages} pages, depth {depth})...")
+        
+        result = crawler.crawl(url)
+        reporter = Reporter(output_format=output)
+        
+        if save:
+            with open(save, 'w', encoding='utf-8') as f:
+                reporter.write_report(result, f)
+            click.echo(f"📄 Report saved to {save}")
+        else:
+            click.echo(reporter.generate_report(result))
+    
+    except KeyboardInterrupt:
+        click.echo(click.style('\n⚠️ Crawl interrupted by user', fg='yellow'), err=True)
+        sys.exit(1)
+    except Exception as e:
+        click.echo(click.style(f'❌ Crawl failed: {str(e)}', fg='red'), err=True)
+        if verbose:
+            import traceback
+            traceback.print_exc()
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('files', nargs=-1, required=True, type=click.Path(allow_dash=True))
+@click.option('--output', '-o', type=click.Choice(['text', 'json']), default='text',
+              help='Output format')
+@click.option('--top', default=20, help='Number of most prevalent tracker services to list')
+def aggregate(files, output, top):
+    """Summarize batch results (JSON array or NDJSON) across the fleet"""
+    
+    aggregator = FleetAggregator()
+    try:
+        for path in files:
+            for result in iter_results(path):
+                aggregator.add(result)
+    except (OSError, ValueError) as e:
+        click.echo(click.style(f'❌ Failed to read results: {str(e)}', fg='red'), err=True)
+        sys.exit(1)
+    
+    if not aggregator.rows:
+        click.echo(click.style('⚠️ No results found', fg='yellow'), err=True)
+        sys.exit(1)
+    
+    reporter = Reporter(output_format=output)
+    click.echo(reporter.generate_aggregate_report(aggregator.summary(top_services=top)))
+
+
+@cli.command()
+@click.argument('old', type=click.Path(exists=True))
+@click.argument('new', type=click.Path(exists=True))
+@click.option('--output', '-o', type=click.Choice(['text', 'ndjson']), default='text',
+              help='Output format')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_ROWS,
+              help='Results held in memory per sorted run (bounds memory use)')
+@click.option('--temp-dir', type=click.Path(exists=True, file_okay=False),
+              help='Directory for sorted run files')
+def diff(old, new, output, chunk_size, temp_dir):
+    """Show per-URL changes between two result snapshots"""
+    
+    reporter = Reporter(output_format=output)
+    counts = {'added': 0, 'removed': 0, 'changed': 0}
+    
+    try:
+        for change in diff_snapshots(old, new, chunk_rows=chunk_size, temp_dir=temp_dir):
+            counts[change['status']] += 1
+            click.echo(reporter.generate_diff_entry(change))
+    except (OSError, ValueError) as e:
+        click.echo(click.style(f'❌ Diff failed: {str(e)}', fg='red'), err=True)
+        sys.exit(1)
+    
+    click.echo(f"📊 {counts['changed']} changed, {counts['added']} added, "
+               f"{counts['removed']} removed", err=output == 'ndjson')
+
+
+@cli.command()
+@click.argument('urls', nargs=-1)
+@click.option('--input', '-i', 'input_file', type=click.File('r', encoding='utf-8'),
+              help='File with one URL per line (- for stdin)')
+@click.option('--db', default='privacylens-queue.db', type=click.Path(dir_okay=False),
+              help='SQLite database holding the queue and results')
+@click.option('--host', default='127.0.0.1',
+              help='Address to listen on (anything but loopback requires --token)')
+@click.option('--port', '-p', default=8765, help='Port to listen on')
+@click.option('--token', envvar='PRIVACYLENS_TOKEN',
+              help='Shared secret workers must send (env: PRIVACYLENS_TOKEN)')
+@click.option('--lease-seconds', default=300, help='Seconds before an unfinished job is reassigned')
+@click.option('--max-attempts', default=3, help='Attempts per URL before it is marked failed')
+@click.option('--results', '-r', type=click.Path(dir_okay=False),
+              help='Write collected results as NDJSON when the queue is finished')
+@click.option('--keep-running', is_flag=True, help='Keep serving after the queue is finished')
+def coordinator(urls, input_file, db, host, port, token, lease_seconds, max_attempts, results,
+                keep_running):
+    """Serve a URL queue to workers and collect their results"""
+    
+    # The API can enqueue URLs and read every result, so it is never exposed unauthenticated
+    if not token and not is_loopback(host):
+        raise click.UsageError(f'Listening on {host} requires --token')
+    
+    queue = JobQueue(db, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    pending = list(urls)
+    if input_file:
+        pending.extend(line.strip() for line in input_file if line.strip() and not line.startswith('#'))
+    
+    invalid = [url for url in pending if not validate_url(url)]
+    for url in invalid:
+        click.echo(click.style(f'⚠️ Skipping invalid URL: {url}', fg='yellow'), err=True)
+    added = queue.enqueue(url for url in pending if validate_url(url))
+    
+    server = CoordinatorServer((host, port), queue, token=token)
+    stats = queue.stats()
+    click.echo(f"🛰️ Coordinator listening on {host}:{server.server_address[1]} "
+               f"({added} added, {stats['total']} jobs in {db})")
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    last = None
+    try:
+        while True:
+            stats = queue.stats()
+            progress = (stats['done'], stats['failed'], stats['leased'])
+            if progress != last:
+                click.echo(f"  {stats['done'] + stats['failed']}/{stats['total']} finished "
+                           f"({stats['done']} done, {stats['failed']} failed, "
+                           f"{stats['leased']} in progress)")
+                last = progress
+            if stats['finished'] and not keep_running:
+                break
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo("Interrupted; queue state is kept in the database")
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    for failure in queue.iter_failures():
+        click.echo(f"  ❌ {failure['url']} failed after {failure['attempts']} attempts: "
+                   f"{failure['error']}")
+    
+    if results:
+        with open(results, 'w', encoding='utf-8') as f:
+            for result in queue.iter_results():
+                f.write(result)
+                f.write('\n')
+        click.echo(f"✅ Results saved to {results}")
+    queue.close()
+
+
+@cli.command()
+@click.option('--coordinator', '-c', 'address', required=True, help='Coordinator address (host:port)')
+@click.option('--batch-size', '-b', default=1, help='Jobs leased per request')
+@click.option('--timeout', '-t', default=10, help='Request timeout in seconds')
+@click.option('--headers-only', is_flag=True,
+              help='Only check HTTP security headers (skip SSL, DNS, WHOIS and content)')
+@click.option('--adaptive-timeouts', is_flag=True,
+              help='Derive per-probe timeouts from observed latency')
+@click.option('--no-fail-fast', is_flag=True,
+              help='Run every probe even when a host is unreachable')
+@click.option('--worker-id', help='Name reported to the coordinator (default: host-pid)')
+@click.option('--token', envvar='PRIVACYLENS_TOKEN',
+              help="Coordinator's shared secret (env: PRIVACYLENS_TOKEN)")
+@click.option('--wait', is_flag=True, help='Keep polling after the queue is finished')
+def worker(address, batch_size, timeout, headers_only, adaptive_timeouts, no_fail_fast,
+           worker_id, token, wait):
+    """Pull URLs from a coordinator and push analysis results back"""
+    
+    analyzer = PrivacyAnalyzer(timeout=timeout, headers_only=headers_only,
+                               adaptive_timeouts=adaptive_timeouts,
+                               fail_fast=not no_fail_fast)
+    scanner = Worker(address, analyzer, batch_size=batch_size, worker_id=worker_id, token=token)
+    
+    def report(job, result, error):
+        if isinstance(error, LeaseLost):
+            click.echo(f"  ⌛ {job['url']}: {error}")
+        elif error is not None:
+            click.echo(f"  ❌ {job['url']}: {error}")
+        elif not result.get('reachable', True):
+            click.echo(f"  ⚫ {job['url']}: {result['analysis']['http_security']['error']}")
+        else:
+            click.echo(f"  ✅ {job['url']}: {result.get('privacy_score', 0)}/100")
+    
+    click.echo(f"🔧 Worker {scanner.worker_id} pulling from {scanner.base_url}")
+    try:
+        scanner.run(exit_when_idle=not wait, on_result=report)
+    except requests.RequestException as e:
+        click.echo(click.style(f'❌ Lost coordinator: {str(e)}', fg='red'), err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        click.echo("Interrupted; unfinished leases will be reassigned")
+    click.echo(f"📊 {scanner.completed} completed, {scanner.failed} failed, {scanner.lost} lost")
+
+
+@cli.command('analyze-archive')
+@click.argument('archives', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', type=click.Choice(['text', 'json', 'ndjson']), default='text',
+              help='Output format')
+@click.option('--compact', is_flag=True, help='Compact JSON output (NDJSON is always compact)')
+@click.option('--workers', '-j', type=int, help='Parallel processes (default: one per core)')
+@click.option('--all-responses', is_flag=True,
+              help='Also evaluate headers of non-HTML and non-2xx responses')
+@click.option('--max-body', default=DEFAULT_MAX_BODY,
+              help='Largest body in bytes parsed for content analysis')
+def analyze_archive(archives, output, compact, workers, all_responses, max_body):
+    """Analyze responses stored in HAR or WARC archives, without network access"""
+    
+    reporter = Reporter(output_format=output, compact=compact)
+    results = analyze_archives(archives, workers=workers, include_all=all_responses,
+                               max_body=max_body)
+    counted = 0
+    
+    def counting(results):
+        nonlocal counted
+        for result in results:
+            counted += 1
+            yield result
+    
+    try:
+        if output == 'text':
+            for result in counting(results):
+                score = result.get('privacy_score', 0)
+                status = '🟢' if score >= 80 else '🟡' if score >= 60 else '🔴'
+                click.echo(f"{status} {score:3d}/100  {result['url']}")
+        else:
+            reporter.write_results(counting(results), sys.stdout)
+    except (OSError, ValueError) as e:
+        click.echo(click.style(f'❌ Archive analysis failed: {str(e)}', fg='red'), err=True)
+        sys.exit(1)
+    
+    click.echo(f"📊 {counted} responses analyzed from {len(archives)} archive(s)",
+               err=output != 'text')
+
+
+@cli.command()
+@click.argument('files', nargs=-1, required=True, type=click.Path(allow_dash=True))
+@click.option('--db', default=DEFAULT_HISTORY, type=click.Path(dir_okay=False),
+              help='History database')
+def record(files, db):
+    """Append saved results (JSON or NDJSON) to the scan history"""
+    
+    store = HistoryStore(db)
+    try:
+        added = sum(store.record(iter_results(path)) for path in files)
+    except (OSError, ValueError) as e:
+        click.echo(click.style(f'❌ Import failed: {str(e)}', fg='red'), err=True)
+        sys.exit(1)
+    stats = store.stats()
+    store.close()
+    click.echo(f"🗄️ {added} new scans recorded ({stats['scans']} scans of "
+               f"{stats['domains']} domains in {db})")
+
+
+@cli.command()
+@click.option('--db', default=DEFAULT_HISTORY, type=click.Path(exists=True, dir_okay=False),
+              help='History database')
+@click.option('--domain', '-d', help='Only this domain')
+@click.option('--since', help="Scanned at or after: ISO date, age such as 30d/12h/2w, or 'month'")
+@click.option('--until', help='Scanned before (same formats as --since)')
+@click.option('--score-below', type=int, help='Privacy score lower than this')
+@click.option('--score-above', type=int, help='Privacy score higher than this')
+@click.option('--expiring-within', type=int, metavar='DAYS',
+              help='Certificate expires within this many days (or has expired)')
+@click.option('--service', help='Detected tracker service, e.g. "Facebook Pixel"')
+@click.option('--added', metavar='SERVICE',
+              help='Domains that added this tracker service since --since (default: this month)')
+@click.option('--all-scans', is_flag=True, help="Match every stored scan, not only each domain's latest")
+@click.option('--limit', '-n', type=int, help='Maximum number of rows')
+@click.option('--output', '-o', type=click.Choice(['text', 'ndjson']), default='text',
+              help='Output format')
+def query(db, domain, since, until, score_below, score_above, expiring_within, service, added,
+          all_scans, limit, output):
+    """Query the scan history"""
+    
+    try:
+        since = parse_since(since)
+        until = parse_since(until)
+    except ValueError as e:
+        click.echo(click.style(f'❌ {str(e)}', fg='red'), err=True)
+        sys.exit(1)
+    
+    store = HistoryStore(db)
+    reporter = Reporter(output_format=output)
+    if added:
+        rows = store.added(added, since if since is not None else parse_since('month'), until)
+    else:
+        rows = store.query(domain=domain, since=since, until=until, score_below=score_below,
+                           score_above=score_above, expiring_within=expiring_within,
+                           service=service, history=all_scans, limit=limit)
+    
+    count = 0
+    for row in rows:
+        count += 1
+        click.echo(reporter.generate_history_entry(row))
+    store.close()
+    click.echo(f"📊 {count} matching scans", err=output == 'ndjson')
+
+
+@cli.command('native-host', context_settings={'ignore_unknown_options': True, 'allow_extra_args': True})
+@click.option('--cache', default=DEFAULT_CACHE, type=click.Path(dir_okay=False),
+              help='Result cache shared by all host processes')
+@click.option('--max-entries', default=500, help='Sites kept in the cache')
+@click.option('--ttl', default=6 * 3600, help='Seconds a cached result stays fresh')
+@click.option('--timeout', '-t', default=10, help='Request timeout in seconds')
+@click.option('--full', is_flag=True, help='Run the TLS, DNS and WHOIS probes too, not only headers')
+@click.option('--content', is_flag=True, help='Also fetch and classify page content (implies --full)')
+@click.option('--install', is_flag=True, help='Register this host with a Chromium-based browser (Linux, macOS) and exit')
+@click.option('--extension-id', multiple=True, help='Extension allowed to connect (with --install)')
+@click.option('--browser', type=click.Choice(sorted(MANIFEST_DIRS['linux'])), default='chrome',
+              help='Browser to register with (with --install)')
+@click.option('--manifest-dir', type=click.Path(file_okay=False),
+              help='Write the host manifest here instead of the browser default')
+def native_host(cache, max_entries, ttl, timeout, full, content, install, extension_id, browser, manifest_dir):
+    """Serve the browser extension over native messaging"""
+    
+    if install:
+        if not extension_id:
+            click.echo(click.style('❌ --install needs at least one --extension-id', fg='red'), err=True)
+            sys.exit(1)
+        try:
+            host_args = ['--content'] if content else ['--full'] if full else []
+            path = install_manifest(extension_id, browser=browser, directory=manifest_dir,
+                                    host_args=host_args)
+        except OSError as e:
+            click.echo(click.style(f'❌ {str(e)}', fg='red'), err=True)
+            sys.exit(1)
+        click.echo(f"✅ Native messaging host registered: {path}")
+        return
+    
+    # stdout carries the framed protocol; anything else printed goes to stderr
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    host = NativeHost(ResultCache(cache, max_entries=max_entries, ttl=ttl),
+                      analyzer_factory=lambda: PrivacyAnalyzer(timeout=timeout,
+                                                               headers_only=not (full or content)),
+                      include_content=content)
+    host.serve(sys.stdin.buffer, out)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,192 @@
+"""
+Fleet Aggregation
+Columnar statistics over large batches of PrivacyLens results
+"""
+
+from array import array
+from collections import Counter
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; pure-Python fallbacks are used instead
+    np = None
+
+# percentile(method=...) needs numpy 1.22; older versions use the fallbacks too
+if np is not None and tuple(int(part) for part in np.__version__.split('.')[:2]) < (1, 22):
+    np = None
+
+
+# Header display names as produced by PrivacyAnalyzer._analyze_http_security
+SECURITY_HEADERS = (
+    'HSTS', 'CSP', 'X-Frame-Options', 'X-Content-Type-Options',
+    'Referrer-Policy', 'Permissions-Policy', 'X-XSS-Protection'
+)
+
+TRACKER_CATEGORIES = (
+    'tracking_scripts', 'analytics_tools', 'advertising_networks', 'social_widgets'
+)
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Sentinel for "no value" in the 32-bit integer columns. It is the smallest
+# int32, far outside every real value (scores are 0-100, certificate days
+# are a few thousand either side of zero), so e.g. an expired certificate's
+# -1 days is never mistaken for a missing value
+MISSING = -2 ** 31
+
+
+class FleetAggregator:
+    """Accumulate batch results into array-backed columns
+
+    Each result costs a few bytes per column instead of a nested dict, so
+    millions of rows fit comfortably in memory. Results are consumed one at
+    a time and never retained. The HTTPS and header columns only hold rows
+    whose HTTP probe got a response, so failed scans do not dilute them.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.score = array('i')
+        self.https = array('b')
+        self.cert_days = array('i')
+        self.headers = {name: array('b') for name in SECURITY_HEADERS}
+        self.trackers = {category: array('H') for category in TRACKER_CATEGORIES}
+        self.service_sites = Counter()
+        self.failed = 0
+
+    def add(self, result):
+        """Append one analysis result to the columns"""
+        analysis = result.get('analysis', {})
+        http_security = analysis.get('http_security', {})
+        ssl_cert = analysis.get('ssl_certificate', {})
+        content = analysis.get('content_analysis', {})
+
+        self.rows += 1
+        self.score.append(_int_or_missing(result.get('privacy_score')))
+        self.cert_days.append(_int_or_missing(ssl_cert.get('days_until_expiry')))
+
+        if 'error' in http_security or 'status_code' not in http_security:
+            self.failed += 1
+        else:
+            self.https.append(1 if http_security.get('https_used') else 0)
+            headers = http_security.get('headers', {})
+            for name, column in self.headers.items():
+                column.append(1 if headers.get(name, {}).get('present') else 0)
+
+        services = set()
+        for category, column in self.trackers.items():
+            entries = content.get(category, [])
+            column.append(min(len(entries), 0xFFFF))
+            services.update(entry.get('service', 'Unknown') for entry in entries)
+        # Prevalence counts sites, not script tags
+        self.service_sites.update(services)
+
+    def summary(self, top_services=20):
+        """Compute fleet-wide statistics from the columns"""
+        scores = _valid(self.score)
+        cert_days = _valid(self.cert_days)
+        scanned = self.rows - self.failed
+
+        return {
+            'rows': self.rows,
+            'failed': self.failed,
+            'score': {
+                'mean': _mean(scores),
+                'percentiles': _percentiles(scores),
+                'histogram': _histogram(scores, bin_width=10, upper=100),
+            },
+            'https_rate': _share(self.https, scanned),
+            'header_presence': {
+                name: _share(column, scanned) for name, column in self.headers.items()
+            },
+            'trackers': {
+                category: {
+                    'mean': _mean(column),
+                    'sites_with_any': _share(column, self.rows),
+                    'percentiles': _percentiles(column),
+                }
+                for category, column in self.trackers.items()
+            },
+            'service_prevalence': [
+                {'service': service, 'sites': count, 'rate': round(count / self.rows, 4)}
+                for service, count in self.service_sites.most_common(top_services)
+            ],
+            'certificates': {
+                'known': len(cert_days),
+                'expired': _count_below(cert_days, 0),
+                'expiring_within_14_days': _count_below(cert_days, 14),
+                'expiring_within_30_days': _count_below(cert_days, 30),
+                'percentiles': _percentiles(cert_days),
+            },
+        }
+
+
+def _int_or_missing(value):
+    # bool is an int subclass but never a score or a day count
+    if isinstance(value, int) and not isinstance(value, bool) and -2 ** 31 < value < 2 ** 31:
+        return value
+    return MISSING
+
+
+def _valid(column):
+    """Return the column without MISSING sentinels"""
+    if np is not None:
+        values = np.frombuffer(column, dtype=column.typecode)
+        return values[values != MISSING]
+    return array(column.typecode, (value for value in column if value != MISSING))
+
+
+def _mean(column):
+    if not len(column):
+        return None
+    if np is not None:
+        return round(float(np.mean(np.asarray(column, dtype=np.float64))), 2)
+    return round(sum(column) / len(column), 2)
+
+
+def _share(column, rows):
+    """Fraction of rows with a non-zero value"""
+    if not rows:
+        return None
+    if np is not None:
+        return round(int(np.count_nonzero(np.frombuffer(column, dtype=column.typecode))) / rows, 4)
+    return round(sum(1 for value in column if value) / rows, 4)
+
+
+def _count_below(column, threshold):
+    if np is not None:
+        return int(np.count_nonzero(np.asarray(column) < threshold))
+    return sum(1 for value in column if value < threshold)
+
+
+def _percentiles(column):
+    """Nearest-rank percentiles"""
+    count = len(column)
+    if not count:
+        return {f'p{p}': None for p in PERCENTILES}
+    if np is not None:
+        values = np.percentile(np.asarray(column), PERCENTILES, method='inverted_cdf')
+        return {f'p{p}': int(v) for p, v in zip(PERCENTILES, values)}
+    ordered = sorted(column)
+    return {
+        f'p{p}': ordered[max(0, math.ceil(p / 100 * count) - 1)]
+        for p in PERCENTILES
+    }
+
+
+def _histogram(column, bin_width, upper):
+    """Fixed-width histogram; the top bin includes the upper bound"""
+    bins = upper // bin_width
+    if np is not None:
+        index = np.minimum(np.asarray(column, dtype=np.int64) // bin_width, bins - 1)
+        counts = np.bincount(index, minlength=bins).tolist()
+    else:
+        counts = [0] * bins
+        for value in column:
+            counts[min(value // bin_width, bins - 1)] += 1
+    labels = [
+        f'{i * bin_width}-{upper if i == bins - 1 else (i + 1) * bin_width - 1}'
+        for i in range(bins)
+    ]
+    return dict(zip(labels, counts))
@@ -8,24 +8,72 @@ import ssl
 import socket
 import whois
 import dns.resolver
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
 from datetime import datetime, timezone
 import re
+import time
 from bs4 import BeautifulSoup
 import json
+from .certificates import (
+    STAPLING_SUPPORTED, CertificateCache, analyze_chain, build_chain, fetch_stapled_ocsp
+)
+from .dnssec import SECURE, DNSSECValidator
+from .evaluation import ResponseEvaluator
+from .network import (
+    AddressPinner, CircuitBreaker, HedgedResolver, LatencyTracker, PinnedHTTPAdapter
+)
+from .scripts import ScriptInspector
 
 
-class PrivacyAnalyzer:
-    def __init__(self, timeout=10, verbose=False):
+class PrivacyAnalyzer(ResponseEvaluator):
+    def __init__(self, timeout=10, verbose=False, headers_only=False,
+                 adaptive_timeouts=False, hedge_nameservers=None, fail_fast=True,
+                 inspect_scripts=False, script_ttl=3600, ocsp_stapling=False):
         self.timeout = timeout
         self.verbose = verbose
+        self.headers_only = headers_only
+        self.fail_fast = fail_fast
+        self.breaker = CircuitBreaker()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'PrivacyLens/1.0.0 (Privacy Analysis Tool)'
         })
+        
+        # Adaptive timeouts: per-probe latency is tracked across the run and
+        # `timeout` becomes the ceiling rather than the fixed value.
+        self.latency = LatencyTracker(ceiling=timeout) if adaptive_timeouts else None
+        self.resolver = HedgedResolver(latency=self.latency,
+                                       alternate_nameservers=hedge_nameservers)
+        
+        # Every connection (HTTP, content, TLS, pre-check) goes through the
+        # pinned addresses, so each host is resolved once per scan
+        self.addresses = AddressPinner(self.resolver)
+        
+        # DNSSEC validator; its trust-chain cache lives as long as the analyzer,
+        # so root and TLD keys are validated once per batch. Like the resolver,
+        # it reads the system nameservers on first use
+        self.dnssec = DNSSECValidator(timeout=timeout)
+        adapter = PinnedHTTPAdapter(self.addresses)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Parsed certificates by fingerprint; shared intermediates are decoded once per batch.
+        # Checking the OCSP staple costs a second handshake, so it is opt-in
+        self.certificates = CertificateCache()
+        self.ocsp_stapling = ocsp_stapling
+        
+        # Optional third-party script inspection; its caches live as long as
+        # the analyzer, so each unique script is fetched once per TTL per batch
+        self.scripts = None
+        if inspect_scripts:
+            self.scripts = ScriptInspector(self._fetch_script, ttl=script_ttl)
     
-    def analyze(self, url):
-        """Perform complete privacy and security analysis"""
+    def analyze(self, url, include_content=True, on_response=None):
+        """Perform complete privacy and security analysis
+
+        on_response, if given, receives the HTTP probe's response (body
+        unread in header-only mode) so callers can reuse the page.
+        """
         parsed_url = urlparse(url)
         domain = parsed_url.netloc
         
@@ -36,64 +84,109 @@ class PrivacyAnalyzer:
             'url': url,
             'domain': domain,
             'timestamp': datetime.now(timezone.utc).isoformat(),
+            'reachable': True,
+            'addresses': [],
             'analysis': {}
         }
         
-        # Perform various analyses
-        result['analysis']['http_security'] = self._analyze_http_security(url)
-        result['analysis']['ssl_certificate'] = self._analyze_ssl_certificate(domain)
-        result['analysis']['dns_security'] = self._analyze_dns_security(domain)
-        result['analysis']['whois_info'] = self._analyze_whois(domain)
-        result['analysis']['content_analysis'] = self._analyze_content(url)
+        # Address resolution stage: re-pins this host's A/AAAA records for the
+        # scan; other hosts' pins (possibly in use by concurrent scans) are kept
+        try:
+            self.addresses.repin(parsed_url.hostname)
+        except OSError:
+            pass  # Reported by the pre-check / probes
+        
+        # Connectivity check: the HTTP probe's own connection doubles as the
+        # pre-check, so a healthy host costs no extra connect. When it cannot
+        # connect, the probes that need the host short-circuit instead of each
+        # waiting for its own timeout
+        unreachable = None
+        reason = self._check_reachability(parsed_url) if self.fail_fast else None
+        if reason is None:
+            http_security, connect_error = self._probe_http(url, on_response)
+            if self.fail_fast:
+                reason = self._record_reachability(parsed_url, connect_error)
+        if reason:
+            result['reachable'] = False
+            unreachable = http_security = {'status': 'unreachable', 'error': reason}
+            if self.verbose:
+                print(f"  ⚫ {reason}")
         
-        # Calculate privacy score
-        result['privacy_score'] = self._calculate_privacy_score(result['analysis'])
-        result['recommendations'] = self._generate_recommendations(result['analysis'])
+        # Perform various analyses
+        result['analysis']['http_security'] = http_security
+        if self.headers_only:
+            # Header-only sweeps skip every probe that needs more than the response head
+            result['mode'] = 'headers-only'
+        else:
+            result['analysis']['ssl_certificate'] = unreachable or self._analyze_ssl_certificate(domain)
+            result['analysis']['dns_security'] = self._analyze_dns_security(domain)
+            result['analysis']['whois_info'] = self._analyze_whois(domain)
+            if include_content:
+                result['analysis']['content_analysis'] = unreachable or self._analyze_content(url)
+        
+        result['addresses'] = self.addresses.pinned(parsed_url.hostname)
+        
+        # Calculate privacy score; an unreachable host was not measured, so it
+        # gets no score rather than one penalized for every failed probe
+        if unreachable:
+            result['privacy_score'] = None
+            result['recommendations'] = []
+        else:
+            result['privacy_score'] = self._calculate_privacy_score(result['analysis'])
+            result['recommendations'] = self._generate_recommendations(result['analysis'])
         
         return result
     
     def _analyze_http_security(self, url):
         """Analyze HTTP security headers"""
+        return self._probe_http(url)[0]
+    
+    def _probe_http(self, url, on_response=None):
+        """Run the HTTP probe; return (analysis, error connecting to the scanned host)"""
         if self.verbose:
             print("  📡 Analyzing HTTP headers...")
         
         try:
-            response = self.session.get(url, timeout=self.timeout, allow_redirects=True)
+            # In header-only mode the body is never read: the response is streamed
+            # and closed as soon as the status line and headers have arrived.
+            response = self._timed('http', lambda timeout: self.session.get(
+                url, timeout=timeout, allow_redirects=True, stream=self.headers_only))
+            if self.headers_only:
+                response.close()
+            if on_response is not None:
+                on_response(response)
             headers = response.headers
             
             analysis = {
                 'status_code': response.status_code,
                 'final_url': response.url,
                 'https_used': response.url.startswith('https://'),
-                'headers': {}
-            }
-            
-            # Security headers to check
-            security_headers = {
-                'strict-transport-security': 'HSTS',
-                'content-security-policy': 'CSP', 
-                'x-frame-options': 'X-Frame-Options',
-                'x-content-type-options': 'X-Content-Type-Options',
-                'referrer-policy': 'Referrer-Policy',
-                'permissions-policy': 'Permissions-Policy',
-                'x-xss-protection': 'X-XSS-Protection'
+                'redirect_chain': [
+                    {'url': hop.url, 'status_code': hop.status_code}
+                    for hop in response.history
+                ],
             }
             
-            for header_name, display_name in security_headers.items():
-                value = headers.get(header_name)
-                analysis['headers'][display_name] = {
-                    'present': value is not None,
-                    'value': value,
-                    'secure': self._evaluate_header_security(header_name, value)
-                }
+            analysis.update(self._evaluate_headers(headers))
             
-            # Check for insecure headers
-            analysis['insecure_headers'] = self._check_insecure_headers(headers)
-            
-            return analysis
+            return analysis, None
             
         except requests.RequestException as e:
-            return {'error': str(e)}
+            return {'error': str(e)}, self._connect_error(e, url)
+    
+    @staticmethod
+    def _connect_error(error, url):
+        """Return the error if it means the scanned host refused or never answered a connection
+
+        TLS failures prove the host is up, and failures on redirect hops to
+        other hosts say nothing about the scanned one.
+        """
+        if not isinstance(error, requests.ConnectionError) or isinstance(error, requests.exceptions.SSLError):
+            return None
+        request_url = error.request.url if error.request is not None else url
+        if urlparse(request_url).hostname != urlparse(url).hostname:
+            return None
+        return error
     
     def _analyze_ssl_certificate(self, domain):
         """Analyze SSL certificate"""
@@ -102,30 +195,37 @@ class PrivacyAnalyzer:
         
         try:
             context = ssl.create_default_context()
-            with socket.create_connection((domain, 443), timeout=self.timeout) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    # Parse certificate dates
-                    not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
-                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    now = datetime.now()
-                    
-                    days_until_expiry = (not_after - now).days
-                    
-                    return {
-                        'valid': True,
-                        'issuer': dict(x[0] for x in cert['issuer']),
-                        'subject': dict(x[0] for x in cert['subject']),
-                        'serial_number': cert['serialNumber'],
-                        'version': cert['version'],
-                        'not_before': cert['notBefore'],
-                        'not_after': cert['notAfter'],
-                        'days_until_expiry': days_until_expiry,
-                        'is_expired': days_until_expiry < 0,
-                        'expires_soon': days_until_expiry < 30,
-                        'san': cert.get('subjectAltName', [])
-                    }
+            with self._timed('tls', lambda timeout: self._connect_tls(domain, context, timeout)) as ssock:
+                cert = ssock.getpeercert()
+                served = self._served_chain(ssock)
+            
+            # Parse certificate dates
+            not_after = datetime.fromtimestamp(ssl.cert_time_to_seconds(cert['notAfter']), timezone.utc)
+            days_until_expiry = (not_after - datetime.now(timezone.utc)).days
+            
+            analysis = {
+                'valid': True,
+                'issuer': dict(x[0] for x in cert['issuer']),
+                'subject': dict(x[0] for x in cert['subject']),
+                'serial_number': cert['serialNumber'],
+                'version': cert['version'],
+                'not_before': cert['notBefore'],
+                'not_after': cert['notAfter'],
+                'days_until_expiry': days_until_expiry,
+                'is_expired': days_until_expiry < 0,
+                'expires_soon': days_until_expiry < 30,
+                'san': cert.get('subjectAltName', [])
+            }
+            
+            # Chain-level checks: key, signature, intermediates, SAN coverage, OCSP.
+            # A failure here says nothing about the certificate's validity
+            try:
+                chain, analysis['chain_source'] = build_chain(self.certificates, served, self._fetch_issuer)
+                hostname = urlparse(f'//{domain}').hostname
+                analysis.update(analyze_chain(chain, hostname, stapled=self._stapled_ocsp(domain)))
+            except Exception as e:
+                analysis['chain_error'] = str(e)
+            return analysis
                     
         except Exception as e:
             return {'valid': False, 'error': str(e)}
@@ -146,21 +246,21 @@ class PrivacyAnalyzer:
         try:
             # Check CAA records
             try:
-                caa_records = dns.resolver.resolve(domain, 'CAA')
+                caa_records = self.resolver.resolve(domain, 'CAA')
                 analysis['caa_records'] = [str(record) for record in caa_records]
             except:
                 pass
             
             # Check MX records
             try:
-                mx_records = dns.resolver.resolve(domain, 'MX')
+                mx_records = self.resolver.resolve(domain, 'MX')
                 analysis['mx_records'] = [str(record) for record in mx_records]
             except:
                 pass
             
             # Check SPF record
             try:
-                txt_records = dns.resolver.resolve(domain, 'TXT')
+                txt_records = self.resolver.resolve(domain, 'TXT')
                 for record in txt_records:
                     record_str = str(record)
                     if record_str.startswith('"v=spf1'):
@@ -171,7 +271,7 @@ class PrivacyAnalyzer:
             
             # Check DMARC record
             try:
-                dmarc_records = dns.resolver.resolve(f'_dmarc.{domain}', 'TXT')
+                dmarc_records = self.resolver.resolve(f'_dmarc.{domain}', 'TXT')
                 for record in dmarc_records:
                     record_str = str(record)
                     if 'v=DMARC1' in record_str:
@@ -179,6 +279,11 @@ class PrivacyAnalyzer:
                         break
             except:
                 pass
+            
+            # Validate the DNSSEC chain of trust
+            validation = self.dnssec.validate(urlparse(f'//{domain}').hostname)
+            analysis['dnssec'] = validation['status'] == SECURE
+            analysis['dnssec_validation'] = validation
                 
         except Exception as e:
             analysis['error'] = str(e)
@@ -221,186 +326,106 @@ class PrivacyAnalyzer:
             print("  📄 Analyzing page content...")
         
         try:
-            response = self.session.get(url, timeout=self.timeout)
+            response = self._timed('content', lambda timeout: self.session.get(url, timeout=timeout))
             soup = BeautifulSoup(response.content, 'html.parser')
-            
-            analysis = {
-                'tracking_scripts': [],
-                'social_widgets': [],
-                'analytics_tools': [],
-                'advertising_networks': [],
-                'third_party_resources': []
-            }
-            
-            # Find all script tags
-            scripts = soup.find_all('script', src=True)
-            for script in scripts:
-                src = script.get('src')
-                script_type = self._classify_script(src)
-                
-                if script_type['category']:
-                    analysis[script_type['category']].append({
-                        'url': src,
-                        'service': script_type['service'],
-                        'domain': self._extract_domain(src)
-                    })
-            
-            # Find tracking pixels and beacons
-            tracking_elements = soup.find_all(['img', 'iframe'], src=True)
-            for element in tracking_elements:
-                src = element.get('src')
-                if self._is_tracking_resource(src):
-                    analysis['third_party_resources'].append({
-                        'type': element.name,
-                        'url': src,
-                        'domain': self._extract_domain(src)
-                    })
-            
+            analysis = self._classify_content(soup)
+            if self.scripts is not None:
+                if self.verbose:
+                    print("  🧬 Inspecting third-party scripts...")
+                analysis['script_inspection'] = self.scripts.inspect(
+                    self._third_party_scripts(soup, response.url))
             return analysis
             
         except Exception as e:
             return {'error': str(e)}
     
-    def _calculate_privacy_score(self, analysis):
-        """Calculate overall privacy score (0-100)"""
-        score = 100
-        
-        # HTTP Security (40 points)
-        http_security = analysis.get('http_security', {})
-        if not http_security.get('https_used', False):
-            score -= 15
-        
-        headers = http_security.get('headers', {})
-        if not headers.get('HSTS', {}).get('present', False):
-            score -= 5
-        if not headers.get('CSP', {}).get('present', False):
-            score -= 8
-        if not headers.get('X-Frame-Options', {}).get('present', False):
-            score -= 3
-        if not headers.get('Referrer-Policy', {}).get('secure', False):
-            score -= 4
-        if not headers.get('X-Content-Type-Options', {}).get('present', False):
-            score -= 2
-        if not headers.get('Permissions-Policy', {}).get('present', False):
-            score -= 3
-        
-        # SSL Certificate (20 points)
-        ssl_cert = analysis.get('ssl_certificate', {})
-        if not ssl_cert.get('valid', False):
-            score -= 15
-        elif ssl_cert.get('is_expired', False):
-            score -= 10
-        elif ssl_cert.get('expires_soon', False):
-            score -= 5
-        
-        # DNS Security (15 points)
-        dns_sec = analysis.get('dns_security', {})
-        if not dns_sec.get('spf_record'):
-            score -= 3
-        if not dns_sec.get('dmarc_record'):
-            score -= 4
-        if not dns_sec.get('caa_records'):
-            score -= 2
-        
-        # Content Analysis (25 points)
-        content = analysis.get('content_analysis', {})
-        tracking_count = len(content.get('tracking_scripts', []))
-        analytics_count = len(content.get('analytics_tools', []))
-        advertising_count = len(content.get('advertising_networks', []))
-        
-        score -= min(10, tracking_count * 2)
-        score -= min(5, analytics_count * 1)
-        score -= min(10, advertising_count * 3)
-        
-        return max(0, min(100, score))
+    def _third_party_scripts(self, soup, page_url):
+        """Absolute URLs of scripts loaded from other hosts than the page"""
+        page_host = urlparse(page_url).hostname
+        urls = []
+        for script in soup.find_all('script', src=True):
+            src = urljoin(page_url, script['src'])
+            host = urlparse(src).hostname
+            if host and host != page_host and src.startswith(('http://', 'https://')):
+                urls.append(src)
+        return urls
     
-    def _generate_recommendations(self, analysis):
-        """Generate privacy improvement recommendations"""
-        recommendations = []
-        
-        http_security = analysis.get('http_security', {})
-        ssl_cert = analysis.get('ssl_certificate', {})
-        dns_sec = analysis.get('dns_security', {})
-        content = analysis.get('content_analysis', {})
-        
-        # HTTPS recommendations
-        if not http_security.get('https_used', False):
-            recommendations.append({
-                'priority': 'high',
-                'category': 'Security',
-                'issue': 'No HTTPS encryption',
-                'recommendation': 'Enable HTTPS with a valid SSL/TLS certificate'
-            })
-        
-        # Security headers
-        headers = http_security.get('headers', {})
-        if not headers.get('HSTS', {}).get('present', False):
-            recommendations.append({
-                'priority': 'medium',
-                'category': 'Security Headers',
-                'issue': 'Missing HSTS header',
-                'recommendation': 'Add Strict-Transport-Security header to enforce HTTPS'
-            })
-        
-        if not headers.get('CSP', {}).get('present', False):
-            recommendations.append({
-                'priority': 'high',
-                'category': 'Security Headers',
-                'issue': 'Missing Content Security Policy',
-                'recommendation': 'Implement CSP to prevent XSS and data injection attacks'
-            })
-        
-        # SSL Certificate
-        if ssl_cert.get('expires_soon', False):
-            recommendations.append({
-                'priority': 'medium',
-                'category': 'SSL Certificate',
-                'issue': 'SSL certificate expires soon',
-                'recommendation': 'Renew SSL certificate before expiration'
-            })
-        
-        # Privacy concerns
-        tracking_scripts = content.get('tracking_scripts', [])
-        if len(tracking_scripts) > 3:
-            recommendations.append({
-                'priority': 'medium',
-                'category': 'Privacy',
-                'issue': f'{len(tracking_scripts)} tracking scripts detected',
-                'recommendation': 'Consider reducing third-party tracking scripts'
-            })
-        
-        return recommendations
+    def _fetch_script(self, url, headers):
+        """Fetch a script for inspection through the shared session and timeouts"""
+        # Own probe: script downloads must not skew the page content latencies
+        return self._timed('script', lambda timeout: self.session.get(
+            url, headers=headers, timeout=timeout, stream=True))
     
-    def _evaluate_header_security(self, header_name, value):
-        """Evaluate if a security header value is secure"""
-        if not value:
-            return False
-        
-        if header_name == 'strict-transport-security':
-            return 'max-age=' in value.lower()
-        elif header_name == 'content-security-policy':
-            return len(value) > 10  # Basic check
-        elif header_name == 'x-frame-options':
-            return value.lower() in ['deny', 'sameorigin']
-        elif header_name == 'referrer-policy':
-            secure_policies = ['no-referrer', 'same-origin', 'strict-origin']
-            return any(policy in value.lower() for policy in secure_policies)
-        
-        return True
+    def _check_reachability(self, parsed_url):
+        """Return the reason to skip a host whose circuit is open, otherwise None"""
+        host = parsed_url.hostname
+        if self.breaker.is_open(host):
+            return f'Host unreachable: circuit open after {self.breaker.failures(host)} failed attempts'
+        return None
     
-    def _check_insecure_headers(self, headers):
-        """Check for headers that reveal too much information"""
-        insecure = []
-        
-        server = headers.get('server', '')
-        if server and len(server) > 20:  # Detailed server info
-            insecure.append('Detailed server information exposed')
-        
-        x_powered_by = headers.get('x-powered-by', '')
-        if x_powered_by:
-            insecure.append(f'Technology stack exposed: {x_powered_by}')
+    def _record_reachability(self, parsed_url, connect_error):
+        """Feed the HTTP probe's connection outcome to the circuit breaker"""
+        host = parsed_url.hostname
+        if connect_error is None:
+            self.breaker.record_success(host)
+            return None
+        self.breaker.record_failure(host)
+        port = parsed_url.port or (443 if parsed_url.scheme == 'https' else 80)
+        return f'Host unreachable: cannot connect to {host}:{port} ({connect_error})'
+    
+    def _probe_timeout(self, probe):
+        """Return the timeout for a probe (adaptive when enabled)"""
+        if self.latency is None:
+            return self.timeout
+        return self.latency.timeout(probe)
+    
+    def _timed(self, probe, call):
+        """Run call(timeout) for a probe, feeding its latency to the tracker"""
+        timeout = self._probe_timeout(probe)
+        if self.latency is None:
+            return call(timeout)
         
-        return insecure
+        start = time.monotonic()
+        try:
+            result = call(timeout)
+        except (requests.Timeout, socket.timeout):
+            self.latency.record_timeout(probe)
+            raise
+        self.latency.record(probe, time.monotonic() - start)
+        return result
+    
+    def _served_chain(self, ssock):
+        """DER certificates sent in the handshake (leaf only before Python 3.13)"""
+        get_chain = getattr(ssock, 'get_verified_chain', None)
+        if get_chain is not None:
+            chain = get_chain()
+            if chain:
+                return list(chain)
+        return [ssock.getpeercert(binary_form=True)]
+    
+    def _fetch_issuer(self, url):
+        """Download an issuer certificate named in an AIA caIssuers extension"""
+        return self._timed('aia', lambda timeout: self.session.get(url, timeout=timeout))
+    
+    def _stapled_ocsp(self, domain):
+        """Stapled OCSP response (b'' if none), or None when it is not checked"""
+        if not (self.ocsp_stapling and STAPLING_SUPPORTED):
+            return None
+        try:
+            timeout = self._probe_timeout('tls')
+            sock = self.addresses.connect(domain, 443, timeout)
+            return fetch_stapled_ocsp(sock, urlparse(f'//{domain}').hostname, timeout)
+        except Exception:
+            return None
+    
+    def _connect_tls(self, domain, context, timeout):
+        """Open a TLS connection to the domain on port 443"""
+        sock = self.addresses.connect(domain, 443, timeout)
+        try:
+            return context.wrap_socket(sock, server_hostname=domain)
+        except Exception:
+            sock.close()
+            raise
     
     def _check_privacy_protection(self, whois_data):
         """Check if domain privacy protection is enabled"""
@@ -410,38 +435,3 @@ class PrivacyAnalyzer:
         
         registrant = str(whois_data.registrant or '').lower()
         return any(indicator in registrant for indicator in privacy_indicators)
-    
-    def _classify_script(self, src):
-        """Classify third-party scripts by service type"""
-        services = {
-            'google-analytics.com': {'category': 'analytics_tools', 'service': 'Google Analytics'},
-            'googletagmanager.com': {'category': 'analytics_tools', 'service': 'Google Tag Manager'},
-            'facebook.com': {'category': 'tracking_scripts', 'service': 'Facebook Pixel'},
-            'facebook.net': {'category': 'tracking_scripts', 'service': 'Facebook SDK'},
-            'doubleclick.net': {'category': 'advertising_networks', 'service': 'Google Ads'},
-            'googlesyndication.com': {'category': 'advertising_networks', 'service': 'Google AdSense'},
-            'hotjar.com': {'category': 'analytics_tools', 'service': 'Hotjar'},
-            'mixpanel.com': {'category': 'analytics_tools', 'service': 'Mixpanel'},
-            'twitter.com': {'category': 'social_widgets', 'service': 'Twitter'},
-            'linkedin.com': {'category': 'social_widgets', 'service': 'LinkedIn'}
-        }
-        
-        for domain, info in services.items():
-            if domain in src:
-                return info
-        
-        return {'category': None, 'service': 'Unknown'}
-    
-    def _is_tracking_resource(self, src):
-        """Check if a resource is likely used for tracking"""
-        tracking_patterns = [
-            'analytics', 'tracking', 'pixel', 'beacon', 'metrics'
-        ]
-        return any(pattern in src.lower() for pattern in tracking_patterns)
-    
-    def _extract_domain(self, url):
-        """Extract domain from URL"""
-        try:
-            return urlparse(url).netloc
-        except:
-            return 'unknown'
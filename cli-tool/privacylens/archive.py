@@ -0,0 +1,364 @@
+"""
+Archive Analysis
+Offline analysis of HTTP responses stored in HAR and WARC archives
+"""
+
+import base64
+import codecs
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import gzip
+import json
+import os
+from urllib.parse import urlparse
+import zlib
+
+from bs4 import BeautifulSoup
+from requests.structures import CaseInsensitiveDict
+
+from .evaluation import ResponseEvaluator
+
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Bodies larger than this are not parsed for content analysis
+DEFAULT_MAX_BODY = 20 * 1024 * 1024
+
+_READ_SIZE = 1024 * 1024
+
+# Offline evaluation only: no resolver, session or system DNS configuration
+_EVALUATOR = ResponseEvaluator()
+
+
+def iter_archive(path, include_all=False, max_body=DEFAULT_MAX_BODY):
+    """Yield archived responses from a HAR or WARC (optionally gzipped) file
+
+    Records are read one at a time. Only HTML documents are returned unless
+    ``include_all`` is set; bodies of other responses are skipped without
+    being held in memory.
+    """
+    with open(path, 'rb') as raw:
+        magic = raw.read(2)
+        raw.seek(0)
+        stream = gzip.GzipFile(fileobj=raw) if magic == b'\x1f\x8b' else raw
+        first = stream.peek(16)[:16] if hasattr(stream, 'peek') else b''
+        if first.lstrip().startswith(b'WARC/'):
+            records = _iter_warc(stream, include_all, max_body)
+        else:
+            records = _iter_har(stream, include_all, max_body)
+        for record in records:
+            record['archive'] = path
+            yield record
+
+
+def analyze_record(record):
+    """Turn one archived response into an analyze()-shaped result"""
+    headers = CaseInsensitiveDict()
+    for name, value in record['headers']:
+        headers[name] = f'{headers[name]}, {value}' if name in headers else value
+
+    url = record['url']
+    parsed = urlparse(url)
+    http_security = {
+        'status_code': record['status_code'],
+        'final_url': url,
+        'https_used': url.startswith('https://'),
+        'redirect_chain': [],
+    }
+    http_security.update(_EVALUATOR._evaluate_headers(headers))
+
+    result = {
+        'url': url,
+        'domain': parsed.netloc,
+        'timestamp': record.get('timestamp'),
+        'reachable': True,
+        'addresses': [record['address']] if record.get('address') else [],
+        'analysis': {'http_security': http_security},
+        'mode': 'archive',
+        'archive': record.get('archive'),
+    }
+
+    body = record.get('body')
+    if body is not None:
+        try:
+            if not record.get('decoded'):
+                body = _decode_body(body, headers)
+            result['analysis']['content_analysis'] = _EVALUATOR._classify_content(
+                BeautifulSoup(body, 'html.parser'))
+        except Exception as e:
+            result['analysis']['content_analysis'] = {'error': str(e)}
+    elif record.get('skipped'):
+        result['analysis']['content_analysis'] = {'error': record['skipped']}
+
+    result['privacy_score'] = _EVALUATOR._calculate_privacy_score(result['analysis'])
+    result['recommendations'] = _EVALUATOR._generate_recommendations(result['analysis'])
+    return result
+
+
+def analyze_archives(paths, workers=None, include_all=False, max_body=DEFAULT_MAX_BODY):
+    """Analyze every record of the given archives, in archive order
+
+    Records are classified in a process pool (one process per core by
+    default). At most a few records per process are in flight, so memory
+    stays bounded however large the archives are.
+    """
+    records = (record for path in paths
+               for record in iter_archive(path, include_all=include_all, max_body=max_body))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(analyze_record, records)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for record in records:
+            pending.append(pool.submit(analyze_record, record))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _is_html(content_type):
+    return (content_type or '').split(';')[0].strip().lower() in HTML_TYPES
+
+
+def _decode_body(body, headers):
+    """Undo transfer and content encodings kept verbatim in the archive"""
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = _dechunk(body)
+    encoding = headers.get('content-encoding', '').lower()
+    if encoding in ('gzip', 'x-gzip'):
+        body = gzip.decompress(body)
+    elif encoding == 'deflate':
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)
+    elif encoding == 'br':
+        import brotli  # Optional; only needed for brotli-encoded captures
+        body = brotli.decompress(body)
+    return body
+
+
+def _dechunk(body):
+    """Decode an HTTP/1.1 chunked body; return it unchanged if it is not chunked"""
+    out = bytearray()
+    pos = 0
+    while True:
+        end = body.find(b'\r\n', pos)
+        if end < 0:
+            return body
+        try:
+            size = int(body[pos:end].split(b';')[0], 16)
+        except ValueError:
+            return body
+        if size == 0:
+            return bytes(out)
+        out += body[end + 2:end + 2 + size]
+        pos = end + 2 + size + 2
+
+
+# WARC
+
+def _iter_warc(stream, include_all, max_body):
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue  # Blank lines separating records
+        if not line.startswith(b'WARC/'):
+            raise ValueError(f'Malformed WARC record header: {line[:40]!r}')
+
+        warc_headers = _read_headers(stream)[0]
+        length = int(warc_headers.get('content-length', 0))
+        is_response = (warc_headers.get('warc-type') == 'response'
+                       and warc_headers.get('content-type', '').startswith('application/http'))
+        if not is_response:
+            _skip(stream, length)
+            continue
+
+        status_line = stream.readline()
+        http_headers, consumed = _read_headers(stream, keep_all=True)
+        remaining = length - len(status_line) - consumed
+        parts = status_line.split(None, 2)
+        try:
+            status_code = int(parts[1])
+        except (IndexError, ValueError):
+            _skip(stream, remaining)
+            continue
+
+        record = {
+            'url': warc_headers.get('warc-target-uri', '').strip('<>'),
+            'status_code': status_code,
+            'headers': http_headers,
+            'timestamp': warc_headers.get('warc-date'),
+            'address': warc_headers.get('warc-ip-address'),
+        }
+        content_type = CaseInsensitiveDict(http_headers).get('content-type')
+        document = _is_html(content_type) and 200 <= status_code < 300
+        if document and remaining <= max_body:
+            record['body'] = stream.read(remaining)
+        else:
+            _skip(stream, remaining)
+            if document:
+                record['skipped'] = f'body of {remaining} bytes exceeds limit'
+            elif not include_all:
+                continue
+        yield record
+
+
+def _read_headers(stream, keep_all=False):
+    """Read header lines up to the blank line; return (headers, bytes consumed)"""
+    headers = [] if keep_all else {}
+    consumed = 0
+    while True:
+        line = stream.readline()
+        consumed += len(line)
+        if not line.strip():
+            return headers, consumed
+        name, _, value = line.decode('latin-1').partition(':')
+        if keep_all:
+            headers.append((name.strip(), value.strip()))
+        else:
+            headers[name.strip().lower()] = value.strip()
+
+
+def _skip(stream, length):
+    while length > 0:
+        chunk = stream.read(min(length, _READ_SIZE))
+        if not chunk:
+            return
+        length -= len(chunk)
+
+
+# HAR
+
+def _iter_har(stream, include_all, max_body):
+    for entry in _iter_har_entries(stream):
+        response = entry.get('response', {})
+        content = response.get('content', {})
+        status_code = response.get('status', 0)
+        document = _is_html(content.get('mimeType')) and 200 <= status_code < 300
+        if not (include_all or document):
+            continue
+
+        record = {
+            'url': entry.get('request', {}).get('url', ''),
+            'status_code': status_code,
+            'headers': [(h.get('name', ''), h.get('value', '')) for h in response.get('headers', [])],
+            'timestamp': entry.get('startedDateTime'),
+            'address': entry.get('serverIPAddress'),
+        }
+        text = content.get('text')
+        if document and text is not None:
+            # HAR content is stored decoded, though the headers still name the
+            # transfer and content encodings the server used
+            record['decoded'] = True
+            if content.get('encoding') == 'base64':
+                body = base64.b64decode(text)
+            else:
+                body = text.encode('utf-8')
+            if len(body) <= max_body:
+                record['body'] = body
+            else:
+                record['skipped'] = f'body of {len(body)} bytes exceeds limit'
+        yield record
+
+
+def _iter_har_entries(stream):
+    """Yield log.entries items of a HAR document without decoding the whole file"""
+    reader = _JsonReader(stream)
+    reader.expect('{')
+    for key in reader.iter_keys():
+        if key != 'log':
+            reader.value()
+            continue
+        reader.expect('{')
+        for log_key in reader.iter_keys():
+            if log_key != 'entries':
+                reader.value()
+                continue
+            reader.expect('[')
+            while reader.peek() != ']':
+                yield reader.value()
+                if reader.peek() == ',':
+                    reader.expect(',')
+            reader.expect(']')
+
+
+class _JsonReader:
+    """Pull-style reader over a JSON text stream
+
+    Values are decoded with raw_decode from a sliding buffer. When a value
+    is split across reads the read size doubles, so a large value costs
+    linear rather than quadratic time. A decode error away from the end of
+    the buffer cannot be cured by reading more and is raised at once.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(_READ_SIZE):
+                raise ValueError('Unexpected end of HAR file')
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Malformed HAR file: expected {char!r}, found {self.peek()!r}')
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        size = _READ_SIZE
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if not _truncated(e, self.buffer) or not self._fill(size):
+                    raise ValueError(f'Malformed HAR file: {e}') from e
+                size *= 2
+                continue
+            # A number at the buffer edge may continue in the next read
+            if end == len(self.buffer) and not self.eof and self._fill(size):
+                continue
+            self.pos = end
+            return obj
+
+    def iter_keys(self):
+        """Yield the keys of the object just opened, leaving each value unread"""
+        while self.peek() != '}':
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.expect(',')
+        self.expect('}')
+
+    def _fill(self, size):
+        data = self.stream.read(size)
+        if not data:
+            self.eof = True
+            return False
+        # The incremental decoder holds back a multi-byte character split across reads
+        self.buffer = self.buffer[self.pos:] + self.utf8.decode(data)
+        self.pos = 0
+        return True
+
+
+def _truncated(error, text):
+    """Whether a decode error may only mean the value continues past the buffer"""
+    # An unterminated string ran into the end of the buffer; other errors
+    # count only in the last few characters (a split keyword, number or escape)
+    return error.msg.startswith('Unterminated string') or error.pos >= len(text) - 6
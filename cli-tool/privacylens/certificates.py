@@ -0,0 +1,357 @@
+"""
+Certificate Chain Analysis
+Parses the served certificate chain with `cryptography`, caching parsed
+certificates by SHA-256 fingerprint
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+import hashlib
+import ipaddress
+import select
+import threading
+
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import dsa, ec, ed448, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import pkcs7
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import AuthorityInformationAccessOID, ExtensionOID, SignatureAlgorithmOID
+
+try:
+    from OpenSSL import SSL
+except ImportError:  # pyOpenSSL is optional; without it stapling is reported as unknown
+    SSL = None
+
+STAPLING_SUPPORTED = SSL is not None
+
+
+# Minimum key sizes considered adequate, by key type
+MIN_KEY_BITS = {'RSA': 2048, 'DSA': 2048, 'EC': 256}
+WEAK_HASHES = ('md5', 'sha1')
+
+# Intermediates expiring within this many days are reported
+INTERMEDIATE_EXPIRY_WARNING = 30
+
+# TLS Feature extension value for status_request (OCSP must-staple)
+_STATUS_REQUEST = 5
+
+# Signature algorithm names by OID, e.g. 'rsa-with-sha256'; unknown OIDs keep their dotted form
+_SIGNATURE_ALGORITHMS = {
+    oid: name.lower().replace('_', '-')
+    for name, oid in vars(SignatureAlgorithmOID).items()
+    if isinstance(oid, x509.ObjectIdentifier) and not name.startswith('_')
+}
+
+
+class CertificateCache:
+    """Parsed certificates keyed by SHA-256 fingerprint, plus AIA downloads by URL
+
+    Shared intermediates and CDN certificates covering many hostnames are
+    decoded once per analyzer (i.e. once per batch) instead of per domain.
+    Both maps are LRU and hold at most ``max_entries`` items each.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._parsed = OrderedDict()
+        self._issuers = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, der):
+        """Return the summary of a DER certificate, decoding it at most once"""
+        fingerprint = hashlib.sha256(der).hexdigest()
+        with self._lock:
+            summary = self._parsed.get(fingerprint)
+            if summary is not None:
+                self._parsed.move_to_end(fingerprint)
+                self.hits += 1
+                return summary
+            self.misses += 1
+        summary = summarize(x509.load_der_x509_certificate(der), fingerprint)
+        with self._lock:
+            self._store(self._parsed, fingerprint, summary)
+        return summary
+
+    def issuer(self, url, fetch):
+        """Return the DER issuer certificate published at an AIA caIssuers URL"""
+        with self._lock:
+            if url in self._issuers:
+                self._issuers.move_to_end(url)
+                return self._issuers[url]
+        try:
+            der = _issuer_der(fetch(url))
+        except Exception:
+            der = None  # Remembered too, so a broken URL is tried once
+        with self._lock:
+            self._store(self._issuers, url, der)
+        return der
+
+    def _store(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+def summarize(cert, fingerprint):
+    """Extract the fields chain analysis needs from a certificate"""
+    key_type, key_size, curve = _key_info(cert.public_key())
+    hash_algorithm = cert.signature_hash_algorithm
+    summary = {
+        'fingerprint_sha256': fingerprint,
+        'subject': cert.subject.rfc4514_string(),
+        'issuer': cert.issuer.rfc4514_string(),
+        'self_signed': cert.subject == cert.issuer,
+        'not_before': _utc(cert, 'not_valid_before'),
+        'not_after': _utc(cert, 'not_valid_after'),
+        'key_type': key_type,
+        'key_size': key_size,
+        'curve': curve,
+        'signature_algorithm': _SIGNATURE_ALGORITHMS.get(cert.signature_algorithm_oid,
+                                                         cert.signature_algorithm_oid.dotted_string),
+        'signature_hash': hash_algorithm.name if hash_algorithm else None,
+        'is_ca': False,
+        'dns_names': [],
+        'ip_addresses': [],
+        'ocsp_urls': [],
+        'ca_issuers': [],
+        'must_staple': False,
+    }
+
+    extensions = cert.extensions
+    try:
+        summary['is_ca'] = extensions.get_extension_for_class(x509.BasicConstraints).value.ca
+    except x509.ExtensionNotFound:
+        pass
+    try:
+        san = extensions.get_extension_for_class(x509.SubjectAlternativeName).value
+        summary['dns_names'] = san.get_values_for_type(x509.DNSName)
+        summary['ip_addresses'] = [str(ip) for ip in san.get_values_for_type(x509.IPAddress)]
+    except x509.ExtensionNotFound:
+        pass
+    try:
+        aia = extensions.get_extension_for_class(x509.AuthorityInformationAccess).value
+        for description in aia:
+            if not isinstance(description.access_location, x509.UniformResourceIdentifier):
+                continue
+            if description.access_method == AuthorityInformationAccessOID.OCSP:
+                summary['ocsp_urls'].append(description.access_location.value)
+            elif description.access_method == AuthorityInformationAccessOID.CA_ISSUERS:
+                summary['ca_issuers'].append(description.access_location.value)
+    except x509.ExtensionNotFound:
+        pass
+    try:
+        features = extensions.get_extension_for_oid(ExtensionOID.TLS_FEATURE).value
+        summary['must_staple'] = any(feature.value == _STATUS_REQUEST for feature in features)
+    except x509.ExtensionNotFound:
+        pass
+    return summary
+
+
+def build_chain(cache, served, fetch_issuer, max_depth=5):
+    """Parse the served chain, completing it through AIA when only the leaf is available
+
+    Returns (summaries, source): source is 'handshake' when the connection
+    provided the chain, 'aia' when issuers were downloaded, or 'leaf-only'.
+    """
+    chain = [cache.parse(der) for der in served]
+    if len(chain) > 1 or chain[0]['self_signed']:
+        return chain, 'handshake'
+
+    while len(chain) < max_depth and not chain[-1]['self_signed']:
+        issuer_der = None
+        for url in chain[-1]['ca_issuers']:
+            issuer_der = cache.issuer(url, fetch_issuer)
+            if issuer_der:
+                break
+        if not issuer_der:
+            break
+        issuer = cache.parse(issuer_der)
+        if any(cert['fingerprint_sha256'] == issuer['fingerprint_sha256'] for cert in chain):
+            break
+        chain.append(issuer)
+    return chain, 'aia' if len(chain) > 1 else 'leaf-only'
+
+
+def analyze_chain(chain, hostname, stapled=None, now=None):
+    """Evaluate a parsed chain for the scanned host
+
+    ``stapled`` is the raw OCSP response from the handshake: bytes (empty
+    when the server stapled nothing) or None when stapling was not checked.
+    """
+    now = now or datetime.now(timezone.utc)
+    leaf = chain[0]
+    issues = []
+
+    for index, cert in enumerate(chain):
+        role = 'Leaf' if index == 0 else 'Intermediate' if not cert['self_signed'] else 'Root'
+        minimum = MIN_KEY_BITS.get(cert['key_type'])
+        if minimum and cert['key_size'] and cert['key_size'] < minimum:
+            issues.append(f"{role} uses a weak {cert['key_type']} key ({cert['key_size']} bits)")
+        # Root signatures are never checked, so their hash does not matter
+        if role != 'Root' and cert['signature_hash'] in WEAK_HASHES:
+            issues.append(f"{role} is signed with {cert['signature_hash'].upper()}")
+        if role == 'Intermediate':
+            days = (cert['not_after'] - now).days
+            if days < 0:
+                issues.append(f"Intermediate '{cert['subject']}' has expired")
+            elif days < INTERMEDIATE_EXPIRY_WARNING:
+                issues.append(f"Intermediate '{cert['subject']}' expires in {days} days")
+
+    # Reported, but not an issue: a mismatch already fails verification (valid=False)
+    covered = covers_host(leaf, hostname)
+
+    ocsp_info = {
+        'responders': leaf['ocsp_urls'],
+        'must_staple': leaf['must_staple'],
+        'stapled': None if stapled is None else bool(stapled),
+    }
+    if stapled:
+        ocsp_info.update(_staple_status(stapled))
+    if leaf['must_staple'] and stapled is not None and not stapled:
+        issues.append('Certificate requires OCSP stapling but no OCSP response was stapled')
+
+    return {
+        'key': _key_label(leaf),
+        'signature_algorithm': leaf['signature_algorithm'],
+        'san_covers_host': covered,
+        'ocsp': ocsp_info,
+        'chain': [_chain_entry(cert, now) for cert in chain],
+        'chain_issues': issues,
+    }
+
+
+def covers_host(summary, hostname):
+    """Check SAN coverage of a hostname, with single-label wildcards (RFC 6125)"""
+    hostname = hostname.rstrip('.').lower()
+    try:
+        address = ipaddress.ip_address(hostname.strip('[]'))
+    except ValueError:
+        address = None
+    if address is not None:
+        return str(address) in summary['ip_addresses']
+
+    for name in summary['dns_names']:
+        name = name.rstrip('.').lower()
+        if name == hostname:
+            return True
+        if name.startswith('*.'):
+            label, _, rest = hostname.partition('.')
+            if label and rest == name[2:]:
+                return True
+    return False
+
+
+def fetch_stapled_ocsp(sock, hostname, timeout):
+    """Handshake with pyOpenSSL requesting an OCSP staple
+
+    Returns the stapled response bytes (b'' when none was stapled), or None
+    when pyOpenSSL is not installed. The socket is consumed.
+    """
+    if SSL is None:
+        return None
+    stapled = []
+
+    def on_ocsp(connection, response, data):
+        stapled.append(response or b'')
+        return True  # Only observing; certificate verification is done by ssl
+
+    context = SSL.Context(SSL.TLS_CLIENT_METHOD)
+    context.set_ocsp_client_callback(on_ocsp)
+    connection = SSL.Connection(context, sock)
+    connection.set_tlsext_host_name(hostname.encode('idna'))
+    connection.request_ocsp()
+    connection.set_connect_state()
+    sock.setblocking(False)
+    try:
+        while True:
+            try:
+                connection.do_handshake()
+                break
+            except SSL.WantReadError:
+                if not select.select([sock], [], [], timeout)[0]:
+                    raise TimeoutError('TLS handshake timed out')
+            except SSL.WantWriteError:
+                if not select.select([], [sock], [], timeout)[1]:
+                    raise TimeoutError('TLS handshake timed out')
+    finally:
+        connection.close()
+        sock.close()
+    return stapled[0] if stapled else b''
+
+
+def _staple_status(stapled):
+    try:
+        response = ocsp.load_der_ocsp_response(stapled)
+    except ValueError as e:
+        return {'status': 'unparseable', 'error': str(e)}
+    if response.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+        return {'status': response.response_status.name.lower()}
+    info = {'status': response.certificate_status.name.lower()}
+    next_update = _utc(response, 'next_update')
+    if next_update is not None:
+        info['next_update'] = next_update.isoformat()
+    return info
+
+
+def _chain_entry(cert, now):
+    return {
+        'subject': cert['subject'],
+        'issuer': cert['issuer'],
+        'fingerprint_sha256': cert['fingerprint_sha256'],
+        'not_after': cert['not_after'].isoformat(),
+        'days_until_expiry': (cert['not_after'] - now).days,
+        'key': _key_label(cert),
+        'signature_algorithm': cert['signature_algorithm'],
+        'is_ca': cert['is_ca'],
+    }
+
+
+def _key_label(cert):
+    key = {'type': cert['key_type'], 'size': cert['key_size']}
+    if cert['curve']:
+        key['curve'] = cert['curve']
+    return key
+
+
+def _key_info(public_key):
+    """Return (type, size in bits, curve name) of a public key"""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return 'RSA', public_key.key_size, None
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return 'EC', public_key.key_size, public_key.curve.name
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return 'Ed25519', 256, None
+    if isinstance(public_key, ed448.Ed448PublicKey):
+        return 'Ed448', 456, None
+    if isinstance(public_key, dsa.DSAPublicKey):
+        return 'DSA', public_key.key_size, None
+    return type(public_key).__name__, None, None
+
+
+def _issuer_der(response):
+    """Decode a caIssuers download: DER, PEM or a PKCS#7 bundle"""
+    response.raise_for_status()
+    data = response.content
+    if b'-----BEGIN CERTIFICATE-----' in data:
+        return x509.load_pem_x509_certificate(data).public_bytes(serialization.Encoding.DER)
+    try:
+        x509.load_der_x509_certificate(data)
+        return data
+    except ValueError:
+        pass
+    certs = pkcs7.load_der_pkcs7_certificates(data)
+    return certs[0].public_bytes(serialization.Encoding.DER) if certs else None
+
+
+def _utc(obj, name):
+    """Timezone-aware datetime attribute (the *_utc variants need cryptography 42+)"""
+    value = getattr(obj, f'{name}_utc', None)
+    if value is None:
+        value = getattr(obj, name)
+        if value is not None:
+            value = value.replace(tzinfo=timezone.utc)
+    return value
@@ -0,0 +1,208 @@
+"""
+Site Crawler
+Bounded multi-page crawl that aggregates content analysis across a site
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from bs4 import BeautifulSoup
+
+from .network import PinnedHTTPAdapter
+
+
+CONTENT_CATEGORIES = (
+    'tracking_scripts', 'social_widgets', 'analytics_tools',
+    'advertising_networks', 'third_party_resources'
+)
+
+# Links to these are never pages worth parsing
+SKIPPED_EXTENSIONS = (
+    '.pdf', '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg', '.iso',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.ogg', '.wav',
+    '.css', '.js', '.json', '.xml', '.txt', '.woff', '.woff2', '.ttf'
+)
+
+
+class SiteCrawler:
+    """Crawl same-site pages and aggregate their content analysis
+
+    Domain-level probes (HTTP headers, SSL, DNS, WHOIS) run once through
+    PrivacyAnalyzer.analyze(), whose response for the start page is reused;
+    further pages are fetched breadth-first by a bounded pool of workers on
+    the crawler's own session, connecting through the analyzer's pinned
+    addresses. Paths disallowed by robots.txt are not fetched unless
+    ``respect_robots`` is False. Resources seen on several pages are counted once.
+    """
+
+    def __init__(self, analyzer, max_pages=50, max_depth=2, concurrency=8, respect_robots=True):
+        self.analyzer = analyzer
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.respect_robots = respect_robots
+
+        # Own session, so the analyzer's adapters stay as they are for other
+        # scans; one pool connection per worker so keep-alive connections are reused
+        self.session = requests.Session()
+        self.session.headers.update(analyzer.session.headers)
+        adapter = PinnedHTTPAdapter(analyzer.addresses, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def crawl(self, start_url):
+        """Crawl from start_url and return an analyze()-shaped result"""
+        responses = []
+        result = self.analyzer.analyze(start_url, include_content=False, on_response=responses.append)
+        site = _site_of(start_url)
+        # Header-only probes never read the body, so the page is fetched again
+        start_response = responses[0] if responses and not self.analyzer.headers_only else None
+
+        pages = []
+        resources = {}
+        disallowed = 0
+        if result.get('reachable', True):
+            pages, resources, disallowed = self._crawl_pages(start_url, site, start_response)
+
+        content = {category: [] for category in CONTENT_CATEGORIES}
+        for (category, _), entry in resources.items():
+            content[category].append(entry)
+        if pages and all('error' in page for page in pages):
+            content = {'error': pages[0]['error']}
+
+        analysis = result['analysis']
+        analysis['content_analysis'] = content
+        if result.get('reachable', True):
+            result['privacy_score'] = self.analyzer._calculate_privacy_score(analysis)
+            result['recommendations'] = self.analyzer._generate_recommendations(analysis)
+        result['crawl'] = {
+            'pages_crawled': len(pages),
+            'max_pages': self.max_pages,
+            'max_depth': self.max_depth,
+            'unique_resources': len(resources),
+            'robots_disallowed': disallowed,
+            'pages': pages,
+        }
+        return result
+
+    def _crawl_pages(self, start_url, site, start_response=None):
+        start_url = urldefrag(start_url)[0]
+        seen = {start_url}
+        frontier = deque([(start_url, 0)])
+        prefetched = {start_url: start_response} if start_response is not None else {}
+        robots = {}
+        disallowed = 0
+        scheduled = 0
+        pages = []
+        resources = {}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix='privacylens-crawl') as pool:
+            running = {}
+            while frontier or running:
+                # Keep the pool busy, never scheduling more than max_pages fetches
+                while frontier and len(running) < self.concurrency and scheduled < self.max_pages:
+                    url, depth = frontier.popleft()
+                    running[pool.submit(self._fetch_page, url, prefetched.pop(url, None))] = (url, depth)
+                    scheduled += 1
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = running.pop(future)
+                    page, content, links = future.result()
+                    page['depth'] = depth
+                    pages.append(page)
+                    if self.analyzer.verbose:
+                        print(f"  📄 [{len(pages)}/{self.max_pages}] {url}")
+
+                    for category, entries in (content or {}).items():
+                        for entry in entries:
+                            key = (category, entry['url'])
+                            if key in resources:
+                                resources[key]['pages'] += 1
+                            else:
+                                resources[key] = dict(entry, pages=1)
+
+                    if depth < self.max_depth:
+                        for link in links:
+                            if link in seen or _site_of(link) != site:
+                                continue
+                            seen.add(link)
+                            if self.respect_robots and not self._allowed(link, robots):
+                                disallowed += 1
+                                continue
+                            frontier.append((link, depth + 1))
+
+        return pages, resources, disallowed
+
+    def _allowed(self, url, robots):
+        """Check url against its origin's robots.txt, fetched once per crawl"""
+        parsed = urlparse(url)
+        origin = f'{parsed.scheme}://{parsed.hostname}' + (f':{parsed.port}' if parsed.port else '')
+        rules = robots.get(origin)
+        if rules is None:
+            rules = robots[origin] = self._fetch_robots(origin)
+        return rules.can_fetch(self.session.headers['User-Agent'], url)
+
+    def _fetch_robots(self, origin):
+        """Fetch and parse robots.txt; status handling follows RFC 9309 section 2.3.1"""
+        rules = RobotFileParser()
+        try:
+            response = self.analyzer._timed('robots', lambda timeout: self.session.get(
+                f'{origin}/robots.txt', timeout=timeout))
+        except requests.RequestException:
+            # Unreachable robots.txt: assume everything is disallowed
+            rules.disallow_all = True
+            return rules
+
+        if response.status_code >= 500:
+            rules.disallow_all = True
+        elif response.status_code >= 400:
+            rules.allow_all = True
+        else:
+            rules.parse(response.text.splitlines())
+        return rules
+
+    def _fetch_page(self, url, response=None):
+        """Fetch one page (or use an already fetched response); return (page record, content analysis, links)"""
+        analyzer = self.analyzer
+        if response is None:
+            try:
+                response = analyzer._timed('content', lambda timeout: self.session.get(url, timeout=timeout))
+            except Exception as e:
+                return {'url': url, 'error': str(e)}, None, []
+
+        page = {'url': url, 'status_code': response.status_code}
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            page['skipped'] = 'not html'
+            return page, None, []
+
+        try:
+            soup = BeautifulSoup(response.content, 'html.parser')
+            content = analyzer._classify_content(soup)
+
+            links = []
+            for anchor in soup.find_all('a', href=True):
+                link = urldefrag(urljoin(response.url, anchor['href']))[0]
+                parsed = urlparse(link)
+                if parsed.scheme in ('http', 'https') and not parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+                    links.append(link)
+        except Exception as e:
+            # One page the parser chokes on is recorded, not fatal to the crawl
+            page['error'] = f'Failed to parse page: {e}'
+            return page, None, []
+
+        page['trackers'] = sum(len(entries) for entries in content.values())
+        return page, content, links
+
+
+def _site_of(url):
+    """Host used for the same-site check, ignoring a leading www."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
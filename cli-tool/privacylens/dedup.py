@@ -0,0 +1,173 @@
+"""
+URL Deduplication
+Drops duplicate batch input in one streaming pass, comparing canonical keys
+in a Bloom filter backed by an exact on-disk index
+"""
+
+import hashlib
+import ipaddress
+import math
+import os
+import sqlite3
+import tempfile
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .utils import is_valid_domain
+
+
+# Query parameters that only identify a campaign or click, never the page
+TRACKING_PARAMS = frozenset({
+    'gclid', 'gclsrc', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'twclid',
+    'ttclid', 'li_fat_id', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi',
+    'mkt_tok', 'oly_anon_id', 'oly_enc_id', 'vero_id', 'ref_src',
+})
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+
+DEFAULT_CAPACITY = 1000000
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url):
+    """Return the deduplication key for a URL, or None if it is not a web URL
+
+    URLs differing only in scheme, host case, a default port, a trailing
+    slash, the fragment or tracking parameters share a key: the scheme is
+    folded into https, the host lowercased (IDN hosts in their ASCII form)
+    and the remaining query parameters sorted. The key is only compared,
+    never scanned.
+    """
+    url = url.strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = 'https://' + url
+    try:
+        parsed = urlsplit(url)
+        port = parsed.port
+    except ValueError:
+        return None
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').rstrip('.')
+    if scheme not in ('http', 'https') or not host:
+        return None
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+    if not is_valid_domain(host):
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return None
+        host = f'[{address}]' if address.version == 6 else str(address)
+
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+    # Compared, never fetched, so http and https fold into one key
+    if parsed.username is not None or parsed.password is not None:
+        netloc = f"{parsed.netloc.rpartition('@')[0]}@{netloc}"
+
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    ))
+    return urlunsplit(('https', netloc, parsed.path.rstrip('/') or '/', query, ''))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings
+
+    Sized for ``capacity`` items at ``error_rate`` false positives; adding
+    more items only raises the false-positive rate.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item):
+        """Add an item; return True if it may have been added before"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        # Double hashing: k positions from two 64-bit halves
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        present = True
+        for i in range(self.hashes):
+            byte, bit = divmod((h1 + i * h2) % self.size, 8)
+            if not self._bits[byte] & (1 << bit):
+                present = False
+                self._bits[byte] |= 1 << bit
+        return present
+
+    @property
+    def memory(self):
+        return len(self._bits)
+
+
+class UrlDeduplicator:
+    """Streaming exact deduplication of URL lists
+
+    Every URL's canonical key goes through the Bloom filter. A negative
+    answer means the URL is new and skips the exact index. A positive answer
+    is confirmed in a temporary SQLite index of all keys seen so far. Memory
+    therefore stays at the filter size plus one insert batch, however long
+    the input is.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=0.001, temp_dir=None, batch_size=10000):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.batch_size = batch_size
+        fd, self._path = tempfile.mkstemp(dir=temp_dir, prefix='privacylens-dedup-', suffix='.db')
+        os.close(fd)
+        self._db = sqlite3.connect(self._path)
+        self._db.execute('PRAGMA journal_mode=OFF')
+        self._db.execute('PRAGMA synchronous=OFF')
+        self._db.execute('CREATE TABLE seen (url TEXT PRIMARY KEY) WITHOUT ROWID')
+        self._pending = set()
+        self.stats = {'lines': 0, 'invalid': 0, 'unique': 0, 'duplicates': 0, 'false_positives': 0}
+
+    def dedupe(self, lines):
+        """Yield each URL as first given (https:// added to bare hosts), dropping later duplicates
+
+        Blank lines and lines starting with '#' are ignored; lines that are
+        not web URLs are counted as invalid and dropped.
+        """
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            self.stats['lines'] += 1
+            key = canonicalize_url(line)
+            if key is None:
+                self.stats['invalid'] += 1
+                continue
+            if self.bloom.add(key):
+                if key in self._pending or self._db.execute(
+                        'SELECT 1 FROM seen WHERE url = ?', (key,)).fetchone():
+                    self.stats['duplicates'] += 1
+                    continue
+                self.stats['false_positives'] += 1
+            self._pending.add(key)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+            self.stats['unique'] += 1
+            yield line if '://' in line else 'https://' + line
+
+    def close(self):
+        self._db.close()
+        os.unlink(self._path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush(self):
+        with self._db:
+            self._db.executemany('INSERT OR IGNORE INTO seen (url) VALUES (?)',
+                                 ((key,) for key in self._pending))
+        self._pending.clear()
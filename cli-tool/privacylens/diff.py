@@ -0,0 +1,194 @@
+"""
+Snapshot Diff
+Streaming comparison of two batch result snapshots keyed by URL
+"""
+
+import heapq
+import json
+import os
+import tempfile
+
+from .utils import iter_results
+
+
+# Categories whose entries carry a named service
+SERVICE_CATEGORIES = (
+    'tracking_scripts', 'analytics_tools', 'advertising_networks', 'social_widgets'
+)
+
+DEFAULT_CHUNK_ROWS = 100000
+
+
+def project(result):
+    """Reduce a full result to the fields compared by the diff
+
+    Returns a small JSON-serializable list so sorted runs stay compact:
+    [url, domain, score, https, headers, trackers, certificate]
+    """
+    analysis = result.get('analysis', {})
+    http_security = analysis.get('http_security', {})
+    ssl_cert = analysis.get('ssl_certificate', {})
+    content = analysis.get('content_analysis', {})
+
+    headers = {}
+    for name, info in http_security.get('headers', {}).items():
+        if not info.get('present'):
+            headers[name] = 'missing'
+        elif info.get('secure', True):
+            headers[name] = 'present'
+        else:
+            headers[name] = 'insecure'
+
+    trackers = set()
+    for category in SERVICE_CATEGORIES:
+        trackers.update(entry.get('service', 'Unknown') for entry in content.get(category, []))
+    trackers.update(entry.get('domain', 'unknown') for entry in content.get('third_party_resources', []))
+
+    certificate = None
+    if ssl_cert:
+        certificate = {
+            'valid': ssl_cert.get('valid', False),
+            'not_after': ssl_cert.get('not_after'),
+            'days_until_expiry': ssl_cert.get('days_until_expiry'),
+            'expires_soon': ssl_cert.get('expires_soon', False),
+            'is_expired': ssl_cert.get('is_expired', False),
+        }
+
+    return [
+        result.get('url', ''),
+        result.get('domain'),
+        result.get('privacy_score'),
+        http_security.get('https_used'),
+        headers,
+        sorted(trackers),
+        certificate,
+    ]
+
+
+class SnapshotSorter:
+    """External merge sort of a snapshot by URL
+
+    At most ``chunk_rows`` projected records are held in memory; each full
+    chunk is sorted and spilled to a temporary run file, and the runs are
+    merged lazily with heapq.merge.
+    """
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS, temp_dir=None):
+        self.chunk_rows = chunk_rows
+        self.temp_dir = temp_dir
+
+    def iter_sorted(self, path):
+        """Yield projected records of a snapshot in URL order"""
+        with tempfile.TemporaryDirectory(dir=self.temp_dir, prefix='privacylens-diff-') as workdir:
+            runs = []
+            chunk = []
+            for result in iter_results(path):
+                chunk.append(project(result))
+                if len(chunk) >= self.chunk_rows:
+                    runs.append(self._spill(chunk, workdir, len(runs)))
+                    chunk = []
+
+            if not runs:
+                # Whole snapshot fits in one chunk; no spilling needed
+                chunk.sort(key=_url)
+                yield from _dedupe(chunk)
+                return
+
+            if chunk:
+                runs.append(self._spill(chunk, workdir, len(runs)))
+            streams = [open(run, encoding='utf-8') for run in runs]
+            try:
+                merged = heapq.merge(*(map(json.loads, stream) for stream in streams), key=_url)
+                yield from _dedupe(merged)
+            finally:
+                for stream in streams:
+                    stream.close()
+
+    def _spill(self, chunk, workdir, index):
+        chunk.sort(key=_url)
+        path = os.path.join(workdir, f'run-{index:05d}.ndjson')
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in chunk:
+                f.write(json.dumps(record, separators=(',', ':')))
+                f.write('\n')
+        return path
+
+
+def _url(record):
+    return record[0]
+
+
+def _dedupe(records):
+    """Collapse repeated URLs within one snapshot, keeping the last record"""
+    previous = None
+    for record in records:
+        if previous is not None and previous[0] != record[0]:
+            yield previous
+        previous = record
+    if previous is not None:
+        yield previous
+
+
+def diff_snapshots(old_path, new_path, chunk_rows=DEFAULT_CHUNK_ROWS, temp_dir=None):
+    """Merge-join two snapshots by URL and yield one change dict per differing URL"""
+    sorter = SnapshotSorter(chunk_rows=chunk_rows, temp_dir=temp_dir)
+    old_records = sorter.iter_sorted(old_path)
+    new_records = sorter.iter_sorted(new_path)
+
+    old = next(old_records, None)
+    new = next(new_records, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            yield {'url': old[0], 'domain': old[1], 'status': 'removed'}
+            old = next(old_records, None)
+        elif old is None or new[0] < old[0]:
+            yield {'url': new[0], 'domain': new[1], 'status': 'added',
+                   'score': {'new': new[2]}}
+            new = next(new_records, None)
+        else:
+            change = compare(old, new)
+            if change:
+                yield change
+            old = next(old_records, None)
+            new = next(new_records, None)
+
+
+def compare(old, new):
+    """Return the changed fields between two projected records, or None"""
+    url, domain, old_score, old_https, old_headers, old_trackers, old_cert = old
+    _, new_domain, new_score, new_https, new_headers, new_trackers, new_cert = new
+    change = {}
+
+    if old_score != new_score:
+        delta = new_score - old_score if None not in (old_score, new_score) else None
+        change['score'] = {'old': old_score, 'new': new_score, 'delta': delta}
+
+    if old_https != new_https:
+        change['https'] = {'old': old_https, 'new': new_https}
+
+    headers = {
+        name: {'old': old_headers.get(name, 'missing'), 'new': new_headers.get(name, 'missing')}
+        for name in sorted(set(old_headers) | set(new_headers))
+        if old_headers.get(name, 'missing') != new_headers.get(name, 'missing')
+    }
+    if headers:
+        change['headers'] = headers
+
+    added = sorted(set(new_trackers) - set(old_trackers))
+    removed = sorted(set(old_trackers) - set(new_trackers))
+    if added or removed:
+        change['trackers'] = {'added': added, 'removed': removed}
+
+    if old_cert != new_cert:
+        certificate = {
+            key: {'old': (old_cert or {}).get(key), 'new': (new_cert or {}).get(key)}
+            for key in ('valid', 'not_after', 'expires_soon', 'is_expired')
+            if (old_cert or {}).get(key) != (new_cert or {}).get(key)
+        }
+        if certificate:
+            certificate['days_until_expiry'] = (new_cert or {}).get('days_until_expiry')
+            change['certificate'] = certificate
+
+    if not change:
+        return None
+    return {'url': url, 'domain': new_domain or domain, 'status': 'changed', **change}
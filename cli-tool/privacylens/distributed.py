@@ -0,0 +1,377 @@
+"""
+Distributed Scanning
+SQLite-backed coordinator and pull-based workers speaking JSON over HTTP
+"""
+
+import hmac
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .reporter import _json_ready
+from .utils import normalize_url, validate_url
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+"""
+
+
+class JobQueue:
+    """URL work queue with leases, retries and result collection
+
+    A leased job that is neither completed nor failed before its lease
+    expires (for example because its worker crashed) goes back to
+    'pending' and is handed to the next worker that asks, until it has
+    been attempted ``max_attempts`` times.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, urls):
+        """Add URLs to the queue; URLs already queued are ignored
+
+        Bare hosts are queued with https://, the scheme workers assume.
+        """
+        now = time.time()
+        with self._lock, self._transaction():
+            before = self._db.total_changes
+            self._db.executemany(
+                'INSERT OR IGNORE INTO jobs (url, updated) VALUES (?, ?)',
+                ((normalize_url(url.strip()), now) for url in urls)
+            )
+            return self._db.total_changes - before
+
+    def lease(self, worker, count=1):
+        """Lease up to count pending jobs to a worker"""
+        now = time.time()
+        with self._lock, self._transaction():
+            self._reclaim(now)
+            rows = self._db.execute(
+                "SELECT id, url FROM jobs WHERE status = 'pending' ORDER BY id LIMIT ?",
+                (count,)
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                ((worker, now + self.lease_seconds, now, job_id) for job_id, _ in rows)
+            )
+        return [{'id': job_id, 'url': url, 'lease_seconds': self.lease_seconds} for job_id, url in rows]
+
+    def heartbeat(self, worker, job_ids):
+        """Extend the leases a worker still holds"""
+        now = time.time()
+        with self._lock, self._transaction():
+            self._db.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                ((now + self.lease_seconds, now, job_id, worker) for job_id in job_ids)
+            )
+
+    def complete(self, worker, job_id, result):
+        """Store a job's result if the worker still holds its lease"""
+        with self._lock, self._transaction():
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, "
+                "lease_expires = NULL, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (result, time.time(), job_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, worker, job_id, error):
+        """Record a failed attempt; retry it unless attempts are exhausted"""
+        with self._lock, self._transaction():
+            self._db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, error, time.time(), job_id, worker)
+            )
+
+    def stats(self):
+        """Return job counts by status"""
+        with self._lock, self._transaction():
+            self._reclaim(time.time())
+            counts = dict(self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'))
+        stats = {status: counts.get(status, 0) for status in ('pending', 'leased', 'done', 'failed')}
+        stats['total'] = sum(stats.values())
+        stats['finished'] = stats['pending'] == 0 and stats['leased'] == 0
+        return stats
+
+    def iter_results(self, page_size=500):
+        """Yield stored results (compact JSON text) in queue order"""
+        for _, result in self._pages("SELECT id, result FROM jobs WHERE status = 'done'", page_size):
+            yield result
+
+    def iter_failures(self, page_size=500):
+        for _, url, attempts, error in self._pages(
+                "SELECT id, url, attempts, error FROM jobs WHERE status = 'failed'", page_size):
+            yield {'url': url, 'attempts': attempts, 'error': error}
+
+    def _pages(self, select, page_size):
+        """Yield rows of select (first column: id) in id order, a page at a time
+
+        Keyset pagination: the lock is held for one page only, so workers
+        keep leasing and completing jobs while results stream out.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(f'{select} AND id > ? ORDER BY id LIMIT ?',
+                                        (last_id, page_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _reclaim(self, now):
+        """Return expired leases to the queue, or fail them when out of attempts"""
+        self._db.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = COALESCE(error, 'lease expired'), lease_expires = NULL, updated = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now, now)
+        )
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+
+class _Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class LeaseLost(Exception):
+    """The coordinator refused a result because the job's lease had moved on"""
+
+
+class CoordinatorServer(ThreadingHTTPServer):
+    """HTTP front end for a JobQueue
+
+    The API is unauthenticated unless a ``token`` is given, in which case
+    every request must send it as ``Authorization: Bearer <token>``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, queue, token=None):
+        self.queue = queue
+        self.token = token
+        super().__init__(address, _CoordinatorHandler)
+
+
+def is_loopback(host):
+    """Check whether a listen address only accepts local connections"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+class _CoordinatorHandler(BaseHTTPRequestHandler):
+    server_version = 'PrivacyLensCoordinator/1.0'
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        queue = self.server.queue
+        if self.path == '/status':
+            self._send_json(queue.stats())
+        elif self.path == '/results':
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            for result in queue.iter_results():
+                self.wfile.write(result.encode('utf-8') + b'\n')
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        queue = self.server.queue
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            worker = body.get('worker', 'unknown')
+
+            if self.path == '/lease':
+                jobs = queue.lease(worker, max(1, int(body.get('count', 1))))
+                self._send_json({'jobs': jobs, 'finished': not jobs and queue.stats()['finished']})
+            elif self.path == '/heartbeat':
+                queue.heartbeat(worker, body.get('ids', []))
+                self._send_json({'ok': True})
+            elif self.path == '/complete':
+                result = json.dumps(body['result'], separators=(',', ':'), ensure_ascii=False)
+                self._send_json({'accepted': queue.complete(worker, body['id'], result)})
+            elif self.path == '/fail':
+                queue.fail(worker, body['id'], str(body.get('error', 'unknown error')))
+                self._send_json({'ok': True})
+            elif self.path == '/enqueue':
+                urls = [url for url in body.get('urls', []) if isinstance(url, str)]
+                invalid = [url for url in urls if not validate_url(url.strip())]
+                added = queue.enqueue(url for url in urls if validate_url(url.strip()))
+                self._send_json({'added': added, 'invalid': invalid})
+            else:
+                self._send_json({'error': 'not found'}, status=404)
+        except (ValueError, KeyError) as e:
+            self._send_json({'error': f'bad request: {e}'}, status=400)
+
+    def log_message(self, format, *args):
+        pass  # Progress is reported by the coordinator command instead
+
+    def _authorized(self):
+        token = self.server.token
+        if token is None or hmac.compare_digest(self.headers.get('Authorization', ''), f'Bearer {token}'):
+            return True
+        self._send_json({'error': 'unauthorized'}, status=401)
+        return False
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class Worker:
+    """Pull work units from a coordinator, analyze them and push results back
+
+    While a batch is being processed, a background thread renews the
+    leases of its unfinished jobs every third of the lease period, so a
+    slow scan does not lose its lease to another worker. A result the
+    coordinator refuses (the lease expired and the job moved on) is
+    counted as lost, not completed.
+    """
+
+    def __init__(self, coordinator, analyzer, batch_size=1, worker_id=None,
+                 poll_interval=2.0, request_timeout=30, token=None):
+        if not coordinator.startswith(('http://', 'https://')):
+            coordinator = f'http://{coordinator}'
+        self.base_url = coordinator.rstrip('/')
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.poll_interval = poll_interval
+        self.request_timeout = request_timeout
+        self.token = token
+        self.session = self._session()
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+
+    def run(self, exit_when_idle=True, on_result=None):
+        """Process jobs until the coordinator's queue is finished (or forever)"""
+        while True:
+            reply = self._post('/lease', {'count': self.batch_size})
+            jobs = reply['jobs']
+            if not jobs:
+                if reply.get('finished') and exit_when_idle:
+                    return
+                time.sleep(self.poll_interval)
+                continue
+
+            unfinished = {job['id'] for job in jobs}
+            lock = threading.Lock()
+            stop = threading.Event()
+            interval = max(0.1, min(job['lease_seconds'] for job in jobs) / 3)
+            keeper = threading.Thread(target=self._keep_leases, args=(unfinished, lock, stop, interval),
+                                      name='privacylens-heartbeat', daemon=True)
+            keeper.start()
+            try:
+                for job in jobs:
+                    self._process(job, on_result)
+                    with lock:
+                        unfinished.discard(job['id'])
+            finally:
+                stop.set()
+                keeper.join()
+
+    def _keep_leases(self, unfinished, lock, stop, interval):
+        """Heartbeat the batch's unfinished jobs until stop is set"""
+        # Own session: requests sessions are not safe to share between threads
+        session = self._session()
+        try:
+            while not stop.wait(interval):
+                with lock:
+                    ids = sorted(unfinished)
+                if not ids:
+                    continue
+                try:
+                    self._post('/heartbeat', {'ids': ids}, session)
+                except (requests.RequestException, ValueError):
+                    pass  # The next beat retries; the lease outlives a few misses
+        finally:
+            session.close()
+
+    def _process(self, job, on_result):
+        try:
+            result = self.analyzer.analyze(job['url'])
+        except Exception as e:
+            self.failed += 1
+            self._post('/fail', {'id': job['id'], 'error': str(e)})
+            if on_result:
+                on_result(job, None, e)
+            return
+
+        if not self._post('/complete', {'id': job['id'], 'result': result}).get('accepted'):
+            self.lost += 1
+            if on_result:
+                on_result(job, None, LeaseLost('lease expired before the result was accepted'))
+            return
+        self.completed += 1
+        if on_result:
+            on_result(job, result, None)
+
+    def _session(self):
+        session = requests.Session()
+        if self.token:
+            session.headers['Authorization'] = f'Bearer {self.token}'
+        return session
+
+    def _post(self, path, payload, session=None):
+        payload = dict(payload, worker=self.worker_id)
+        data = json.dumps(_json_ready(payload), ensure_ascii=False).encode('utf-8')
+        response = (session or self.session).post(self.base_url + path, data=data, timeout=self.request_timeout,
+                                                  headers={'Content-Type': 'application/json'})
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,488 @@
+"""
+DNSSEC Validation
+Chain-of-trust validation from the root with a shared, TTL-bounded cache
+"""
+
+import base64
+import threading
+import time
+
+import dns.dnssec
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.query
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rdata
+import dns.resolver
+import dns.rrset
+
+
+# IANA root zone trust anchors (KSK-2017 and KSK-2024)
+ROOT_TRUST_ANCHORS = (
+    '20326 8 2 E06D44B80B8F1D39A95C0B0D7C65D08458E880409BBC683457104237C7F8EC8D',
+    '38696 8 2 683D2D0ACB8C9B712A1948B27F741219298D0A450D612C483AF444A4C0FB2B16',
+)
+
+# Validation outcomes (RFC 4035 section 4.3)
+SECURE = 'secure'
+INSECURE = 'insecure'
+BOGUS = 'bogus'
+INDETERMINATE = 'indeterminate'
+
+# Longest alias chain followed before giving up
+MAX_CNAME_CHAIN = 8
+
+# NSEC3 opt-out flag (RFC 5155 section 3.1.2.1)
+NSEC3_OPT_OUT = 0x01
+
+
+class ValidationError(Exception):
+    """A chain link failed validation (bogus)"""
+
+
+class ResolverUnsupported(dns.exception.DNSException):
+    """The resolver cannot be used for validation (indeterminate)"""
+
+
+class TrustChainCache:
+    """Thread-safe TTL cache for validated chain links
+
+    Holds validated DNSKEY sets, DS sets and zone-cut answers keyed by
+    (kind, name). Shared by every validation in a batch, so the root and
+    TLD links are only fetched and verified once per TTL.
+    """
+
+    def __init__(self, max_ttl=86400, max_entries=100000):
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind, name):
+        with self._lock:
+            entry = self._entries.get((kind, name))
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind, name, value, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            expires = time.monotonic() + min(ttl, self.max_ttl)
+            self._entries[(kind, name)] = (expires, value)
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+        for key in expired or list(self._entries)[:len(self._entries) // 10 or 1]:
+            del self._entries[key]
+
+
+class DNSSECValidator:
+    """Validate a domain's DNSSEC chain of trust from the root
+
+    Queries go to ``nameservers`` (the system resolvers by default) with
+    the DO and CD bits set, so the resolver returns signatures without
+    validating them itself. ``query`` may be replaced by any callable
+    ``query(name, rdtype) -> dns.message.Message``; tests can point it,
+    or ``nameservers``/``port``, at a local stand-in for a signed zone.
+
+    ``timeout`` bounds each query; ``budget`` (default three timeouts)
+    bounds a whole validate() call, CNAME targets included.
+    """
+
+    def __init__(self, nameservers=None, port=53, timeout=5, cache=None,
+                 trust_anchors=ROOT_TRUST_ANCHORS, query=None, budget=None):
+        self._nameservers = list(nameservers) if nameservers else None
+        self.port = port
+        self.timeout = timeout
+        self.budget = budget if budget is not None else 3 * timeout
+        self._local = threading.local()
+        self.cache = cache if cache is not None else TrustChainCache()
+        self.trust_anchors = [
+            dns.rdata.from_text(dns.rdataclass.IN, dns.rdatatype.DS, anchor)
+            for anchor in trust_anchors
+        ]
+        if query is not None:
+            self.query = query
+
+    @property
+    def nameservers(self):
+        """Configured nameservers, or the system resolvers (read on first use)"""
+        if self._nameservers is None:
+            self._nameservers = list(dns.resolver.Resolver().nameservers)
+        return self._nameservers
+
+    @nameservers.setter
+    def nameservers(self, value):
+        self._nameservers = list(value)
+
+    def validate(self, domain):
+        """Validate a domain and return its status and the zones on the chain
+
+        CNAMEs are followed: an alias is only as secure as its target, which
+        is validated on its own chain of trust (listed in ``cname_chain``).
+        """
+        name = dns.name.from_text(domain)
+        chain = []
+        aliases = []
+        self._local.deadline = time.monotonic() + self.budget
+        try:
+            for _ in range(MAX_CNAME_CHAIN + 1):
+                status, detail = self._validate_name(name, chain)
+                if status == INSECURE:
+                    return _result(INSECURE, chain, aliases, detail)
+                if detail is None:
+                    return _result(SECURE, chain, aliases)
+                name = detail
+                aliases.append(name.to_text())
+            raise dns.exception.DNSException(f'CNAME chain longer than {MAX_CNAME_CHAIN} names')
+
+        except ValidationError as e:
+            return _result(BOGUS, chain, aliases, str(e))
+        except (dns.exception.DNSException, OSError) as e:
+            return _result(INDETERMINATE, chain, aliases, str(e) or type(e).__name__)
+        finally:
+            self._local.deadline = None
+
+    def query(self, name, rdtype):
+        """Send a DO+CD query to the configured nameservers"""
+        request = dns.message.make_query(name, rdtype, want_dnssec=True)
+        request.flags |= dns.flags.CD
+        error = None
+        for nameserver in self.nameservers:
+            try:
+                timeout = self._remaining()
+                response = dns.query.udp(request, nameserver, timeout=timeout, port=self.port)
+                if response.flags & dns.flags.TC:
+                    response = dns.query.tcp(request, nameserver, timeout=self._remaining(), port=self.port)
+                return response
+            except (dns.exception.DNSException, OSError) as e:
+                error = e
+        raise error or dns.exception.Timeout()
+
+    def _remaining(self):
+        """Per-query timeout within the current validation's budget; raise once it is spent"""
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise dns.exception.Timeout(f'DNSSEC validation exceeded its {self.budget:g}s budget')
+        return min(self.timeout, remaining)
+
+    def _validate_name(self, name, chain):
+        """Walk the chain of trust down to name
+
+        Returns (INSECURE, reason) below an unsigned delegation, otherwise
+        (SECURE, CNAME target or None).
+        """
+        keys = self._root_keys()
+        _extend(chain, dns.name.root)
+        zone = dns.name.root
+
+        for cut in self._zone_cuts(name):
+            ds = self._delegation(cut, zone, keys)
+            _extend(chain, cut)
+            if ds is None:
+                # Proven unsigned delegation: everything below is insecure
+                return INSECURE, f'No DS record for {cut.to_text()} (unsigned delegation)'
+            keys = self._zone_keys(cut, ds)
+            zone = cut
+
+        return SECURE, self._validate_leaf(name, zone, keys)
+
+    def _fetch(self, name, rdtype):
+        """Query and reject responses that cannot carry a usable answer"""
+        self._remaining()
+        response = self.query(name, rdtype)
+        rcode = response.rcode()
+        if rcode not in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+            raise ResolverUnsupported(f'Resolver answered {dns.rcode.to_text(rcode)} for {name}')
+        if not response.ednsflags & dns.flags.DO:
+            raise ResolverUnsupported('Resolver does not return DNSSEC records')
+        return response
+
+    def _root_keys(self):
+        keys = self.cache.get('DNSKEY', dns.name.root)
+        if keys is None:
+            keys = self._zone_keys(dns.name.root, self.trust_anchors)
+        return keys
+
+    def _zone_keys(self, zone, ds_records):
+        """Fetch a zone's DNSKEY set and validate it against its DS records"""
+        cached = self.cache.get('DNSKEY', zone)
+        if cached is not None:
+            return cached
+
+        response = self._fetch(zone, dns.rdatatype.DNSKEY)
+        dnskeys, rrsigs = _answer(response, zone, dns.rdatatype.DNSKEY)
+        if dnskeys is None:
+            raise ValidationError(f'No DNSKEY records for signed zone {zone.to_text()}')
+        if rrsigs is None:
+            raise ValidationError(f'DNSKEY set of {zone.to_text()} is not signed')
+
+        # Keep only the keys the parent vouches for, then require that one of
+        # them signed the whole DNSKEY set
+        trusted = [key for key in dnskeys if _matches_ds(zone, key, ds_records)]
+        if not trusted:
+            raise ValidationError(f'No DNSKEY of {zone.to_text()} matches its DS records')
+        trusted_set = dns.rrset.from_rdata_list(zone, dnskeys.ttl, trusted)
+        try:
+            dns.dnssec.validate(dnskeys, rrsigs, {zone: trusted_set})
+        except dns.dnssec.ValidationFailure as e:
+            raise ValidationError(f'DNSKEY signature of {zone.to_text()} invalid: {e}')
+
+        self.cache.put('DNSKEY', zone, dnskeys, _ttl(dnskeys, rrsigs))
+        return dnskeys
+
+    def _delegation(self, child, parent, parent_keys):
+        """Return the validated DS set of a child zone, or None when proven absent"""
+        cached = self.cache.get('DS', child)
+        if cached is not None:
+            return cached or None
+
+        response = self._fetch(child, dns.rdatatype.DS)
+        ds_records, rrsigs = _answer(response, child, dns.rdatatype.DS)
+        if ds_records is not None:
+            if rrsigs is None:
+                raise ValidationError(f'DS set of {child.to_text()} is not signed')
+            try:
+                dns.dnssec.validate(ds_records, rrsigs, {parent: parent_keys})
+            except dns.dnssec.ValidationFailure as e:
+                raise ValidationError(f'DS signature of {child.to_text()} invalid: {e}')
+            self.cache.put('DS', child, ds_records, _ttl(ds_records, rrsigs))
+            return ds_records
+
+        ttl = self._prove_no_ds(response, child, parent, parent_keys)
+        # Cached as an empty tuple: "proven unsigned"
+        self.cache.put('DS', child, (), ttl)
+        return None
+
+    def _prove_no_ds(self, response, child, parent, parent_keys):
+        """Check the signed NSEC/NSEC3 proof that a delegation has no DS
+
+        Only denial records of the parent zone whose signatures validate are
+        considered; see _nsec_denies_ds and _nsec3_denies_ds for the proofs.
+        """
+        proofs = {}
+        for rrset in response.authority:
+            if rrset.rdtype in (dns.rdatatype.NSEC, dns.rdatatype.NSEC3):
+                proofs.setdefault(rrset.name, [None, None])[0] = rrset
+            elif rrset.rdtype == dns.rdatatype.RRSIG and rrset.covers in (dns.rdatatype.NSEC, dns.rdatatype.NSEC3):
+                proofs.setdefault(rrset.name, [None, None])[1] = rrset
+
+        nsec, nsec3, ttls = [], [], []
+        for owner, (records, rrsigs) in proofs.items():
+            if records is None or rrsigs is None or not owner.is_subdomain(parent):
+                continue
+            try:
+                dns.dnssec.validate(records, rrsigs, {parent: parent_keys})
+            except dns.dnssec.ValidationFailure:
+                continue
+            (nsec if records.rdtype == dns.rdatatype.NSEC else nsec3).append(records)
+            ttls.append(_ttl(records, rrsigs))
+
+        if _nsec_denies_ds(nsec, child) or _nsec3_denies_ds(nsec3, child, parent):
+            return min(ttls)
+        raise ValidationError(f'Missing or invalid proof that {child.to_text()} has no DS record')
+
+    def _zone_cuts(self, name):
+        """Yield the zone apexes between the root and name, top-down"""
+        labels = name.labels
+        for depth in range(len(labels) - 2, -1, -1):
+            candidate = dns.name.Name(labels[depth:])
+            if self._is_zone_cut(candidate):
+                yield candidate
+
+    def _is_zone_cut(self, name):
+        cached = self.cache.get('CUT', name)
+        if cached is not None:
+            return cached
+
+        response = self._fetch(name, dns.rdatatype.SOA)
+        soa, _ = _answer(response, name, dns.rdatatype.SOA)
+        if soa is not None:
+            is_cut, ttl = True, soa.ttl
+        else:
+            # NODATA/NXDOMAIN: the authority SOA names the enclosing zone
+            authority = [rrset for rrset in response.authority if rrset.rdtype == dns.rdatatype.SOA]
+            is_cut = bool(authority) and authority[0].name == name
+            ttl = authority[0].ttl if authority else 300
+            if response.rcode() == dns.rcode.NXDOMAIN:
+                raise dns.resolver.NXDOMAIN(qnames=[name])
+        self.cache.put('CUT', name, is_cut, ttl)
+        return is_cut
+
+    def _validate_leaf(self, name, zone, keys):
+        """Validate an answer for the scanned name itself with its zone's keys
+
+        Returns the CNAME target when the name is an alias (the caller then
+        validates the target), otherwise None.
+        """
+        for rdtype in (dns.rdatatype.A, dns.rdatatype.AAAA, dns.rdatatype.SOA):
+            if rdtype == dns.rdatatype.SOA:
+                name = zone
+            response = self._fetch(name, rdtype)
+            alias, alias_sigs = _answer(response, name, dns.rdatatype.CNAME)
+            if alias is not None and rdtype != dns.rdatatype.SOA:
+                _check_signed(alias, alias_sigs, zone, keys)
+                return alias[0].target
+            records, rrsigs = _answer(response, name, rdtype)
+            if records is None:
+                continue
+            _check_signed(records, rrsigs, zone, keys)
+            return None
+        raise ValidationError(f'No signed records found for {name.to_text()}')
+
+
+def _result(status, chain, aliases, reason=None):
+    result = {'status': status, 'chain': chain}
+    if aliases:
+        result['cname_chain'] = aliases
+    if reason:
+        result['reason'] = reason
+    return result
+
+
+def _extend(chain, zone):
+    """Append a zone to the reported chain once (alias targets share ancestors)"""
+    text = zone.to_text()
+    if text not in chain:
+        chain.append(text)
+
+
+def _check_signed(records, rrsigs, zone, keys):
+    kind = dns.rdatatype.to_text(records.rdtype)
+    if rrsigs is None:
+        raise ValidationError(f'{kind} records of {records.name.to_text()} are not signed')
+    try:
+        dns.dnssec.validate(records, rrsigs, {zone: keys})
+    except dns.dnssec.ValidationFailure as e:
+        raise ValidationError(f'{kind} signature of {records.name.to_text()} invalid: {e}')
+
+
+def _answer(response, name, rdtype):
+    """Return (rrset, rrsig rrset) for name/rdtype in the answer section"""
+    records = rrsigs = None
+    for rrset in response.answer:
+        if rrset.name != name:
+            continue
+        if rrset.rdtype == rdtype:
+            records = rrset
+        elif rrset.rdtype == dns.rdatatype.RRSIG and rrset.covers == rdtype:
+            rrsigs = rrset
+    return records, rrsigs
+
+
+def _matches_ds(zone, key, ds_records):
+    for ds in ds_records:
+        if ds.key_tag != dns.dnssec.key_id(key) or ds.algorithm != key.algorithm:
+            continue
+        try:
+            if dns.dnssec.make_ds(zone, key, ds.digest_type, validating=True) == ds:
+                return True
+        except (dns.dnssec.UnsupportedAlgorithm, ValueError):
+            continue
+    return False
+
+
+def _is_unsigned_delegation(record):
+    """Type bitmap of a delegation point without DS (NS set; DS, SOA and CNAME clear)"""
+    return (_has_type(record, dns.rdatatype.NS)
+            and not any(_has_type(record, rdtype)
+                        for rdtype in (dns.rdatatype.DS, dns.rdatatype.SOA, dns.rdatatype.CNAME)))
+
+
+def _nsec_denies_ds(rrsets, child):
+    """NSEC proof of no DS (RFC 4035 section 5.4): the child's own NSEC shows an unsigned delegation"""
+    for records in rrsets:
+        if records.name == child:
+            return all(_is_unsigned_delegation(record) for record in records)
+    return False
+
+
+def _nsec3_denies_ds(rrsets, child, parent):
+    """NSEC3 proof of no DS (RFC 5155 section 8.6)
+
+    Either an NSEC3 matching the child shows an unsigned delegation, or a
+    closest-encloser proof (section 8.3) shows the child's next closer name
+    is covered by an opt-out NSEC3.
+    """
+    records = []
+    for rrset in rrsets:
+        # NSEC3 owners are a single hashed label directly under the zone apex
+        if rrset.name.parent() != parent:
+            continue
+        owner = rrset.name.labels[0].decode().upper()
+        records.extend((owner, record) for record in rrset)
+
+    def matches(name):
+        return [record for owner, record in records if _nsec3_hash(name, record) == owner]
+
+    exact = matches(child)
+    if exact:
+        return all(_is_unsigned_delegation(record) for record in exact)
+
+    next_closer = child
+    while next_closer != parent:
+        closest = next_closer.parent()
+        enclosers = matches(closest)
+        if enclosers:
+            # A closest encloser is neither a DNAME nor a delegation point
+            if any(_has_type(record, dns.rdatatype.DNAME)
+                   or (_has_type(record, dns.rdatatype.NS) and not _has_type(record, dns.rdatatype.SOA))
+                   for record in enclosers):
+                return False
+            for owner, record in records:
+                hashed = _nsec3_hash(next_closer, record)
+                if record.flags & NSEC3_OPT_OUT and hashed and _covers(owner, _b32hex(record.next), hashed):
+                    return True
+            return False
+        next_closer = closest
+    return False
+
+
+def _nsec3_hash(name, record):
+    try:
+        return dns.dnssec.nsec3_hash(name, record.salt, record.iterations, record.algorithm)
+    except ValueError:
+        # Unknown hash algorithm: the record cannot take part in a proof
+        return None
+
+
+def _has_type(record, rdtype):
+    window, bit = divmod(int(rdtype), 256)
+    for number, bitmap in record.windows:
+        if number == window:
+            index, offset = divmod(bit, 8)
+            return index < len(bitmap) and bool(bitmap[index] & (0x80 >> offset))
+    return False
+
+
+def _b32hex(raw):
+    return base64.b32encode(raw).translate(
+        bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567', b'0123456789ABCDEFGHIJKLMNOPQRSTUV')
+    ).decode().rstrip('=')
+
+
+def _covers(owner, following, hashed):
+    if owner < following:
+        return owner < hashed < following
+    # Last NSEC3 in the chain wraps around
+    return hashed > owner or hashed < following
+
+
+def _ttl(records, rrsigs):
+    """Cache lifetime: the smaller of the rrset TTL and the signatures' remaining validity"""
+    remaining = min(rrsig.expiration for rrsig in rrsigs) - time.time()
+    return max(0, min(records.ttl, rrsigs.ttl, remaining))
@@ -0,0 +1,286 @@
+"""
+Response Evaluation
+Offline scoring of headers and page content, shared by live scans and archives
+"""
+
+from urllib.parse import urlparse
+
+
+class ResponseEvaluator:
+    """Header, content, score and recommendation logic that needs no network
+
+    Holds no resolver, session or caches, so it is cheap to build anywhere
+    (archive worker processes use it directly); PrivacyAnalyzer adds the
+    live probes on top.
+    """
+    
+    def _classify_content(self, soup):
+        """Classify scripts and tracking resources in a parsed page"""
+        analysis = {
+            'tracking_scripts': [],
+            'social_widgets': [],
+            'analytics_tools': [],
+            'advertising_networks': [],
+            'third_party_resources': []
+        }
+        
+        # Find all script tags
+        scripts = soup.find_all('script', src=True)
+        for script in scripts:
+            src = script.get('src')
+            script_type = self._classify_script(src)
+            
+            if script_type['category']:
+                analysis[script_type['category']].append({
+                    'url': src,
+                    'service': script_type['service'],
+                    'domain': self._extract_domain(src)
+                })
+        
+        # Find tracking pixels and beacons
+        tracking_elements = soup.find_all(['img', 'iframe'], src=True)
+        for element in tracking_elements:
+            src = element.get('src')
+            if self._is_tracking_resource(src):
+                analysis['third_party_resources'].append({
+                    'type': element.name,
+                    'url': src,
+                    'domain': self._extract_domain(src)
+                })
+        
+        return analysis
+    
+    def _calculate_privacy_score(self, analysis):
+        """Calculate overall privacy score (0-100)"""
+        score = 100
+        
+        # HTTP Security (40 points)
+        http_security = analysis.get('http_security', {})
+        if not http_security.get('https_used', False):
+            score -= 15
+        
+        headers = http_security.get('headers', {})
+        if not headers.get('HSTS', {}).get('present', False):
+            score -= 5
+        if not headers.get('CSP', {}).get('present', False):
+            score -= 8
+        if not headers.get('X-Frame-Options', {}).get('present', False):
+            score -= 3
+        if not headers.get('Referrer-Policy', {}).get('secure', False):
+            score -= 4
+        if not headers.get('X-Content-Type-Options', {}).get('present', False):
+            score -= 2
+        if not headers.get('Permissions-Policy', {}).get('present', False):
+            score -= 3
+        
+        # Sections that were not probed (e.g. header-only mode) are not penalised
+        
+        # SSL Certificate (20 points)
+        if 'ssl_certificate' in analysis:
+            ssl_cert = analysis['ssl_certificate']
+            if not ssl_cert.get('valid', False):
+                score -= 15
+            elif ssl_cert.get('is_expired', False):
+                score -= 10
+            elif ssl_cert.get('expires_soon', False):
+                score -= 5
+        
+        # DNS Security (15 points)
+        if 'dns_security' in analysis:
+            dns_sec = analysis['dns_security']
+            if not dns_sec.get('spf_record'):
+                score -= 3
+            if not dns_sec.get('dmarc_record'):
+                score -= 4
+            if not dns_sec.get('caa_records'):
+                score -= 2
+        
+        # Content Analysis (25 points)
+        if 'content_analysis' in analysis:
+            content = analysis['content_analysis']
+            tracking_count = len(content.get('tracking_scripts', []))
+            analytics_count = len(content.get('analytics_tools', []))
+            advertising_count = len(content.get('advertising_networks', []))
+            
+            score -= min(10, tracking_count * 2)
+            score -= min(5, analytics_count * 1)
+            score -= min(10, advertising_count * 3)
+            
+            # Only present when script inspection is enabled
+            fingerprinting = sum(1 for script in content.get('script_inspection', [])
+                                 if script.get('fingerprinting'))
+            score -= min(10, fingerprinting * 5)
+        
+        return max(0, min(100, score))
+    
+    def _generate_recommendations(self, analysis):
+        """Generate privacy improvement recommendations"""
+        recommendations = []
+        
+        http_security = analysis.get('http_security', {})
+        ssl_cert = analysis.get('ssl_certificate', {})
+        dns_sec = analysis.get('dns_security', {})
+        content = analysis.get('content_analysis', {})
+        
+        # HTTPS recommendations
+        if not http_security.get('https_used', False):
+            recommendations.append({
+                'priority': 'high',
+                'category': 'Security',
+                'issue': 'No HTTPS encryption',
+                'recommendation': 'Enable HTTPS with a valid SSL/TLS certificate'
+            })
+        
+        # Security headers
+        headers = http_security.get('headers', {})
+        if not headers.get('HSTS', {}).get('present', False):
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'Security Headers',
+                'issue': 'Missing HSTS header',
+                'recommendation': 'Add Strict-Transport-Security header to enforce HTTPS'
+            })
+        
+        if not headers.get('CSP', {}).get('present', False):
+            recommendations.append({
+                'priority': 'high',
+                'category': 'Security Headers',
+                'issue': 'Missing Content Security Policy',
+                'recommendation': 'Implement CSP to prevent XSS and data injection attacks'
+            })
+        
+        # SSL Certificate
+        if ssl_cert.get('expires_soon', False):
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'SSL Certificate',
+                'issue': 'SSL certificate expires soon',
+                'recommendation': 'Renew SSL certificate before expiration'
+            })
+        
+        for issue in ssl_cert.get('chain_issues', []):
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'SSL Certificate',
+                'issue': issue,
+                'recommendation': 'Reissue or reconfigure the certificate chain'
+            })
+        
+        # Privacy concerns
+        tracking_scripts = content.get('tracking_scripts', [])
+        if len(tracking_scripts) > 3:
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'Privacy',
+                'issue': f'{len(tracking_scripts)} tracking scripts detected',
+                'recommendation': 'Consider reducing third-party tracking scripts'
+            })
+        
+        fingerprinting = [script for script in content.get('script_inspection', [])
+                          if script.get('fingerprinting')]
+        if fingerprinting:
+            recommendations.append({
+                'priority': 'high',
+                'category': 'Privacy',
+                'issue': f'{len(fingerprinting)} third-party scripts use browser fingerprinting',
+                'recommendation': 'Remove or replace scripts that fingerprint visitors'
+            })
+        
+        return recommendations
+    
+    def _evaluate_headers(self, headers):
+        """Evaluate security and information-leaking headers of one response
+
+        ``headers`` must be a case-insensitive mapping; live responses and
+        archived ones share this evaluation.
+        """
+        analysis = {'headers': {}}
+        
+        # Security headers to check
+        security_headers = {
+            'strict-transport-security': 'HSTS',
+            'content-security-policy': 'CSP', 
+            'x-frame-options': 'X-Frame-Options',
+            'x-content-type-options': 'X-Content-Type-Options',
+            'referrer-policy': 'Referrer-Policy',
+            'permissions-policy': 'Permissions-Policy',
+            'x-xss-protection': 'X-XSS-Protection'
+        }
+        
+        for header_name, display_name in security_headers.items():
+            value = headers.get(header_name)
+            analysis['headers'][display_name] = {
+                'present': value is not None,
+                'value': value,
+                'secure': self._evaluate_header_security(header_name, value)
+            }
+        
+        # Check for insecure headers
+        analysis['insecure_headers'] = self._check_insecure_headers(headers)
+        return analysis
+    
+    def _evaluate_header_security(self, header_name, value):
+        """Evaluate if a security header value is secure"""
+        if not value:
+            return False
+        
+        if header_name == 'strict-transport-security':
+            return 'max-age=' in value.lower()
+        elif header_name == 'content-security-policy':
+            return len(value) > 10  # Basic check
+        elif header_name == 'x-frame-options':
+            return value.lower() in ['deny', 'sameorigin']
+        elif header_name == 'referrer-policy':
+            secure_policies = ['no-referrer', 'same-origin', 'strict-origin']
+            return any(policy in value.lower() for policy in secure_policies)
+        
+        return True
+    
+    def _check_insecure_headers(self, headers):
+        """Check for headers that reveal too much information"""
+        insecure = []
+        
+        server = headers.get('server', '')
+        if server and len(server) > 20:  # Detailed server info
+            insecure.append('Detailed server information exposed')
+        
+        x_powered_by = headers.get('x-powered-by', '')
+        if x_powered_by:
+            insecure.append(f'Technology stack exposed: {x_powered_by}')
+        
+        return insecure
+    
+    def _classify_script(self, src):
+        """Classify third-party scripts by service type"""
+        services = {
+            'google-analytics.com': {'category': 'analytics_tools', 'service': 'Google Analytics'},
+            'googletagmanager.com': {'category': 'analytics_tools', 'service': 'Google Tag Manager'},
+            'facebook.com': {'category': 'tracking_scripts', 'service': 'Facebook Pixel'},
+            'facebook.net': {'category': 'tracking_scripts', 'service': 'Facebook SDK'},
+            'doubleclick.net': {'category': 'advertising_networks', 'service': 'Google Ads'},
+            'googlesyndication.com': {'category': 'advertising_networks', 'service': 'Google AdSense'},
+            'hotjar.com': {'category': 'analytics_tools', 'service': 'Hotjar'},
+            'mixpanel.com': {'category': 'analytics_tools', 'service': 'Mixpanel'},
+            'twitter.com': {'category': 'social_widgets', 'service': 'Twitter'},
+            'linkedin.com': {'category': 'social_widgets', 'service': 'LinkedIn'}
+        }
+        
+        for domain, info in services.items():
+            if domain in src:
+                return info
+        
+        return {'category': None, 'service': 'Unknown'}
+    
+    def _is_tracking_resource(self, src):
+        """Check if a resource is likely used for tracking"""
+        tracking_patterns = [
+            'analytics', 'tracking', 'pixel', 'beacon', 'metrics'
+        ]
+        return any(pattern in src.lower() for pattern in tracking_patterns)
+    
+    def _extract_domain(self, url):
+        """Extract domain from URL"""
+        try:
+            return urlparse(url).netloc
+        except:
+            return 'unknown'
@@ -0,0 +1,296 @@
+"""
+Scan History
+Append-only SQLite store of scan results with indexes for fleet queries
+"""
+
+from datetime import datetime, timezone
+import json
+import os
+import sqlite3
+import ssl
+
+from .diff import SERVICE_CATEGORIES, project
+
+
+DEFAULT_HISTORY = os.path.join(os.path.expanduser('~'), '.privacylens', 'history.db')
+
+# `scans` and `services` are append-only; `latest` is a derived index of each
+# domain's most recent scan, so fleet-state queries never touch old rows
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    score INTEGER,
+    https INTEGER,
+    cert_not_after REAL,
+    result TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS scans_url_time ON scans (url, scanned_at);
+CREATE INDEX IF NOT EXISTS scans_domain_time ON scans (domain, scanned_at);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (scanned_at);
+CREATE INDEX IF NOT EXISTS scans_score ON scans (score);
+CREATE INDEX IF NOT EXISTS scans_cert ON scans (cert_not_after);
+
+CREATE TABLE IF NOT EXISTS services (
+    service TEXT NOT NULL COLLATE NOCASE,
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    PRIMARY KEY (service, scan_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS services_scan ON services (scan_id);
+
+CREATE TABLE IF NOT EXISTS latest (
+    domain TEXT PRIMARY KEY,
+    scan_id INTEGER NOT NULL UNIQUE,
+    scanned_at REAL NOT NULL,
+    score INTEGER,
+    cert_not_after REAL
+);
+CREATE INDEX IF NOT EXISTS latest_score ON latest (score);
+CREATE INDEX IF NOT EXISTS latest_cert ON latest (cert_not_after);
+CREATE INDEX IF NOT EXISTS latest_time ON latest (scanned_at);
+
+CREATE TRIGGER IF NOT EXISTS scans_no_update BEFORE UPDATE ON scans
+BEGIN SELECT RAISE(ABORT, 'scan history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS scans_no_delete BEFORE DELETE ON scans
+BEGIN SELECT RAISE(ABORT, 'scan history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS services_no_update BEFORE UPDATE ON services
+BEGIN SELECT RAISE(ABORT, 'scan history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS services_no_delete BEFORE DELETE ON services
+BEGIN SELECT RAISE(ABORT, 'scan history is append-only'); END;
+"""
+
+# Columns of a query row; services are joined in as one char(31)-separated string
+ROW_COLUMNS = ('scans.id, scans.url, scans.domain, scans.scanned_at, scans.score, scans.https, '
+               'scans.cert_not_after, group_concat(services.service, char(31))')
+
+
+class HistoryStore:
+    """Append-only history of scan results
+
+    Every result is kept with its scan time; re-recording the same URL and
+    scan time is a no-op, so importing a snapshot twice is harmless. Queries
+    run against the ``latest`` index (each domain's newest scan) unless
+    ``history=True`` asks for every matching scan.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+    def record(self, results):
+        """Append results; return the number of new scans stored"""
+        added = 0
+        with self._db:
+            for result in results:
+                added += self._record(result)
+        return added
+
+    def _record(self, result):
+        url, domain, score, https, _, _, cert = project(result)
+        scanned_at = _parse_time(result.get('timestamp'))
+        if scanned_at is None or not domain:
+            return 0
+        cert_not_after = _cert_time((cert or {}).get('not_after'))
+        encoded = json.dumps(result, separators=(',', ':'), ensure_ascii=False, default=str)
+
+        cursor = self._db.execute(
+            'INSERT OR IGNORE INTO scans (url, domain, scanned_at, score, https, cert_not_after, result) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, domain, scanned_at, score, https, cert_not_after, encoded)
+        )
+        if cursor.rowcount != 1:
+            return 0
+        scan_id = cursor.lastrowid
+        self._db.executemany('INSERT OR IGNORE INTO services (service, scan_id) VALUES (?, ?)',
+                             ((service, scan_id) for service in _services(result)))
+        # Older scans imported late never replace a newer latest entry
+        self._db.execute(
+            'INSERT INTO latest (domain, scan_id, scanned_at, score, cert_not_after) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT (domain) DO UPDATE SET '
+            'scan_id = excluded.scan_id, scanned_at = excluded.scanned_at, '
+            'score = excluded.score, cert_not_after = excluded.cert_not_after '
+            'WHERE excluded.scanned_at >= latest.scanned_at',
+            (domain, scan_id, scanned_at, score, cert_not_after)
+        )
+        return 1
+
+    def query(self, domain=None, since=None, until=None, score_below=None, score_above=None,
+              expiring_within=None, service=None, history=False, limit=None):
+        """Yield scans matching every given filter, newest first
+
+        Times are epoch seconds; ``expiring_within`` is a number of days
+        from now (already-expired certificates match too).
+        """
+        table = 'scans' if history else 'latest'
+        id_column = 'id' if history else 'scan_id'
+        joins = '' if history else 'JOIN scans ON scans.id = latest.scan_id '
+        where = []
+        params = []
+        if domain:
+            where.append(f'{table}.domain = ?')
+            params.append(domain)
+        if since is not None:
+            where.append(f'{table}.scanned_at >= ?')
+            params.append(since)
+        if until is not None:
+            where.append(f'{table}.scanned_at < ?')
+            params.append(until)
+        if score_below is not None:
+            where.append(f'{table}.score < ?')
+            params.append(score_below)
+        if score_above is not None:
+            where.append(f'{table}.score > ?')
+            params.append(score_above)
+        if expiring_within is not None:
+            where.append(f'{table}.cert_not_after < ?')
+            params.append(_now() + expiring_within * 86400)
+        if service:
+            where.append(f'{table}.{id_column} IN (SELECT scan_id FROM services WHERE service = ?)')
+            params.append(service)
+
+        sql = (f'SELECT {ROW_COLUMNS} FROM {table} {joins}'
+               'LEFT JOIN services ON services.scan_id = scans.id')
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' GROUP BY scans.id ORDER BY {table}.scanned_at DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        for values in self._db.execute(sql, params).fetchall():
+            yield _row(values)
+
+    def added(self, service, since, until=None):
+        """Yield domains whose scans gained ``service`` in [since, until)
+
+        A domain qualifies when a scan in the window detects the service and
+        its last scan before the window did not. Domains first scanned inside
+        the window are not counted as having added anything.
+        """
+        until = _now() if until is None else until
+        rows = self._db.execute(
+            f"""
+            WITH added (first_seen, id) AS (
+                SELECT MIN(scans.scanned_at), scans.id
+                FROM services
+                JOIN scans ON scans.id = services.scan_id
+                JOIN scans AS prior ON prior.id = (
+                    SELECT id FROM scans AS p
+                    WHERE p.domain = scans.domain AND p.scanned_at < ?
+                    ORDER BY p.scanned_at DESC LIMIT 1
+                )
+                WHERE services.service = ? AND scans.scanned_at >= ? AND scans.scanned_at < ?
+                  AND NOT EXISTS (
+                    SELECT 1 FROM services AS s WHERE s.service = ? AND s.scan_id = prior.id
+                  )
+                GROUP BY scans.domain
+            )
+            SELECT {ROW_COLUMNS}
+            FROM added
+            JOIN scans ON scans.id = added.id
+            LEFT JOIN services ON services.scan_id = scans.id
+            GROUP BY scans.id
+            ORDER BY added.first_seen DESC
+            """,
+            (since, service, since, until, service)
+        ).fetchall()
+        # In `added`, SQLite takes the bare scans.id from the row holding MIN(scanned_at)
+        for values in rows:
+            row = _row(values)
+            # Report the stored spelling; matching is case-insensitive
+            row['added'] = next((name for name in row['services'] if name.lower() == service.lower()), service)
+            yield row
+
+    def result(self, scan_id):
+        """Return the full stored result of one scan"""
+        (encoded,) = self._db.execute('SELECT result FROM scans WHERE id = ?', (scan_id,)).fetchone()
+        return json.loads(encoded)
+
+    def stats(self):
+        scans, domains = self._db.execute(
+            'SELECT (SELECT COUNT(*) FROM scans), (SELECT COUNT(*) FROM latest)'
+        ).fetchone()
+        return {'scans': scans, 'domains': domains}
+
+    def close(self):
+        self._db.close()
+
+
+def _row(values):
+    """Build a query row from ROW_COLUMNS values"""
+    scan_id, url, domain, scanned_at, score, https, cert_not_after, services = values
+    return {
+        'id': scan_id,
+        'url': url,
+        'domain': domain,
+        'scanned_at': _iso(scanned_at),
+        'privacy_score': score,
+        'https': None if https is None else bool(https),
+        'cert_not_after': _iso(cert_not_after),
+        'cert_days_left': None if cert_not_after is None else int((cert_not_after - _now()) // 86400),
+        'services': sorted(services.split('\x1f')) if services else [],
+    }
+
+
+def _services(result):
+    """Tracker service names a result detected; bare third-party resource domains are not services"""
+    content = result.get('analysis', {}).get('content_analysis') or {}
+    return {entry['service'] for category in SERVICE_CATEGORIES
+            for entry in content.get(category, []) if entry.get('service')}
+
+
+def parse_since(value):
+    """Parse an ISO date/time, a relative age (14d, 12h, 2w) or 'month' into epoch seconds"""
+    if value is None:
+        return None
+    if value.lower() == 'month':
+        return _month_start()
+    units = {'h': 3600, 'd': 86400, 'w': 7 * 86400}
+    if value[-1:].lower() in units and value[:-1].isdigit():
+        return _now() - int(value[:-1]) * units[value[-1].lower()]
+    parsed = _parse_time(value)
+    if parsed is None:
+        raise ValueError(f'Unrecognized time: {value}')
+    return parsed
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _cert_time(value):
+    """Convert a certificate notAfter string ('Jun  1 12:00:00 2025 GMT') to epoch seconds"""
+    if not value:
+        return None
+    try:
+        return float(ssl.cert_time_to_seconds(value))
+    except ValueError:
+        return None
+
+
+def _iso(seconds):
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def _now():
+    return datetime.now(timezone.utc).timestamp()
+
+
+def _month_start():
+    now = datetime.now(timezone.utc)
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
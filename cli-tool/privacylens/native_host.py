@@ -0,0 +1,300 @@
+"""
+Native Messaging Host
+Answers browser extension queries from the analyzer through a shared,
+bounded result cache keyed by origin
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import json
+import os
+import shlex
+import sqlite3
+import stat
+import struct
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+from .analyzer import PrivacyAnalyzer
+
+
+HOST_NAME = 'org.privacylens.native_host'
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.privacylens', 'extension-cache.db')
+
+# Chrome rejects messages from a host larger than 1 MB
+MAX_MESSAGE = 1024 * 1024
+
+# Per-user NativeMessagingHosts directories, by browser
+MANIFEST_DIRS = {
+    'linux': {
+        'chrome': '~/.config/google-chrome/NativeMessagingHosts',
+        'chromium': '~/.config/chromium/NativeMessagingHosts',
+        'brave': '~/.config/BraveSoftware/Brave-Browser/NativeMessagingHosts',
+        'edge': '~/.config/microsoft-edge/NativeMessagingHosts',
+    },
+    'darwin': {
+        'chrome': '~/Library/Application Support/Google/Chrome/NativeMessagingHosts',
+        'chromium': '~/Library/Application Support/Chromium/NativeMessagingHosts',
+        'brave': '~/Library/Application Support/BraveSoftware/Brave-Browser/NativeMessagingHosts',
+        'edge': '~/Library/Application Support/Microsoft Edge/NativeMessagingHosts',
+    },
+}
+
+
+class ResultCache:
+    """Analysis cache keyed by origin (scheme, host and port), shared by every host process
+
+    The browser starts a host process per extension connection, so entries
+    live in SQLite rather than in memory: revisiting a site from another tab
+    or a later browser session is answered from disk. Entries expire after
+    ``ttl`` seconds and the least recently used ones are evicted beyond
+    ``max_entries``.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE, max_entries=500, ttl=6 * 3600):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'origin TEXT PRIMARY KEY, stored_at REAL NOT NULL, used_at REAL NOT NULL, result TEXT NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used_at)')
+        self._lock = threading.Lock()
+
+    def get(self, origin, max_age=None):
+        """Return (result, age in seconds) for a fresh entry, or None"""
+        max_age = self.ttl if max_age is None else min(max_age, self.ttl)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT stored_at, result FROM results WHERE origin = ?',
+                                   (origin,)).fetchone()
+            if row is None or now - row[0] > max_age:
+                return None
+            self._db.execute('UPDATE results SET used_at = ? WHERE origin = ?', (now, origin))
+        return json.loads(row[1]), now - row[0]
+
+    def put(self, origin, result):
+        now = time.time()
+        encoded = json.dumps(result, separators=(',', ':'), ensure_ascii=False, default=str)
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO results (origin, stored_at, used_at, result) VALUES (?, ?, ?, ?)',
+                    (origin, now, now, encoded)
+                )
+                self._db.execute('DELETE FROM results WHERE stored_at < ?', (now - self.ttl,))
+                self._db.execute(
+                    'DELETE FROM results WHERE origin IN (SELECT origin FROM results '
+                    'ORDER BY used_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+                )
+                self._db.execute('COMMIT')
+            except sqlite3.Error:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def clear(self, origin=None):
+        with self._lock:
+            if origin:
+                self._db.execute('DELETE FROM results WHERE origin = ?', (origin,))
+            else:
+                self._db.execute('DELETE FROM results')
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class NativeHost:
+    """Native-messaging request loop
+
+    Messages are read from stdin and answered on stdout, each framed by a
+    4-byte native-endian length. Requests run concurrently; concurrent
+    requests for the same origin share one analysis.
+
+    The extension asks on every page load, so the default analyzer is the
+    header-only profile (one request per origin, no TLS, DNS or WHOIS
+    probes) and repeat visits are answered from the cache.
+    """
+
+    def __init__(self, cache, analyzer_factory=None, workers=4, include_content=False):
+        self.cache = cache
+        self.analyzer_factory = analyzer_factory or functools.partial(PrivacyAnalyzer, headers_only=True)
+        self.include_content = include_content
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='privacylens-host')
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def serve(self, stdin, stdout):
+        """Answer requests until the browser closes the connection"""
+        self._out = stdout
+        try:
+            while True:
+                message = read_message(stdin)
+                if message is None:
+                    return
+                self.pool.submit(self._answer, message)
+        finally:
+            self.pool.shutdown(wait=True)
+
+    def handle(self, message):
+        """Return the response for one request"""
+        action = message.get('action')
+        if action == 'ping':
+            return {'ok': True, 'host': HOST_NAME, 'cached_origins': len(self.cache)}
+        if action == 'clearCache':
+            self.cache.clear(_origin_of(message['url']) if message.get('url') else None)
+            return {'ok': True}
+        if action not in ('analyze', 'getCached'):
+            return {'ok': False, 'error': f'Unknown action: {action}'}
+
+        url = message.get('url', '')
+        origin = _origin_of(url)
+        if not origin:
+            return {'ok': False, 'error': f'Unsupported URL: {url}'}
+
+        if not message.get('refresh'):
+            cached = self.cache.get(origin, message.get('maxAge'))
+            if cached:
+                result, age = cached
+                return {'ok': True, 'origin': origin, 'cached': True, 'age': round(age), 'result': result}
+        if action == 'getCached':
+            return {'ok': True, 'origin': origin, 'cached': False, 'result': None}
+
+        result = self._analyze_once(origin)
+        return {'ok': True, 'origin': origin, 'cached': False, 'age': 0, 'result': result}
+
+    def _answer(self, message):
+        try:
+            response = self.handle(message)
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        if 'id' in message:
+            response['id'] = message['id']
+        with self._write_lock:
+            write_message(self._out, response)
+
+    def _analyze_once(self, origin):
+        """Analyze an origin, joining an analysis already running for it"""
+        with self._inflight_lock:
+            event = self._inflight.get(origin)
+            owner = event is None
+            if owner:
+                event = self._inflight[origin] = threading.Event()
+        if not owner:
+            event.wait()
+            cached = self.cache.get(origin)
+            if cached:
+                return cached[0]
+
+        try:
+            analyzer = getattr(self._local, 'analyzer', None)
+            if analyzer is None:
+                analyzer = self._local.analyzer = self.analyzer_factory()
+            # Domain-level probes by default; the extension inspects page content itself
+            result = analyzer.analyze(f'{origin}/', include_content=self.include_content)
+            self.cache.put(origin, result)
+            return result
+        finally:
+            if owner:
+                with self._inflight_lock:
+                    del self._inflight[origin]
+                event.set()
+
+
+def read_message(stream):
+    """Read one length-prefixed JSON message; None at end of input"""
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    (length,) = struct.unpack('=I', header)
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    return json.loads(body)
+
+
+def write_message(stream, message):
+    """Write one length-prefixed JSON message, trimming it to the browser's size limit"""
+    body = json.dumps(message, separators=(',', ':'), default=str).encode('utf-8')
+    if len(body) > MAX_MESSAGE and isinstance(message.get('result'), dict):
+        result = dict(message['result'])
+        result['analysis'] = {name: section for name, section in result.get('analysis', {}).items()
+                              if name != 'content_analysis'}
+        result['truncated'] = True
+        body = json.dumps(dict(message, result=result), separators=(',', ':'), default=str).encode('utf-8')
+    if len(body) > MAX_MESSAGE:
+        body = json.dumps({'id': message.get('id'), 'ok': False,
+                           'error': 'Response exceeds native messaging size limit'}).encode('utf-8')
+    stream.write(struct.pack('=I', len(body)))
+    stream.write(body)
+    stream.flush()
+
+
+def install_manifest(extension_ids, browser='chrome', directory=None, host_args=()):
+    """Write the launcher script and host manifest; return the manifest path
+
+    Chromium-based browsers on Linux and macOS only: the manifest uses
+    Chrome's ``allowed_origins`` (Firefox expects ``allowed_extensions``)
+    and the launcher is a shell script. ``host_args`` (e.g. ``['--full']``)
+    are baked into the launcher, which is per browser, so installing for
+    one browser never changes the options another one runs with.
+    """
+    if sys.platform.startswith('win'):
+        raise OSError('Windows is not supported: hosts are registered in the registry '
+                      'and need a .bat launcher; register one manually')
+    if directory is None:
+        dirs = MANIFEST_DIRS['darwin' if sys.platform == 'darwin' else 'linux']
+        directory = os.path.expanduser(dirs[browser])
+    os.makedirs(directory, exist_ok=True)
+
+    # Browsers launch the host without arguments of our choosing, so point
+    # the manifest at a launcher bound to this interpreter
+    launcher = os.path.join(os.path.dirname(DEFAULT_CACHE), f'native-host-{browser}.sh')
+    os.makedirs(os.path.dirname(launcher), exist_ok=True)
+    with open(launcher, 'w', encoding='utf-8') as f:
+        options = ''.join(f' {shlex.quote(arg)}' for arg in host_args)
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" -m privacylens native-host{options} "$@"\n')
+    os.chmod(launcher, os.stat(launcher).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    manifest = {
+        'name': HOST_NAME,
+        'description': 'PrivacyLens analysis engine',
+        'path': launcher,
+        'type': 'stdio',
+        'allowed_origins': [f'chrome-extension://{extension_id}/' for extension_id in extension_ids],
+    }
+    path = os.path.join(directory, f'{HOST_NAME}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return path
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _origin_of(url):
+    """Cache key: scheme, host and non-default port; credentials in the URL are dropped"""
+    parsed = urlparse(url)
+    if parsed.scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    host = f'[{parsed.hostname}]' if ':' in parsed.hostname else parsed.hostname
+    if port is not None and port != DEFAULT_PORTS[parsed.scheme]:
+        host = f'{host}:{port}'
+    return f'{parsed.scheme}://{host}'
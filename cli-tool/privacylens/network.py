@@ -0,0 +1,508 @@
+"""
+Network Helpers
+Latency tracking, adaptive timeouts, hedged DNS queries, circuit breaking and
+pinned address resolution for the analyzer
+"""
+
+import asyncio
+import bisect
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import ipaddress
+import math
+import os
+import selectors
+import socket
+import threading
+import time
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+
+
+class LatencyTracker:
+    """Per-probe latency distributions and the timeouts derived from them
+
+    Until a probe has ``min_samples`` observations its timeout is the
+    configured ceiling. After that it is ``multiplier`` times the chosen
+    percentile, clamped to [floor, ceiling]. If the recent timeout rate of
+    a probe rises above ``max_timeout_rate`` the ceiling is used again, so
+    a tightened timeout can never keep failing healthy-but-slow hosts.
+    """
+
+    def __init__(self, ceiling, floor=1.0, percentile=95, multiplier=2.0,
+                 min_samples=20, window=500, max_timeout_rate=0.05):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.percentile_rank = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.max_timeout_rate = max_timeout_rate
+        self._window = window
+        # Per probe: samples in arrival order (to know which one leaves the
+        # window) and the same samples kept sorted, so percentiles are lookups
+        self._samples = {}
+        self._sorted = {}
+        self._outcomes = {}
+        self._lock = threading.Lock()
+
+    def record(self, probe, seconds):
+        """Record a completed probe"""
+        with self._lock:
+            samples, ordered, outcomes = self._series(probe)
+            if len(samples) == samples.maxlen:
+                del ordered[bisect.bisect_left(ordered, samples[0])]
+            samples.append(seconds)
+            bisect.insort(ordered, seconds)
+            outcomes.append(False)
+
+    def record_timeout(self, probe):
+        """Record a probe that hit its timeout"""
+        with self._lock:
+            self._series(probe)[2].append(True)
+
+    def percentile(self, probe, rank=None):
+        """Return the latency percentile for a probe, or None without enough samples"""
+        with self._lock:
+            return self._percentile(probe, rank)
+
+    def timeout(self, probe):
+        """Return the timeout to use for the next run of a probe"""
+        with self._lock:
+            return self._timeout(probe)
+
+    def timeout_rate(self, probe):
+        with self._lock:
+            return self._timeout_rate(probe)
+
+    def summary(self):
+        """Return per-probe sample counts, percentiles and current timeouts"""
+        with self._lock:
+            return {
+                probe: {
+                    'samples': len(self._samples[probe]),
+                    'p50': self._percentile(probe, 50),
+                    'p95': self._percentile(probe, 95),
+                    'timeout_rate': round(self._timeout_rate(probe), 4),
+                    'timeout': self._timeout(probe),
+                }
+                for probe in self._outcomes
+            }
+
+    # The helpers below expect the lock to be held
+    def _percentile(self, probe, rank=None):
+        ordered = self._sorted.get(probe, ())
+        if len(ordered) < self.min_samples:
+            return None
+        rank = self.percentile_rank if rank is None else rank
+        return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+    def _timeout(self, probe):
+        observed = self._percentile(probe)
+        if observed is None or self._timeout_rate(probe) > self.max_timeout_rate:
+            return self.ceiling
+        return max(self.floor, min(self.ceiling, observed * self.multiplier))
+
+    def _timeout_rate(self, probe):
+        outcomes = self._outcomes.get(probe, ())
+        return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def _series(self, probe):
+        if probe not in self._outcomes:
+            self._samples[probe] = deque(maxlen=self._window)
+            self._sorted[probe] = []
+            self._outcomes[probe] = deque(maxlen=self._window)
+        return self._samples[probe], self._sorted[probe], self._outcomes[probe]
+
+
+class HedgedResolver:
+    """DNS resolver that hedges slow queries to an alternate resolver
+
+    Without a LatencyTracker this behaves like dns.resolver.resolve(). With
+    one, a query still unanswered after the tracker's 'dns' percentile gets
+    a second, identical query sent to the alternate nameservers, and the
+    first answer wins. NXDOMAIN and NoAnswer are definitive and returned
+    (raised) as soon as either resolver produces them. The race runs on a
+    private event loop, so the losing query is cancelled and its socket
+    closed instead of tying up a thread until its lifetime runs out.
+
+    The system configuration is read on first use, not at construction, so
+    an analyzer can be built (e.g. for offline work) on a host without one.
+    """
+
+    def __init__(self, latency=None, alternate_nameservers=None):
+        self.latency = latency
+        self.alternate_nameservers = alternate_nameservers
+        self.hedged = 0
+        self._resolvers = None
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self):
+        return self._configured()[0]
+
+    def resolve(self, name, rdtype, lifetime=None):
+        """Resolve a name, hedging when the query outlives the observed percentile"""
+        primary, async_primary, async_alternate = self._configured()
+        if self.latency is None:
+            return primary.resolve(name, rdtype, lifetime=lifetime)
+
+        lifetime = self.latency.timeout('dns') if lifetime is None else lifetime
+        hedge_after = self.latency.percentile('dns') if async_alternate else None
+        start = time.monotonic()
+        try:
+            if hedge_after is None:
+                answer = primary.resolve(name, rdtype, lifetime=lifetime)
+            else:
+                answer = asyncio.run(self._race(async_primary, async_alternate, name, rdtype,
+                                                lifetime, hedge_after))
+        except dns.exception.Timeout:
+            self.latency.record_timeout('dns')
+            raise
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            self.latency.record('dns', time.monotonic() - start)
+            raise
+        self.latency.record('dns', time.monotonic() - start)
+        return answer
+
+    async def _race(self, primary, alternate, name, rdtype, lifetime, hedge_after):
+        start = time.monotonic()
+        tasks = {asyncio.ensure_future(primary.resolve(name, rdtype, lifetime=lifetime))}
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            with self._lock:
+                self.hedged += 1
+            remaining = max(0.1, lifetime - (time.monotonic() - start))
+            tasks.add(asyncio.ensure_future(alternate.resolve(name, rdtype, lifetime=remaining)))
+
+        error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    e = task.exception()
+                    if e is None:
+                        return task.result()
+                    if isinstance(e, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+                        raise e
+                    error = e
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if error is None or isinstance(error, dns.exception.Timeout):
+            raise dns.exception.Timeout(timeout=lifetime)
+        raise error
+
+    def _configured(self):
+        """Return (primary, async primary, async alternate), reading the system config once"""
+        with self._lock:
+            if self._resolvers is None:
+                primary = dns.resolver.Resolver()
+                async_primary = dns.asyncresolver.Resolver()
+                # Default alternate: the system's other configured nameservers
+                alternates = list(self.alternate_nameservers or primary.nameservers[1:])
+                async_alternate = None
+                if alternates:
+                    async_alternate = dns.asyncresolver.Resolver(configure=False)
+                    async_alternate.nameservers = alternates
+                    async_alternate.search = primary.search
+                self._resolvers = (primary, async_primary, async_alternate)
+            return self._resolvers
+
+
+class CircuitBreaker:
+    """Per-run memory of hosts that keep failing
+
+    After ``threshold`` consecutive failures a host's circuit opens and it is
+    reported unreachable without another connection attempt. Once
+    ``cooldown`` seconds have passed one attempt is let through again
+    (half-open); a success closes the circuit, a failure re-opens it.
+    """
+
+    def __init__(self, threshold=2, cooldown=300):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, host):
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return False
+            if time.monotonic() - opened_at >= self.cooldown:
+                # Half-open: allow a single probe through
+                del self._opened_at[host]
+                return False
+            return True
+
+    def failures(self, host):
+        with self._lock:
+            return self._failures.get(host, 0)
+
+    def record_failure(self, host):
+        with self._lock:
+            count = self._failures.get(host, 0) + 1
+            self._failures[host] = count
+            if count >= self.threshold:
+                self._opened_at[host] = time.monotonic()
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+
+class AddressPinner:
+    """Host -> address map shared by every connection the analyzer opens
+
+    A and AAAA records are looked up concurrently once per host and pinned;
+    connections race the pinned addresses (IPv6 and IPv4 interleaved, a new
+    attempt every ``stagger`` seconds, RFC 8305 style). The address that wins
+    is tried first from then on, so all probes reach the same server unless
+    it stops answering.
+
+    Pins are scoped per host: a scan re-pins only its own host (repin), so
+    concurrent users of the analyzer (crawler pages, native-host requests)
+    never lose the pins they are connecting through. At most ``max_hosts``
+    hosts are kept, least recently used first out.
+    """
+
+    def __init__(self, resolver, stagger=0.25, max_hosts=10000):
+        self.resolver = resolver
+        self.stagger = stagger
+        self.max_hosts = max_hosts
+        self._addresses = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='privacylens-pin')
+
+    def pinned(self, host):
+        """Return the pinned IP strings for a host, winner first"""
+        with self._lock:
+            return [ip for _, ip in self._addresses.get(host, ())]
+
+    def resolve(self, host):
+        """Return the (family, ip) list for a host, resolving it on first use"""
+        with self._lock:
+            addresses = self._addresses.get(host)
+            if addresses is not None:
+                self._addresses.move_to_end(host)
+                return addresses
+
+        addresses = self._lookup(host)
+        with self._lock:
+            # Another thread may have pinned the host meanwhile; keep its answer
+            if host not in self._addresses:
+                self._store(host, addresses)
+            return self._addresses[host]
+
+    def repin(self, host):
+        """Resolve a host again and replace its pin (start of a scan of that host)
+
+        The old pin stays in place until the new answer is in, so connections
+        already racing for this host are unaffected.
+        """
+        addresses = self._lookup(host)
+        with self._lock:
+            self._store(host, addresses)
+        return addresses
+
+    def connect(self, host, port, timeout=None, source_address=None):
+        """Open a TCP connection to one of the host's pinned addresses"""
+        addresses = self.resolve(host)
+        sock, winner = connect_racing(addresses, port, timeout, self.stagger, source_address)
+        with self._lock:
+            pinned = self._addresses.get(host, addresses)
+            if pinned and pinned[0] != winner:
+                self._store(host, [winner] + [a for a in pinned if a != winner])
+        return sock
+
+    def _store(self, host, addresses):
+        self._addresses[host] = addresses
+        self._addresses.move_to_end(host)
+        while len(self._addresses) > self.max_hosts:
+            self._addresses.popitem(last=False)
+
+    def _lookup(self, host):
+        try:
+            ip = ipaddress.ip_address(host.strip('[]'))
+        except ValueError:
+            pass
+        else:
+            family = socket.AF_INET6 if ip.version == 6 else socket.AF_INET
+            return [(family, str(ip))]
+
+        queries = {
+            family: self._executor.submit(self._query, host, rdtype)
+            for family, rdtype in ((socket.AF_INET6, 'AAAA'), (socket.AF_INET, 'A'))
+        }
+        ipv6 = queries[socket.AF_INET6].result()
+        ipv4 = queries[socket.AF_INET].result()
+
+        if not ipv6 and not ipv4:
+            # Names the DNS resolver cannot see (hosts file, mDNS, ...)
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            ipv6 = [info[4][0] for info in infos if info[0] == socket.AF_INET6]
+            ipv4 = [info[4][0] for info in infos if info[0] == socket.AF_INET]
+
+        return _interleave(
+            [(socket.AF_INET6, ip) for ip in dict.fromkeys(ipv6)],
+            [(socket.AF_INET, ip) for ip in dict.fromkeys(ipv4)],
+        )
+
+    def _query(self, host, rdtype):
+        try:
+            return [record.address for record in self.resolver.resolve(host, rdtype)]
+        except Exception:
+            return []
+
+
+def _interleave(first, second):
+    """Alternate address families, starting with the first list"""
+    merged = []
+    for i in range(max(len(first), len(second))):
+        merged.extend(family[i] for family in (first, second) if i < len(family))
+    return merged
+
+
+# connect_ex results meaning a non-blocking connect is under way (Windows
+# reports WSAEWOULDBLOCK rather than EINPROGRESS)
+_CONNECT_PENDING = frozenset(
+    code for code in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', None))
+    if code is not None
+)
+
+
+def connect_racing(addresses, port, timeout=None, stagger=0.25, source_address=None):
+    """Race TCP connections to the given addresses; return (socket, winner)
+
+    A new attempt starts every ``stagger`` seconds (or immediately when an
+    attempt fails) until one connects. Losing attempts are closed. Each
+    socket is bound to ``source_address`` first, when one is given.
+    """
+    if not addresses:
+        raise socket.gaierror(socket.EAI_NONAME, 'No addresses to connect to')
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = list(addresses)
+    attempts = {}
+    selector = selectors.DefaultSelector()
+    next_start = time.monotonic()
+    last_error = None
+
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise socket.timeout('timed out')
+
+            if pending and (now >= next_start or not attempts):
+                family, ip = pending.pop(0)
+                sock = socket.socket(family, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                try:
+                    if source_address:
+                        sock.bind(source_address)
+                    error = sock.connect_ex((ip, port))
+                    if error not in _CONNECT_PENDING:
+                        raise OSError(error, os.strerror(error))
+                except OSError as e:
+                    last_error = e
+                    sock.close()
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE, (family, ip))
+                attempts[sock] = (family, ip)
+                next_start = now + stagger
+                continue
+
+            wake = next_start if pending else None
+            if deadline is not None:
+                wake = deadline if wake is None else min(wake, deadline)
+            for key, _ in selector.select(None if wake is None else max(0, wake - now)):
+                sock = key.fileobj
+                selector.unregister(sock)
+                winner = attempts.pop(sock)
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    last_error = OSError(error, os.strerror(error))
+                    sock.close()
+                    next_start = time.monotonic()
+                    continue
+                sock.setblocking(True)
+                sock.settimeout(timeout)
+                return sock, winner
+
+        raise last_error
+    finally:
+        for sock in attempts:
+            sock.close()
+        selector.close()
+
+
+class _PinnedConnectionMixin:
+    """urllib3 connection that connects through an AddressPinner
+
+    Overrides ``_new_conn``, the socket-creation step of urllib3 2.x
+    connections (requirements pin urllib3 below 3). The pinner is a class
+    attribute set per adapter by _pinned_pool_classes.
+    """
+
+    address_pinner = None
+
+    def _new_conn(self):
+        if self.address_pinner is None:
+            return super()._new_conn()
+
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else None
+        try:
+            sock = self.address_pinner.connect(self.host, self.port, timeout, self.source_address)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+        for option in self.socket_options or ():
+            sock.setsockopt(*option)
+        return sock
+
+
+def _pinned_pool_classes(address_pinner):
+    """Return a PoolManager ``pool_classes_by_scheme`` map that connects through a pinner"""
+    classes = {}
+    for scheme, pool_cls, connection_cls in (
+        ('http', HTTPConnectionPool, HTTPConnection),
+        ('https', HTTPSConnectionPool, HTTPSConnection),
+    ):
+        pinned_connection = type(f'Pinned{connection_cls.__name__}', (_PinnedConnectionMixin, connection_cls),
+                                 {'address_pinner': address_pinner})
+        classes[scheme] = type(f'Pinned{pool_cls.__name__}', (pool_cls,), {'ConnectionCls': pinned_connection})
+    return classes
+
+
+class PinnedHTTPAdapter(HTTPAdapter):
+    """requests adapter whose connections use the analyzer's pinned addresses
+
+    Requests sent through a proxy (session ``proxies`` or the HTTP(S)_PROXY
+    environment variables) are not pinned: the proxy resolves the host itself.
+    """
+
+    def __init__(self, address_pinner, **kwargs):
+        self.address_pinner = address_pinner
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = _pinned_pool_classes(self.address_pinner)
@@ -1,28 +1,71 @@
 """
 Report Generator for PrivacyLens CLI
-Generates formatted reports in text and JSON formats
+Generates formatted reports in text, JSON and NDJSON formats
 """
 
 import json
-from datetime import datetime
+from datetime import date, datetime
 from colorama import init, Fore, Back, Style
 import textwrap
+from .results import to_plain
+
+try:
+    import orjson
+except ImportError:  # optional faster encoder for compact JSON
+    orjson = None
 
 # Initialize colorama
 init(autoreset=True)
 
+# Compact encoder; results are pre-converted by _json_ready, so no default= hook.
+# Compact and NDJSON output keep non-ASCII text as UTF-8, as orjson does (it
+# cannot escape it); pretty JSON keeps the json module's default \u escapes
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False,
+                                    check_circular=False)
+
 
 class Reporter:
-    def __init__(self, output_format='text'):
+    def __init__(self, output_format='text', compact=False):
         self.output_format = output_format
+        # NDJSON is one result per line, so it is always compact
+        self.compact = compact or output_format == 'ndjson'
     
     def generate_report(self, analysis_result):
         """Generate report based on format"""
-        if self.output_format == 'json':
+        if self.output_format in ('json', 'ndjson'):
             return self._generate_json_report(analysis_result)
         else:
             return self._generate_text_report(analysis_result)
     
+    def write_report(self, analysis_result, stream):
+        """Write report directly to a text stream"""
+        if self.output_format in ('json', 'ndjson') and self.compact:
+            self._write_compact_json(analysis_result, stream)
+        else:
+            stream.write(self.generate_report(analysis_result))
+    
+    def write_results(self, results, stream):
+        """Write many results as a JSON array or NDJSON, one result at a time"""
+        if self.output_format == 'ndjson':
+            for result in results:
+                self._write_compact_json(result, stream)
+                stream.write("\n")
+            return
+        
+        stream.write("[")
+        written = False
+        for result in results:
+            if written:
+                stream.write(",")
+            written = True
+            if self.compact:
+                self._write_compact_json(result, stream)
+            else:
+                # Same layout as json.dumps(results, indent=2), one element at a time
+                element = json.dumps(_json_ready(to_plain(result)), indent=2)
+                stream.write("\n  " + element.replace("\n", "\n  "))
+        stream.write("\n]\n" if written and not self.compact else "]\n")
+    
     def _generate_text_report(self, result):
         """Generate colorful text report"""
         lines = []
@@ -35,18 +78,26 @@ class Reporter:
         lines.append(self._create_score_section(result))
         lines.append("")
         
-        # Detailed Analysis Sections
-        lines.append(self._create_http_security_section(result['analysis'].get('http_security', {})))
+        # Detailed Analysis Sections (header-only scans carry just http_security)
+        analysis = result['analysis']
+        lines.append(self._create_http_security_section(analysis.get('http_security', {})))
         lines.append("")
         
-        lines.append(self._create_ssl_section(result['analysis'].get('ssl_certificate', {})))
-        lines.append("")
+        if 'ssl_certificate' in analysis:
+            lines.append(self._create_ssl_section(analysis['ssl_certificate']))
+            lines.append("")
         
-        lines.append(self._create_dns_section(result['analysis'].get('dns_security', {})))
-        lines.append("")
+        if 'dns_security' in analysis:
+            lines.append(self._create_dns_section(analysis['dns_security']))
+            lines.append("")
         
-        lines.append(self._create_content_section(result['analysis'].get('content_analysis', {})))
-        lines.append("")
+        if 'content_analysis' in analysis:
+            lines.append(self._create_content_section(analysis['content_analysis']))
+            lines.append("")
+        
+        if 'crawl' in result:
+            lines.append(self._create_crawl_section(result['crawl']))
+            lines.append("")
         
         # Recommendations
         lines.append(self._create_recommendations_section(result.get('recommendations', [])))
@@ -55,7 +106,20 @@ class Reporter:
     
     def _generate_json_report(self, result):
         """Generate JSON report"""
-        return json.dumps(result, indent=2, default=str)
+        if self.compact:
+            return self._encode_compact(result)
+        return json.dumps(_json_ready(to_plain(result)), indent=2)
+    
+    def _encode_compact(self, result):
+        """Encode a result as compact JSON text"""
+        prepared = _json_ready(to_plain(result))
+        if orjson is not None:
+            return orjson.dumps(prepared).decode('utf-8')
+        return _COMPACT_ENCODER.encode(prepared)
+    
+    def _write_compact_json(self, result, stream):
+        """Write a result as compact JSON to a text stream"""
+        stream.write(self._encode_compact(result))
     
     def _create_header(self, result):
         """Create report header"""
@@ -77,6 +141,14 @@ class Reporter:
     def _create_score_section(self, result):
         """Create privacy score section"""
         score = result.get('privacy_score', 0)
+        if score is None:
+            # Unreachable hosts are not scored
+            return f"""
+{Fore.CYAN}{Style.BRIGHT}📊 PRIVACY SCORE{Style.RESET_ALL}
+{'-' * 20}
+
+Overall Score: ⚫ NOT SCORED (host unreachable)
+            """.strip()
         
         # Color coding based on score
         if score >= 80:
@@ -126,6 +198,12 @@ Error: {http_security['error']}
         https_status = "✅ Enabled" if http_security.get('https_used', False) else "❌ Not Used"
         https_color = Fore.GREEN if http_security.get('https_used', False) else Fore.RED
         lines.append(f"HTTPS: {https_color}{https_status}{Style.RESET_ALL}")
+        
+        # Redirect chain
+        redirects = http_security.get('redirect_chain', [])
+        if redirects:
+            hops = " → ".join(f"{hop['url']} ({hop['status_code']})" for hop in redirects)
+            lines.append(f"Redirects: {Fore.LIGHTBLACK_EX}{hops} → {http_security.get('final_url')}{Style.RESET_ALL}")
         lines.append("")
         
         # Security headers
@@ -189,6 +267,26 @@ Error: {http_security['error']}
         if days_left >= 0:
             lines.append(f"Days Until Expiry: {days_left}")
         
+        key = ssl_cert.get('key')
+        if key:
+            key_text = f"{key['type']} {key['size']}" + (f" ({key['curve']})" if key.get('curve') else "")
+            lines.append(f"Key: {key_text}, signed with {ssl_cert.get('signature_algorithm')}")
+        
+        chain = ssl_cert.get('chain')
+        if chain:
+            lines.append(f"Chain: {len(chain)} certificates ({ssl_cert.get('chain_source')})")
+            for cert in chain[1:]:
+                lines.append(f"  ↳ {cert['subject']} (expires in {cert['days_until_expiry']} days)")
+        
+        ocsp = ssl_cert.get('ocsp')
+        if ocsp:
+            stapled = {True: '✅ stapled', False: '❌ not stapled', None: '❔ not checked'}[ocsp['stapled']]
+            must_staple = ", must-staple" if ocsp.get('must_staple') else ""
+            lines.append(f"OCSP: {stapled}{must_staple}")
+        
+        for issue in ssl_cert.get('chain_issues', []):
+            lines.append(f"{Fore.YELLOW}⚠️ {issue}{Style.RESET_ALL}")
+        
         return "\n".join(lines)
     
     def _create_dns_section(self, dns_security):
@@ -218,6 +316,18 @@ Error: {http_security['error']}
         caa_color = Fore.GREEN if caa_records else Fore.RED
         lines.append(f"CAA Records: {caa_color}{caa_status}{Style.RESET_ALL}")
         
+        # DNSSEC
+        validation = dns_security.get('dnssec_validation')
+        if validation:
+            dnssec_status, dnssec_color = {
+                'secure': ("✅", Fore.GREEN),
+                'insecure': ("❌", Fore.RED),
+                'bogus': ("⚠️ BOGUS", Fore.RED),
+            }.get(validation['status'], ("❔", Fore.YELLOW))
+            lines.append(f"DNSSEC: {dnssec_color}{dnssec_status}{Style.RESET_ALL}")
+            if validation.get('reason'):
+                lines.append(f"  {Fore.LIGHTBLACK_EX}{validation['reason']}{Style.RESET_ALL}")
+        
         return "\n".join(lines)
     
     def _create_content_section(self, content_analysis):
@@ -262,6 +372,42 @@ Error: {http_security['error']}
                     lines.append(f"  • {service} ({tracker.get('domain', 'unknown')})")
                     seen_services.add(service)
         
+        scripts = content_analysis.get('script_inspection')
+        if scripts is not None:
+            fingerprinting = [script for script in scripts if script.get('fingerprinting')]
+            color = Fore.RED if fingerprinting else Fore.GREEN
+            lines.append("")
+            lines.append(f"Scripts Inspected: {len(scripts)}, fingerprinting: "
+                         f"{color}{len(fingerprinting)}{Style.RESET_ALL}")
+            for script in fingerprinting[:5]:
+                lines.append(f"  • {script['url']} ({', '.join(script['techniques'])})")
+        
+        return "\n".join(lines)
+    
+    def _create_crawl_section(self, crawl):
+        """Create site crawl section"""
+        lines = [
+            f"{Fore.CYAN}{Style.BRIGHT}🕸️ SITE CRAWL{Style.RESET_ALL}",
+            "-" * 20,
+            f"Pages Crawled: {crawl['pages_crawled']} (limit {crawl['max_pages']}, depth {crawl['max_depth']})",
+            f"Unique Resources: {crawl['unique_resources']}"
+        ]
+        
+        failed = [page for page in crawl['pages'] if 'error' in page]
+        if failed:
+            lines.append(f"{Fore.YELLOW}⚠️ {len(failed)} pages failed to load{Style.RESET_ALL}")
+        if crawl.get('robots_disallowed'):
+            lines.append(f"Skipped (robots.txt): {crawl['robots_disallowed']}")
+        
+        # Pages carrying the most trackers
+        heaviest = sorted(crawl['pages'], key=lambda page: page.get('trackers', 0), reverse=True)
+        heaviest = [page for page in heaviest[:5] if page.get('trackers')]
+        if heaviest:
+            lines.append("")
+            lines.append(f"{Fore.YELLOW}🎯 Pages With Most Trackers:")
+            for page in heaviest:
+                lines.append(f"  • {page['url']} ({page['trackers']})")
+        
         return "\n".join(lines)
     
     def _create_recommendations_section(self, recommendations):
@@ -297,6 +443,152 @@ No specific recommendations - good privacy practices detected!
         
         return "\n".join(lines)
     
+    def generate_aggregate_report(self, summary):
+        """Generate fleet statistics report from FleetAggregator.summary()"""
+        if self.output_format == 'json':
+            return json.dumps(summary, indent=2)
+        
+        lines = [
+            f"{Fore.CYAN}{Style.BRIGHT}{'='*60}",
+            "📈 PrivacyLens Fleet Summary",
+            f"{'='*60}{Style.RESET_ALL}",
+            "",
+            f"Results: {summary['rows']} ({summary['failed']} failed)",
+            f"HTTPS: {self._percent(summary['https_rate'])}",
+            "",
+            f"{Fore.CYAN}{Style.BRIGHT}📊 PRIVACY SCORE{Style.RESET_ALL}",
+            "-" * 20,
+            f"Mean: {summary['score']['mean']}",
+            "Percentiles: " + self._format_percentiles(summary['score']['percentiles']),
+        ]
+        
+        histogram = summary['score']['histogram']
+        largest = max(histogram.values(), default=0) or 1
+        for label, count in histogram.items():
+            bar = "█" * round(30 * count / largest)
+            lines.append(f"  {label:>7} | {bar} {count}")
+        
+        lines += ["", f"{Fore.CYAN}{Style.BRIGHT}🔒 HEADER PRESENCE{Style.RESET_ALL}", "-" * 20]
+        for name, rate in summary['header_presence'].items():
+            lines.append(f"{name}: {self._percent(rate)}")
+        
+        lines += ["", f"{Fore.CYAN}{Style.BRIGHT}🎯 TRACKERS{Style.RESET_ALL}", "-" * 20]
+        for category, stats in summary['trackers'].items():
+            lines.append(
+                f"{category}: mean {stats['mean']}, "
+                f"present on {self._percent(stats['sites_with_any'])} of sites"
+            )
+        if summary['service_prevalence']:
+            lines.append("")
+            lines.append(f"{Fore.YELLOW}Most prevalent services:{Style.RESET_ALL}")
+            for entry in summary['service_prevalence']:
+                lines.append(f"  • {entry['service']}: {entry['sites']} sites ({self._percent(entry['rate'])})")
+        
+        certificates = summary['certificates']
+        lines += [
+            "",
+            f"{Fore.CYAN}{Style.BRIGHT}🔐 CERTIFICATES{Style.RESET_ALL}",
+            "-" * 20,
+            f"Known: {certificates['known']}",
+            f"Expired: {certificates['expired']}",
+            f"Expiring within 14 days: {certificates['expiring_within_14_days']}",
+            f"Expiring within 30 days: {certificates['expiring_within_30_days']}",
+            "Days left: " + self._format_percentiles(certificates['percentiles']),
+        ]
+        
+        return "\n".join(lines)
+    
+    def generate_history_entry(self, row):
+        """Generate one line describing a stored scan from HistoryStore"""
+        if self.output_format in ('json', 'ndjson'):
+            return self._encode_compact(row)
+        
+        score = row['privacy_score']
+        color = Fore.GREEN if (score or 0) >= 80 else Fore.YELLOW if (score or 0) >= 60 else Fore.RED
+        line = f"{row['scanned_at'][:16]}  {color}{score if score is not None else '-':>3}{Style.RESET_ALL}  {row['domain']}"
+        
+        days = row['cert_days_left']
+        if days is not None:
+            cert_color = Fore.RED if days < 14 else Fore.YELLOW if days < 30 else ''
+            line += f"  {cert_color}cert {days}d{Style.RESET_ALL if cert_color else ''}"
+        if row.get('added'):
+            line += f"  {Fore.RED}+ {row['added']}{Style.RESET_ALL}"
+        elif row['services']:
+            line += f"  [{', '.join(row['services'])}]"
+        return line
+    
+    def generate_diff_entry(self, change):
+        """Generate one line (or block) describing a snapshot change"""
+        if self.output_format == 'ndjson':
+            return self._encode_compact(change)
+        
+        status = change['status']
+        if status == 'added':
+            return f"{Fore.GREEN}+ {change['url']}{Style.RESET_ALL} (new, score {change['score']['new']})"
+        if status == 'removed':
+            return f"{Fore.RED}- {change['url']}{Style.RESET_ALL} (no longer scanned)"
+        
+        lines = [f"{Fore.CYAN}{Style.BRIGHT}~ {change['url']}{Style.RESET_ALL}"]
+        
+        score = change.get('score')
+        if score:
+            delta = score['delta']
+            color = Fore.RED if delta is not None and delta < 0 else Fore.GREEN
+            delta_text = f" ({delta:+d})" if delta is not None else ""
+            lines.append(f"  Score: {score['old']} → {color}{score['new']}{delta_text}{Style.RESET_ALL}")
+        
+        https = change.get('https')
+        if https:
+            lines.append(f"  HTTPS: {https['old']} → {https['new']}")
+        
+        for name, states in change.get('headers', {}).items():
+            color = Fore.RED if states['new'] != 'present' else Fore.GREEN
+            lines.append(f"  {name}: {states['old']} → {color}{states['new']}{Style.RESET_ALL}")
+        
+        trackers = change.get('trackers')
+        if trackers:
+            for service in trackers['added']:
+                lines.append(f"  {Fore.RED}+ tracker: {service}{Style.RESET_ALL}")
+            for service in trackers['removed']:
+                lines.append(f"  {Fore.GREEN}- tracker: {service}{Style.RESET_ALL}")
+        
+        certificate = change.get('certificate')
+        if certificate:
+            details = ", ".join(
+                f"{key} {value['old']} → {value['new']}"
+                for key, value in certificate.items() if key != 'days_until_expiry'
+            )
+            color = Fore.YELLOW if certificate.get('expires_soon', {}).get('new') else Fore.WHITE
+            lines.append(f"  {color}Certificate: {details} "
+                         f"({certificate.get('days_until_expiry')} days left){Style.RESET_ALL}")
+        
+        return "\n".join(lines)
+    
+    def _format_percentiles(self, percentiles):
+        """Format a percentile mapping as a single line"""
+        return ", ".join(f"{name}={value}" for name, value in percentiles.items())
+    
+    def _percent(self, rate):
+        """Format a 0-1 rate as a percentage"""
+        return "n/a" if rate is None else f"{rate * 100:.1f}%"
+    
     def _wrap_text(self, text, width=70):
         """Wrap text to specified width"""
         return textwrap.fill(text, width=width, subsequent_indent="    ")
+
+
+def _json_ready(value):
+    """Convert a result into plain JSON types ahead of encoding
+
+    Datetimes become ISO strings; any other non-JSON value falls back to
+    its str(), so encoders never need a default= hook.
+    """
+    if isinstance(value, dict):
+        return {key: _json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_ready(item) for item in value]
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,244 @@
+"""
+Compact Result Objects
+Slotted, typed containers for analysis results held in memory in bulk
+"""
+
+from collections.abc import Mapping
+import sys
+
+
+# Strings up to this length are interned; header values, services, domains
+# and recommendation texts repeat across thousands of results.
+_INTERN_MAX_LENGTH = 256
+
+# Shared key tuples, one per distinct dict shape. Results have a fixed
+# schema, so a few hundred shapes cover them; past the cap, key tuples are
+# simply not shared, so odd inputs cannot grow the table without bound
+_KEY_SHAPES = {}
+_MAX_KEY_SHAPES = 4096
+
+
+class FrozenRow:
+    """Small dict stored as a shared key tuple plus a values tuple"""
+
+    __slots__ = ('keys', 'values')
+
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+
+    def to_dict(self):
+        return {key: _thaw(value) for key, value in zip(self.keys, self.values)}
+
+
+def _freeze(value):
+    """Convert a JSON-shaped value into its compact form"""
+    if isinstance(value, dict):
+        return FrozenRow(_shape(value), tuple(_freeze(item) for item in value.values()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, str) and len(value) <= _INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+def _shape(data):
+    """Return a shared tuple of the dict's keys in insertion order"""
+    keys = tuple(data)
+    shared = _KEY_SHAPES.get(keys)
+    if shared is None:
+        if len(_KEY_SHAPES) >= _MAX_KEY_SHAPES:
+            return keys
+        shared = _KEY_SHAPES[keys] = keys
+    return shared
+
+
+def _thaw(value):
+    """Convert a compact value back into its JSON shape"""
+    if isinstance(value, FrozenRow):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class _Record:
+    """Base for slotted records with lazy conversion back to dicts
+
+    Fields missing from the source dict stay unset and are omitted again by
+    to_dict(), so error-only sections keep their original shape. Keys this
+    class does not know about are kept in ``_extra``. The original key order
+    is kept (as a shared shape tuple), so to_dict() serializes exactly like
+    the source dict.
+    """
+
+    __slots__ = ('_extra', '_order')
+    _fields = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        extra = None
+        for key, value in data.items():
+            if key in cls._fields:
+                setattr(record, key, record._pack(key, value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[sys.intern(key)] = _freeze(value)
+        record._extra = extra
+        record._order = _shape(data)
+        return record
+
+    def _pack(self, key, value):
+        return _freeze(value)
+
+    def _unpack(self, key, value):
+        return _thaw(value)
+
+    def to_dict(self):
+        data = {}
+        for key in self._order:
+            if key in self._fields:
+                data[key] = self._unpack(key, getattr(self, key))
+            else:
+                data[key] = _thaw(self._extra[key])
+        return data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class HeaderResult:
+    """One evaluated security header"""
+
+    __slots__ = ('name', 'present', 'value', 'secure')
+
+    def __init__(self, name, present, value, secure):
+        self.name = sys.intern(name)
+        self.present = present
+        self.value = _freeze(value)
+        self.secure = secure
+
+    def to_dict(self):
+        return {'present': self.present, 'value': self.value, 'secure': self.secure}
+
+
+class HttpSecurityResult(_Record):
+    __slots__ = ('status_code', 'final_url', 'https_used', 'redirect_chain',
+                 'headers', 'insecure_headers', 'error')
+    _fields = __slots__
+
+    def _pack(self, key, value):
+        if key == 'headers':
+            return tuple(
+                HeaderResult(name, info.get('present', False), info.get('value'),
+                             info.get('secure', False))
+                for name, info in value.items()
+            )
+        return _freeze(value)
+
+    def _unpack(self, key, value):
+        if key == 'headers':
+            return {header.name: header.to_dict() for header in value}
+        return _thaw(value)
+
+
+class SslCertificateResult(_Record):
+    __slots__ = ('valid', 'issuer', 'subject', 'serial_number', 'version',
+                 'not_before', 'not_after', 'days_until_expiry', 'is_expired',
+                 'expires_soon', 'san', 'key', 'signature_algorithm', 'san_covers_host',
+                 'ocsp', 'chain', 'chain_issues', 'chain_source', 'chain_error', 'error')
+    _fields = __slots__
+
+
+class DnsSecurityResult(_Record):
+    __slots__ = ('caa_records', 'mx_records', 'spf_record', 'dmarc_record',
+                 'dnssec', 'dnssec_validation', 'error')
+    _fields = __slots__
+
+
+class WhoisResult(_Record):
+    __slots__ = ('registrar', 'creation_date', 'expiration_date', 'domain_age_days',
+                 'name_servers', 'status', 'privacy_protected', 'error')
+    _fields = __slots__
+
+
+class ContentAnalysisResult(_Record):
+    __slots__ = ('tracking_scripts', 'social_widgets', 'analytics_tools',
+                 'advertising_networks', 'third_party_resources', 'script_inspection', 'error')
+    _fields = __slots__
+
+
+# Analysis section name -> record class, in report order
+SECTIONS = {
+    'http_security': HttpSecurityResult,
+    'ssl_certificate': SslCertificateResult,
+    'dns_security': DnsSecurityResult,
+    'whois_info': WhoisResult,
+    'content_analysis': ContentAnalysisResult,
+}
+
+
+class ScanResult(_Record, Mapping):
+    """Compact form of a PrivacyAnalyzer.analyze() result
+
+    Behaves as a read-only mapping with the same keys as the original dict;
+    nested values are rebuilt on access, so existing ``result['analysis']``
+    and ``.get()`` lookups keep working. Use to_dict() for JSON output.
+    """
+
+    __slots__ = ('url', 'domain', 'timestamp', 'reachable', 'addresses', 'analysis', 'mode',
+                 'privacy_score', 'recommendations')
+    _fields = __slots__
+
+    def _pack(self, key, value):
+        if key == 'url' or key == 'timestamp':
+            return value
+        if key == 'analysis':
+            sections = []
+            for name, section in value.items():
+                record_class = SECTIONS.get(name)
+                if record_class is None:
+                    section = _freeze(section)
+                else:
+                    section = record_class.from_dict(section)
+                sections.append((sys.intern(name), section))
+            return tuple(sections)
+        return _freeze(value)
+
+    def _unpack(self, key, value):
+        if key == 'analysis':
+            return {
+                name: section.to_dict() if isinstance(section, _Record) else _thaw(section)
+                for name, section in value
+            }
+        return _thaw(value)
+
+    # Mapping interface: lazy, per-key conversion to the dict shape
+    def __getitem__(self, key):
+        if key not in self._fields:
+            if self._extra and key in self._extra:
+                return _thaw(self._extra[key])
+            raise KeyError(key)
+        try:
+            value = getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+        return self._unpack(key, value)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __repr__(self):
+        return f"ScanResult(url={getattr(self, 'url', None)!r})"
+
+
+def to_plain(result):
+    """Return the dict form of a result, whether compact or already a dict"""
+    if isinstance(result, _Record):
+        return result.to_dict()
+    return result
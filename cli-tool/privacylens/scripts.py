@@ -0,0 +1,194 @@
+"""
+Script Inspection
+Fetch third-party scripts and look for browser fingerprinting techniques,
+caching classifications by URL and content hash across a batch
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import re
+import threading
+import time
+
+
+# Technique name -> patterns; a script using several techniques is likely fingerprinting
+FINGERPRINTING_PATTERNS = {
+    'canvas': (r'\btoDataURL\s*\(', r'\bgetImageData\s*\(', r'\bmeasureText\s*\('),
+    'webgl': (r'WEBGL_debug_renderer_info', r'UNMASKED_(?:RENDERER|VENDOR)_WEBGL'),
+    'audio': (r'\bOfflineAudioContext\b', r'\bcreateDynamicsCompressor\s*\('),
+    'fonts': (r'\bfonts\.check\s*\(', r'\bqueryLocalFonts\s*\('),
+    'hardware': (r'\bhardwareConcurrency\b', r'\bdeviceMemory\b', r'\bgetBattery\s*\('),
+    'navigator': (r'\bnavigator\.plugins\b', r'\bnavigator\.mimeTypes\b', r'\bmaxTouchPoints\b'),
+    'screen': (r'\bscreen\.(?:colorDepth|pixelDepth|availWidth|availHeight)\b', r'\bdevicePixelRatio\b'),
+    'webrtc': (r'\bRTCPeerConnection\b', r'\bonicecandidate\b'),
+    'timezone': (r'\bresolvedOptions\s*\(\s*\)\s*\.\s*timeZone\b', r'\bgetTimezoneOffset\s*\('),
+}
+_COMPILED = {
+    technique: re.compile('|'.join(patterns).encode())
+    for technique, patterns in FINGERPRINTING_PATTERNS.items()
+}
+
+# Number of distinct techniques at which a script is reported as fingerprinting
+FINGERPRINTING_THRESHOLD = 3
+
+
+def classify_script_body(body):
+    """Return the fingerprinting techniques found in a script's source"""
+    techniques = [technique for technique, pattern in _COMPILED.items() if pattern.search(body)]
+    return {
+        'techniques': techniques,
+        'fingerprinting': len(techniques) >= FINGERPRINTING_THRESHOLD,
+    }
+
+
+class ScriptInspector:
+    """Fetch and classify scripts, once per unique script per TTL
+
+    Two caches are kept for the lifetime of the inspector (normally one per
+    batch): URL -> validators and content hash, and content hash ->
+    classification. A URL checked within ``ttl`` is not requested again;
+    after that it is revalidated with If-None-Match / If-Modified-Since, and
+    a 304 or an unchanged hash reuses the stored classification. The same
+    script served under different URLs is therefore analyzed once.
+    """
+
+    def __init__(self, fetch, ttl=3600, max_workers=8, max_bytes=2 * 1024 * 1024,
+                 max_entries=20000):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._urls = OrderedDict()
+        self._hashes = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'fetched': 0, 'not_modified': 0, 'cached': 0, 'duplicate_content': 0, 'errors': 0}
+
+    def inspect(self, urls):
+        """Classify the given script URLs concurrently; return one entry per unique URL"""
+        unique = list(dict.fromkeys(urls))
+        if not unique:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique)),
+                                thread_name_prefix='privacylens-scripts') as pool:
+            return list(pool.map(self._inspect_one, unique))
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, unique_scripts=len(self._hashes))
+
+    def _inspect_one(self, url):
+        # Pages fetched in parallel often embed the same script; only one
+        # thread fetches it, the others wait and read the cache
+        while True:
+            with self._lock:
+                entry = self._urls.get(url)
+                if entry and time.monotonic() - entry['checked'] < self.ttl:
+                    if 'error' in entry:
+                        # Failed fetches are not retried within the TTL either
+                        self.stats['cached'] += 1
+                        return {'url': url, 'error': entry['error'], 'source': 'cached'}
+                    classification = self._hashes.get(entry['hash'])
+                    if classification is not None:
+                        self._urls.move_to_end(url)
+                        self._hashes.move_to_end(entry['hash'])
+                        self.stats['cached'] += 1
+                        return self._entry(url, entry, classification, 'cached')
+                event = self._inflight.get(url)
+                if event is None:
+                    event = self._inflight[url] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            return self._fetch_and_classify(url, entry)
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            event.set()
+
+    def _fetch_and_classify(self, url, entry):
+        headers = {}
+        with self._lock:
+            known = entry is not None and entry.get('hash') in self._hashes
+        if known:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = self.fetch(url, headers)
+            try:
+                if response.status_code == 304 and known:
+                    with self._lock:
+                        classification = self._hashes.get(entry['hash'])
+                        if classification is not None:
+                            entry['checked'] = time.monotonic()
+                            self.stats['not_modified'] += 1
+                    if classification is not None:
+                        return self._entry(url, entry, classification, 'not-modified')
+                    # The classification was evicted while revalidating; a
+                    # 304 has no body, so fetch the script unconditionally
+                    response.close()
+                    response = self.fetch(url, {})
+                if response.status_code != 200:
+                    raise ValueError(f'HTTP {response.status_code}')
+                body = self._read(response)
+            finally:
+                response.close()
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+                self._urls[url] = {'error': str(e), 'checked': time.monotonic()}
+            return {'url': url, 'error': str(e), 'source': 'fetched'}
+
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {
+            'hash': digest,
+            'size': len(body),
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'checked': time.monotonic(),
+        }
+        with self._lock:
+            classification = self._hashes.get(digest)
+            self.stats['fetched'] += 1
+            if classification is not None:
+                self.stats['duplicate_content'] += 1
+        source = 'duplicate-content' if classification is not None else 'fetched'
+        if classification is None:
+            classification = classify_script_body(body)
+
+        with self._lock:
+            self._hashes[digest] = classification
+            self._hashes.move_to_end(digest)
+            self._urls[url] = entry
+            self._urls.move_to_end(url)
+            for cache in (self._urls, self._hashes):
+                while len(cache) > self.max_entries:
+                    cache.popitem(last=False)
+        return self._entry(url, entry, classification, source)
+
+    def _read(self, response):
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ValueError(f'script larger than {self.max_bytes} bytes')
+        return b''.join(chunks)
+
+    @staticmethod
+    def _entry(url, entry, classification, source):
+        return {
+            'url': url,
+            'sha256': entry['hash'],
+            'size': entry['size'],
+            'techniques': classification['techniques'],
+            'fingerprinting': classification['fingerprinting'],
+            'source': source,
+        }
@@ -2,7 +2,9 @@
 Utility functions for PrivacyLens CLI
 """
 
+import json
 import re
+import sys
 from urllib.parse import urlparse
 
 
@@ -82,3 +84,47 @@ def get_score_color_code(score):
 def reset_color():
     """Get ANSI reset color code"""
     return '\033[0m'
+
+
+def iter_results(path, chunk_size=65536):
+    """Stream result objects from a JSON array or NDJSON file ('-' for stdin)
+
+    Objects are decoded one at a time from a sliding buffer, so memory use
+    is bounded by the largest single result rather than the whole file.
+    """
+    decoder = json.JSONDecoder()
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        buffer = ''
+        pos = 0
+        eof = False
+        while True:
+            # Skip separators between objects: whitespace, array brackets and commas
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    return
+                buffer = stream.read(chunk_size)
+                pos = 0
+                eof = not buffer
+                continue
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Object is split across chunks; pull in more data and retry
+                more = stream.read(chunk_size)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            yield obj
+            pos = end
+            if pos > chunk_size:
+                buffer = buffer[pos:]
+                pos = 0
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
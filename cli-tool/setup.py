@@ -42,6 +42,10 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        # Vectorized fleet statistics; percentile(method=...) needs numpy 1.22
+        "fast": ["numpy>=1.22"],
+    },
     entry_points={
         "console_scripts": [
             "privacylens=privacylens.__main__:cli",
@@ -0,0 +1,82 @@
+import pytest
+
+from privacylens import aggregate
+from privacylens.aggregate import MISSING, FleetAggregator
+
+
+@pytest.fixture(params=['numpy', 'pure-python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if aggregate.np is None:
+            pytest.skip('numpy not installed')
+    else:
+        monkeypatch.setattr(aggregate, 'np', None)
+    return request.param
+
+
+def _result(score, days):
+    return {
+        'privacy_score': score,
+        'analysis': {
+            'http_security': {'status_code': 200, 'https_used': True,
+                              'headers': {'HSTS': {'present': True}}},
+            'ssl_certificate': {'days_until_expiry': days},
+        },
+    }
+
+
+def test_expired_yesterday_is_not_missing(backend):
+    aggregator = FleetAggregator()
+    # 25 certificates expired exactly one day ago, 100 expired in total
+    for i in range(1000):
+        days = -1 if i < 25 else -5 if i < 100 else 60
+        aggregator.add(_result(80, days))
+
+    certificates = aggregator.summary()['certificates']
+    assert certificates['known'] == 1000
+    assert certificates['expired'] == 100
+    assert certificates['expiring_within_30_days'] == 100
+
+
+def test_missing_values_are_skipped(backend):
+    aggregator = FleetAggregator()
+    aggregator.add(_result(None, None))
+    aggregator.add(_result(90, 'soon'))
+    aggregator.add(_result(70, 10))
+
+    summary = aggregator.summary()
+    assert summary['rows'] == 3
+    assert summary['score']['mean'] == 80
+    assert summary['certificates']['known'] == 1
+    assert summary['certificates']['percentiles']['p50'] == 10
+
+
+def test_failed_scans_do_not_dilute_presence_rates(backend):
+    aggregator = FleetAggregator()
+    aggregator.add(_result(80, 30))
+    aggregator.add(_result(60, 30))
+    aggregator.add({'privacy_score': None, 'analysis': {
+        'http_security': {'status': 'unreachable', 'error': 'Host unreachable'}}})
+    aggregator.add({'url': 'https://broken.test/', 'error': 'boom'})
+
+    summary = aggregator.summary()
+    assert (summary['rows'], summary['failed']) == (4, 2)
+    assert summary['https_rate'] == 1.0
+    assert summary['header_presence']['HSTS'] == 1.0
+    assert summary['header_presence']['CSP'] == 0.0
+
+
+def test_percentiles_are_nearest_rank(backend):
+    aggregator = FleetAggregator()
+    for score in range(1, 101):
+        aggregator.add(_result(score, 30))
+
+    percentiles = aggregator.summary()['score']['percentiles']
+    assert percentiles == {'p10': 10, 'p25': 25, 'p50': 50, 'p75': 75, 'p90': 90, 'p99': 99}
+
+
+def test_sentinel_is_outside_int32_values():
+    assert MISSING == -2 ** 31
+    assert aggregate._int_or_missing(2 ** 31) == MISSING
+    assert aggregate._int_or_missing(True) == MISSING
+    assert aggregate._int_or_missing(-1) == -1
@@ -0,0 +1,172 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from privacylens.analyzer import PrivacyAnalyzer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/elsewhere':
+            # Redirect to a host that refuses connections
+            self.send_response(302)
+            self.send_header('Location', f'http://localhost:{self.server.closed_port}/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html><head><title>ok</title></head><body></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Frame-Options', 'DENY')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+
+def _closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture
+def server():
+    httpd = _CountingServer(('127.0.0.1', 0), _Handler)
+    httpd.closed_port = _closed_port()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_healthy_host_costs_one_connection(server):
+    analyzer = PrivacyAnalyzer(timeout=5, headers_only=True)
+    result = analyzer.analyze(f'http://127.0.0.1:{server.server_address[1]}/')
+
+    assert result['reachable'] is True
+    assert result['analysis']['http_security']['status_code'] == 200
+    assert isinstance(result['privacy_score'], int)
+    assert server.connections == 1
+
+
+def test_unreachable_host_is_not_scored():
+    analyzer = PrivacyAnalyzer(timeout=5, headers_only=True)
+    result = analyzer.analyze(f'http://127.0.0.1:{_closed_port()}/')
+
+    assert result['reachable'] is False
+    assert result['analysis']['http_security']['status'] == 'unreachable'
+    assert result['privacy_score'] is None
+    assert result['recommendations'] == []
+
+
+def test_circuit_opens_after_repeated_failures():
+    analyzer = PrivacyAnalyzer(timeout=5, headers_only=True)
+    url = f'http://127.0.0.1:{_closed_port()}/'
+    analyzer.analyze(url)
+    analyzer.analyze(url)
+
+    result = analyzer.analyze(url)
+    assert 'circuit open' in result['analysis']['http_security']['error']
+
+
+def test_failed_redirect_hop_does_not_mark_host_unreachable(server):
+    analyzer = PrivacyAnalyzer(timeout=5, headers_only=True)
+    result = analyzer.analyze(f'http://127.0.0.1:{server.server_address[1]}/elsewhere')
+
+    assert result['reachable'] is True
+    assert 'error' in result['analysis']['http_security']
+    assert isinstance(result['privacy_score'], int)
+
+
+def test_no_fail_fast_scores_unreachable_hosts():
+    analyzer = PrivacyAnalyzer(timeout=5, headers_only=True, fail_fast=False)
+    result = analyzer.analyze(f'http://127.0.0.1:{_closed_port()}/')
+
+    assert result['reachable'] is True
+    assert 'error' in result['analysis']['http_security']
+    assert isinstance(result['privacy_score'], int)
+
+
+class _Hop:
+    def __init__(self, url, status_code):
+        self.url = url
+        self.status_code = status_code
+
+
+class _StreamedResponse:
+    """Response whose body must never be touched"""
+
+    def __init__(self, url, history):
+        self.url = url
+        self.status_code = 200
+        self.history = history
+        self.headers = CaseInsensitiveDict({'Content-Type': 'text/html', 'X-Frame-Options': 'DENY'})
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def content(self):
+        raise AssertionError('body read in header-only mode')
+
+    text = content
+
+    def iter_content(self, *args, **kwargs):
+        raise AssertionError('body read in header-only mode')
+
+
+class _Session:
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.response
+
+
+def test_headers_only_never_reads_the_body(monkeypatch):
+    analyzer = PrivacyAnalyzer(timeout=5, headers_only=True)
+    response = _StreamedResponse('https://www.example.test/home', [
+        _Hop('http://example.test/', 301),
+        _Hop('https://example.test/', 302),
+    ])
+    analyzer.session = _Session(response)
+    monkeypatch.setattr(analyzer.addresses, 'repin', lambda host: None)
+    for probe in ('_analyze_ssl_certificate', '_analyze_dns_security', '_analyze_whois', '_analyze_content'):
+        monkeypatch.setattr(analyzer, probe, lambda *args, name=probe: pytest.fail(f'{name} ran in header-only mode'))
+
+    result = analyzer.analyze('http://example.test/')
+
+    assert analyzer.session.calls[0][1]['stream'] is True
+    assert response.closed
+    http_security = result['analysis']['http_security']
+    assert http_security['final_url'] == 'https://www.example.test/home'
+    assert http_security['https_used'] is True
+    assert http_security['redirect_chain'] == [
+        {'url': 'http://example.test/', 'status_code': 301},
+        {'url': 'https://example.test/', 'status_code': 302},
+    ]
+    assert result['mode'] == 'headers-only'
+    assert set(result['analysis']) == {'http_security'}
+    assert isinstance(result['privacy_score'], int)
@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+
+import dns.resolver
+import pytest
+
+from privacylens import archive
+from privacylens.archive import analyze_record, iter_archive
+
+PAGE = ('<html><head><script src="https://www.google-analytics.com/analytics.js"></script>'
+        '</head><body>café</body></html>')
+
+
+def _entry(url, text=PAGE, headers=()):
+    return {
+        'startedDateTime': '2026-01-01T00:00:00Z',
+        'request': {'url': url},
+        'response': {
+            'status': 200,
+            'headers': [{'name': 'Content-Type', 'value': 'text/html'},
+                        {'name': 'X-Frame-Options', 'value': 'DENY'},
+                        *({'name': name, 'value': value} for name, value in headers)],
+            'content': {'mimeType': 'text/html', 'text': text},
+        },
+    }
+
+
+def _har(tmp_path, entries):
+    path = tmp_path / 'session.har'
+    path.write_text(json.dumps({'log': {'version': '1.2', 'entries': entries}}), encoding='utf-8')
+    return str(path)
+
+
+def test_records_span_reads(tmp_path, monkeypatch):
+    # Tiny reads split every value (and the UTF-8 'é') across buffer edges
+    monkeypatch.setattr(archive, '_READ_SIZE', 7)
+    path = _har(tmp_path, [_entry(f'https://site{index}.example/') for index in range(5)])
+
+    records = list(iter_archive(path))
+    assert [record['url'] for record in records] == [f'https://site{index}.example/' for index in range(5)]
+    assert 'café'.encode() in records[0]['body']
+
+
+def test_malformed_record_fails_without_reading_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, '_READ_SIZE', 64)
+    good = json.dumps(_entry('https://a.example/'))
+    tail = ', '.join(json.dumps(_entry(f'https://b{index}.example/')) for index in range(2000))
+    text = '{"log": {"entries": [' + good + ', {"request": {"url": oops}}, ' + tail + ']}}'
+
+    stream = io.BytesIO(text.encode('utf-8'))
+    entries = archive._iter_har_entries(stream)
+    assert next(entries)['request']['url'] == 'https://a.example/'
+    with pytest.raises(ValueError, match='Malformed HAR file'):
+        next(entries)
+    assert stream.tell() < len(text) // 10
+
+
+def test_record_analysis_needs_no_resolver(tmp_path, monkeypatch):
+    def unconfigured(*args, **kwargs):
+        raise dns.resolver.NoResolverConfiguration('no resolv.conf')
+
+    monkeypatch.setattr(dns.resolver, 'Resolver', unconfigured)
+    record = next(iter_archive(_har(tmp_path, [_entry('https://a.example/')])))
+    result = analyze_record(record)
+
+    assert result['analysis']['http_security']['headers']['X-Frame-Options']['secure'] is True
+    assert result['analysis']['content_analysis']['analytics_tools'][0]['service'] == 'Google Analytics'
+    assert isinstance(result['privacy_score'], int)
+
+
+def test_har_body_is_not_decoded_twice(tmp_path):
+    # Browsers store the decoded body but keep the response's encoding headers
+    entry = _entry('https://a.example/', headers=[('Content-Encoding', 'gzip'),
+                                                  ('Transfer-Encoding', 'chunked')])
+    record = next(iter_archive(_har(tmp_path, [entry])))
+    content = analyze_record(record)['analysis']['content_analysis']
+
+    assert 'error' not in content
+    assert content['analytics_tools'][0]['service'] == 'Google Analytics'
+
+
+def test_warc_payload_is_decoded(tmp_path):
+    payload = gzip.compress(PAGE.encode('utf-8'))
+    http = (b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Encoding: gzip\r\n'
+            b'Content-Length: ' + str(len(payload)).encode() + b'\r\n\r\n' + payload)
+    warc = (b'WARC/1.0\r\nWARC-Type: response\r\nWARC-Target-URI: https://a.example/\r\n'
+            b'Content-Type: application/http; msgtype=response\r\n'
+            b'Content-Length: ' + str(len(http)).encode() + b'\r\n\r\n' + http + b'\r\n\r\n')
+    path = tmp_path / 'capture.warc'
+    path.write_bytes(warc)
+
+    content = analyze_record(next(iter_archive(str(path))))['analysis']['content_analysis']
+    assert content['analytics_tools'][0]['service'] == 'Google Analytics'
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from privacylens import analyzer as analyzer_module
+from privacylens.analyzer import PrivacyAnalyzer
+from privacylens.certificates import CertificateCache, analyze_chain
+from privacylens.evaluation import ResponseEvaluator
+
+
+def _certificate(name):
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(subject).issuer_name(subject)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=90))
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(name)]), critical=False)
+            .sign(key, hashes.SHA256()))
+    return cert.public_bytes(serialization.Encoding.DER)
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_summary_uses_public_signature_algorithm_name():
+    summary = CertificateCache().parse(_certificate('example.test'))
+    assert summary['signature_algorithm'] == 'ecdsa-with-sha256'
+    assert summary['signature_hash'] == 'sha256'
+
+
+def test_host_mismatch_is_not_a_chain_issue():
+    chain = [CertificateCache().parse(_certificate('example.test'))]
+    analysis = analyze_chain(chain, 'other.test')
+    assert analysis['san_covers_host'] is False
+    assert analysis['chain_issues'] == []
+
+
+def test_chain_issues_do_not_change_the_score():
+    ssl_cert = {'valid': True, 'is_expired': False, 'expires_soon': False}
+    evaluator = ResponseEvaluator()
+    clean = evaluator._calculate_privacy_score({'ssl_certificate': ssl_cert})
+    flagged = evaluator._calculate_privacy_score(
+        {'ssl_certificate': dict(ssl_cert, chain_issues=['Leaf uses a weak RSA key (1024 bits)'])})
+    assert flagged == clean
+
+
+def test_parsed_certificates_are_evicted_least_recently_used():
+    cache = CertificateCache(max_entries=2)
+    first, second, third = (_certificate(f'{name}.test') for name in ('a', 'b', 'c'))
+    cache.parse(first)
+    cache.parse(second)
+    cache.parse(first)  # Now the most recently used
+    cache.parse(third)
+
+    cache.parse(first)
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.parse(second)
+    assert cache.misses == 4
+
+
+def test_issuer_downloads_are_bounded():
+    cache = CertificateCache(max_entries=2)
+    der = _certificate('issuer.test')
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return _Response(der)
+
+    for url in ('http://a.test/ca', 'http://b.test/ca', 'http://a.test/ca', 'http://c.test/ca'):
+        assert cache.issuer(url, fetch) == der
+    assert len(cache._issuers) == 2
+    assert list(cache._issuers) == ['http://a.test/ca', 'http://c.test/ca']
+    assert fetched == ['http://a.test/ca', 'http://b.test/ca', 'http://c.test/ca']
+
+
+@pytest.mark.parametrize('enabled, handshakes', [(False, 0), (True, 1)])
+def test_ocsp_stapling_is_opt_in(monkeypatch, enabled, handshakes):
+    calls = []
+    monkeypatch.setattr(analyzer_module, 'STAPLING_SUPPORTED', True)
+    monkeypatch.setattr(analyzer_module, 'fetch_stapled_ocsp',
+                        lambda sock, hostname, timeout: calls.append(hostname) or b'')
+    analyzer = PrivacyAnalyzer(timeout=5, ocsp_stapling=enabled)
+    monkeypatch.setattr(analyzer.addresses, 'connect', lambda host, port, timeout: None)
+
+    stapled = analyzer._stapled_ocsp('example.test')
+    assert len(calls) == handshakes
+    assert stapled == (b'' if enabled else None)
+
+
+def test_aia_downloads_have_their_own_probe(monkeypatch):
+    analyzer = PrivacyAnalyzer(timeout=5)
+    probes = []
+    monkeypatch.setattr(analyzer, '_timed', lambda probe, call: probes.append(probe))
+    analyzer._fetch_issuer('http://ca.test/issuer.crt')
+    assert probes == ['aia']
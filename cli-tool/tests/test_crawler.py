@@ -0,0 +1,94 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from privacylens.analyzer import PrivacyAnalyzer
+from privacylens.crawler import SiteCrawler
+
+PAGES = {
+    '/': '<a href="/a">a</a> <a href="/private/x">x</a> <a href="/broken">b</a>',
+    '/a': '<script src="https://www.google-analytics.com/analytics.js"></script><a href="/">home</a>',
+    '/private/x': '<p>hidden</p>',
+    '/broken': '<title>broken</title>',
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits[self.path] += 1
+        if self.path == '/robots.txt':
+            body, content_type = b'User-agent: *\nDisallow: /private/\n', 'text/plain'
+        elif self.path in PAGES:
+            body, content_type = f'<html><body>{PAGES[self.path]}</body></html>'.encode(), 'text/html'
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.hits = Counter()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = PrivacyAnalyzer(timeout=5)
+    # Domain-level probes that need the internet are not under test here
+    monkeypatch.setattr(analyzer, '_analyze_ssl_certificate', lambda domain: {})
+    monkeypatch.setattr(analyzer, '_analyze_dns_security', lambda domain: {})
+    monkeypatch.setattr(analyzer, '_analyze_whois', lambda domain: {})
+
+    classify = analyzer._classify_content
+
+    def fragile(soup):
+        if soup.title and soup.title.string == 'broken':
+            raise ValueError('unparseable')
+        return classify(soup)
+
+    monkeypatch.setattr(analyzer, '_classify_content', fragile)
+    return analyzer
+
+
+def test_crawl(site, analyzer):
+    adapters = dict(analyzer.session.adapters)
+    base = f'http://127.0.0.1:{site.server_address[1]}'
+
+    result = SiteCrawler(analyzer, max_pages=10, concurrency=2).crawl(base + '/')
+
+    pages = {page['url']: page for page in result['crawl']['pages']}
+    assert set(pages) == {base + '/', base + '/a', base + '/broken'}
+    assert 'Failed to parse page' in pages[base + '/broken']['error']
+    assert pages[base + '/a']['trackers'] >= 1
+    assert result['crawl']['robots_disallowed'] == 1
+    # The header probe's response is reused for the start page
+    assert site.hits['/'] == 1
+    assert site.hits['/private/x'] == 0
+    assert dict(analyzer.session.adapters) == adapters
+
+
+def test_crawl_can_ignore_robots(site, analyzer):
+    base = f'http://127.0.0.1:{site.server_address[1]}'
+    result = SiteCrawler(analyzer, max_pages=10, respect_robots=False).crawl(base + '/')
+
+    assert site.hits['/robots.txt'] == 0
+    assert site.hits['/private/x'] == 1
+    assert result['crawl']['robots_disallowed'] == 0
@@ -0,0 +1,79 @@
+import pytest
+from click.testing import CliRunner
+
+from privacylens.__main__ import cli
+from privacylens.dedup import BloomFilter, UrlDeduplicator, canonicalize_url
+
+
+@pytest.mark.parametrize('first, second', [
+    ('HTTPS://Example.COM/Path', 'https://example.com/Path'),
+    ('https://example.com:443/', 'https://example.com/'),
+    ('http://example.com:80/a', 'http://example.com/a'),
+    ('http://example.com/', 'https://example.com/'),
+    ('http://example.com:80/a', 'https://example.com:443/a'),
+    ('https://example.com/path/', 'https://example.com/path'),
+    ('https://example.com', 'https://example.com/'),
+    ('example.com', 'https://example.com/'),
+    ('https://example.com/#top', 'https://example.com/'),
+    ('https://example.com/?b=2&a=1&utm_source=x&gclid=1', 'https://example.com/?a=1&b=2'),
+    ('https://bücher.example/', 'https://xn--bcher-kva.example/'),
+    ('https://BÜCHER.example/', 'https://xn--bcher-kva.example/'),
+])
+def test_equivalent_urls_share_a_key(first, second):
+    assert canonicalize_url(first) == canonicalize_url(second)
+
+
+@pytest.mark.parametrize('first, second', [
+    ('http://example.com:443/', 'https://example.com/'),
+    ('https://example.com:8443/', 'https://example.com/'),
+    ('https://example.com/Path', 'https://example.com/path'),
+    ('https://example.com/a/b', 'https://example.com/a'),
+    ('https://user@example.com/', 'https://example.com/'),
+])
+def test_distinct_urls_keep_distinct_keys(first, second):
+    assert canonicalize_url(first) != canonicalize_url(second)
+
+
+@pytest.mark.parametrize('url', ['', 'not a url', 'ftp://example.com/', 'https://', 'https://bad_host!/'])
+def test_non_web_urls_have_no_key(url):
+    assert canonicalize_url(url) is None
+
+
+def test_dedupe_scans_the_first_spelling_seen(tmp_path):
+    lines = [
+        '# inventory',
+        'HTTP://Example.com:80/Shop/',
+        'http://example.com/Shop/#reviews',
+        'https://example.com/Shop/',
+        'https://example.com/Shop',
+        'bücher.example',
+        'https://xn--bcher-kva.example/',
+        '',
+        'not a url',
+    ]
+    with UrlDeduplicator(capacity=100, temp_dir=tmp_path) as deduplicator:
+        urls = list(deduplicator.dedupe(lines))
+        stats = deduplicator.stats
+
+    assert urls == ['HTTP://Example.com:80/Shop/', 'https://bücher.example']
+    assert stats == {'lines': 7, 'invalid': 1, 'unique': 2, 'duplicates': 4, 'false_positives': 0}
+
+
+def test_duplicates_are_exact_across_flushes(tmp_path):
+    with UrlDeduplicator(capacity=10, temp_dir=tmp_path, batch_size=3) as deduplicator:
+        urls = [f'https://site{i % 50}.example/' for i in range(200)]
+        assert len(list(deduplicator.dedupe(urls))) == 50
+        assert deduplicator.stats['duplicates'] == 150
+
+
+@pytest.mark.parametrize('capacity', [0, 100])
+def test_bloom_filter_reports_added_items(capacity):
+    bloom = BloomFilter(capacity=capacity)
+    assert bloom.add('https://example.com/') is False
+    assert bloom.add('https://example.com/') is True
+
+
+def test_expected_urls_must_be_positive():
+    result = CliRunner().invoke(cli, ['batch', 'https://example.com/', '--expected-urls', '0'])
+    assert result.exit_code == 2
+    assert 'expected-urls' in result.output
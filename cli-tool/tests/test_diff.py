@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from privacylens.diff import SnapshotSorter, compare, diff_snapshots, project
+from privacylens.reporter import Reporter
+
+
+def _result(url, score=80, hsts=True, trackers=(), days=90):
+    return {
+        'url': url,
+        'domain': url.split('/')[2],
+        'privacy_score': score,
+        'analysis': {
+            'http_security': {
+                'https_used': True,
+                'headers': {'HSTS': {'present': hsts, 'secure': hsts}},
+            },
+            'ssl_certificate': {'valid': True, 'not_after': 'Jun  1 12:00:00 2027 GMT',
+                                'days_until_expiry': days},
+            'content_analysis': {
+                'tracking_scripts': [{'service': name} for name in trackers],
+            },
+        },
+    }
+
+
+def _write(path, results, as_array=False):
+    with open(path, 'w', encoding='utf-8') as f:
+        if as_array:
+            json.dump(results, f)
+        else:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 1000])
+def test_diff_snapshots(tmp_path, chunk_rows):
+    old = _write(tmp_path / 'old.ndjson', [
+        _result('https://c.example/', score=70),
+        _result('https://a.example/'),
+        _result('https://gone.example/'),
+        _result('https://b.example/', trackers=['Google Analytics']),
+    ])
+    new = _write(tmp_path / 'new.json', [
+        _result('https://b.example/', trackers=['Hotjar']),
+        _result('https://a.example/'),
+        _result('https://new.example/', score=55),
+        _result('https://c.example/', score=90, hsts=False),
+    ], as_array=True)
+
+    changes = list(diff_snapshots(old, new, chunk_rows=chunk_rows, temp_dir=str(tmp_path)))
+
+    assert [(change['url'], change['status']) for change in changes] == [
+        ('https://b.example/', 'changed'),
+        ('https://c.example/', 'changed'),
+        ('https://gone.example/', 'removed'),
+        ('https://new.example/', 'added'),
+    ]
+    assert changes[0]['trackers'] == {'added': ['Hotjar'], 'removed': ['Google Analytics']}
+    assert changes[1]['score'] == {'old': 70, 'new': 90, 'delta': 20}
+    assert changes[1]['headers'] == {'HSTS': {'old': 'present', 'new': 'missing'}}
+    assert changes[3]['score'] == {'new': 55}
+
+
+def test_repeated_urls_keep_last_record(tmp_path):
+    path = _write(tmp_path / 'snapshot.ndjson', [
+        _result('https://a.example/', score=10),
+        _result('https://b.example/'),
+        _result('https://a.example/', score=20),
+    ])
+
+    records = list(SnapshotSorter(chunk_rows=1, temp_dir=str(tmp_path)).iter_sorted(path))
+    assert [(record[0], record[2]) for record in records] == [
+        ('https://a.example/', 20), ('https://b.example/', 80)]
+
+
+def test_compare_identical_and_missing_score():
+    record = project(_result('https://a.example/'))
+    assert compare(record, list(record)) is None
+
+    unscored = project(_result('https://a.example/', score=None))
+    assert compare(record, unscored)['score'] == {'old': 80, 'new': None, 'delta': None}
+
+
+def test_certificate_change_reports_days_left():
+    old = project(_result('https://a.example/', days=5))
+    new = project(dict(_result('https://a.example/', days=300)))
+    new[6]['not_after'] = 'Jun  1 12:00:00 2028 GMT'
+
+    change = compare(old, new)
+    assert change['certificate'] == {
+        'not_after': {'old': 'Jun  1 12:00:00 2027 GMT', 'new': 'Jun  1 12:00:00 2028 GMT'},
+        'days_until_expiry': 300,
+    }
+
+
+def test_diff_entry_formats():
+    change = {'url': 'https://a.example/', 'domain': 'a.example', 'status': 'added', 'score': {'new': 50}}
+
+    assert json.loads(Reporter(output_format='ndjson').generate_diff_entry(change)) == change
+    assert 'https://a.example/' in Reporter(output_format='text').generate_diff_entry(change)
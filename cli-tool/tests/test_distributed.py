@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from click.testing import CliRunner
+
+from privacylens.__main__ import cli
+from privacylens.distributed import CoordinatorServer, JobQueue, LeaseLost, Worker
+
+
+class _StubAnalyzer:
+    """Stands in for PrivacyAnalyzer; fails a URL's first attempt when asked to"""
+
+    def __init__(self, delay=0.0, flaky=(), slow=None):
+        self.delay = delay
+        self.flaky = set(flaky)
+        self.slow = slow or {}
+        self.lock = threading.Lock()
+
+    def analyze(self, url):
+        time.sleep(self.slow.get(url, self.delay))
+        with self.lock:
+            if url in self.flaky:
+                self.flaky.discard(url)
+                raise RuntimeError('transient failure')
+        return {'url': url, 'privacy_score': 80, 'timestamp': datetime(2026, 1, 1, tzinfo=timezone.utc)}
+
+
+@pytest.fixture
+def coordinator(tmp_path, request):
+    queue = JobQueue(str(tmp_path / 'queue.db'), lease_seconds=1, max_attempts=3)
+    server = CoordinatorServer(('127.0.0.1', 0), queue, token=getattr(request, 'param', None))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield queue, f'127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+    queue.close()
+
+
+def _run_workers(address, analyzer, count, batch_size=2):
+    workers = [Worker(address, analyzer, batch_size=batch_size, worker_id=f'w{index}', poll_interval=0.05)
+               for index in range(count)]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return workers
+
+
+def test_workers_drain_the_queue(coordinator):
+    queue, address = coordinator
+    urls = [f'https://site{index}.example/' for index in range(30)]
+    queue.enqueue(urls)
+
+    workers = _run_workers(address, _StubAnalyzer(delay=0.01, flaky=urls[:3]), count=4)
+
+    stats = queue.stats()
+    assert stats['done'] == 30 and stats['finished']
+    assert sum(worker.completed for worker in workers) == 30
+    assert sum(worker.failed for worker in workers) == 3
+    results = [json.loads(line) for line in queue.iter_results(page_size=7)]
+    assert [result['url'] for result in results] == urls
+    assert results[0]['timestamp'] == '2026-01-01T00:00:00+00:00'
+
+    streamed = requests.get(f'http://{address}/results', timeout=5).text.splitlines()
+    assert len(streamed) == 30
+
+
+def test_slow_scan_keeps_its_lease(coordinator):
+    queue, address = coordinator
+    queue.enqueue(['https://slow.example/', 'https://fast.example/'])
+
+    # The slow scan outlasts the one-second lease several times over
+    analyzer = _StubAnalyzer(slow={'https://slow.example/': 2.5})
+    _run_workers(address, analyzer, count=2, batch_size=1)
+
+    attempts = dict(queue._db.execute('SELECT url, attempts FROM jobs'))
+    assert attempts == {'https://slow.example/': 1, 'https://fast.example/': 1}
+
+
+def test_complete_requires_the_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.db'))
+    queue.enqueue(['https://a.example/'])
+    job = queue.lease('w1')[0]
+
+    assert queue.complete('w2', job['id'], '{}') is False
+    assert queue.complete('w1', job['id'], '{}') is True
+    assert queue.complete('w1', job['id'], '{}') is False
+    queue.close()
+
+
+class _ReleasingAnalyzer:
+    """Hands the job's lease to another worker mid-scan, as an expiry and re-lease would"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def analyze(self, url):
+        with self.queue._lock:
+            self.queue._db.execute("UPDATE jobs SET worker = 'other' WHERE url = ?", (url,))
+        return {'url': url, 'privacy_score': 80}
+
+
+def test_refused_result_counts_as_lost(coordinator):
+    queue, address = coordinator
+    queue.enqueue(['https://a.example/'])
+    worker = Worker(address, _ReleasingAnalyzer(queue), worker_id='w1')
+    job = worker._post('/lease', {'count': 1})['jobs'][0]
+    outcomes = []
+    worker._process(job, lambda *args: outcomes.append(args))
+
+    assert (worker.completed, worker.lost) == (0, 1)
+    _, result, error = outcomes[0]
+    assert result is None and isinstance(error, LeaseLost)
+    assert queue.stats()['done'] == 0
+
+
+def test_bare_hosts_are_queued_with_a_scheme(coordinator):
+    queue, address = coordinator
+    reply = requests.post(f'http://{address}/enqueue', timeout=5,
+                          json={'urls': ['example.com', ' https://b.example/ ', '']}).json()
+    assert reply == {'added': 2, 'invalid': ['']}
+    assert [job['url'] for job in queue.lease('w1', 5)] == ['https://example.com', 'https://b.example/']
+
+
+@pytest.mark.parametrize('coordinator', ['secret'], indirect=True)
+def test_token_is_required_when_configured(coordinator):
+    queue, address = coordinator
+    queue.enqueue(['https://a.example/'])
+    assert requests.get(f'http://{address}/status', timeout=5).status_code == 401
+    assert requests.post(f'http://{address}/lease', json={}, timeout=5,
+                         headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    worker = Worker(address, _StubAnalyzer(), token='secret', poll_interval=0.05)
+    worker.run()
+    assert worker.completed == 1
+
+
+def test_public_listen_address_needs_a_token(tmp_path):
+    result = CliRunner().invoke(cli, ['coordinator', '--db', str(tmp_path / 'q.db'), '--host', '0.0.0.0'],
+                                env={'PRIVACYLENS_TOKEN': None})
+    assert result.exit_code == 2
+    assert 'requires --token' in result.output
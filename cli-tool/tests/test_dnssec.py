@@ -0,0 +1,191 @@
+import time
+
+import dns.dnssec
+import dns.flags
+import dns.message
+import dns.name
+import dns.rdatatype
+import dns.rrset
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from privacylens.dnssec import BOGUS, INDETERMINATE, INSECURE, SECURE, DNSSECValidator
+
+FULL_RANGE = ('0' * 32, 'V' * 32)
+
+
+class _Zone:
+    """In-memory zone; signed zones sign every answer on the fly"""
+
+    def __init__(self, origin, signed=True):
+        self.origin = dns.name.from_text(origin)
+        self.rrsets = {}
+        self.denials = {}
+        self.forged = set()
+        self.key = ec.generate_private_key(ec.SECP256R1()) if signed else None
+        if signed:
+            self.dnskey = dns.dnssec.make_dnskey(self.key.public_key(), dns.dnssec.Algorithm.ECDSAP256SHA256,
+                                                 flags=257)
+            self.rrsets[(self.origin, dns.rdatatype.DNSKEY)] = dns.rrset.from_rdata(self.origin, 300, self.dnskey)
+        self.add(origin, 'SOA', 'ns.invalid. host.invalid. 1 3600 600 86400 300')
+
+    def add(self, name, rdtype, *texts):
+        rrset = dns.rrset.from_text(name, 300, 'IN', rdtype, *texts)
+        self.rrsets[(rrset.name, rrset.rdtype)] = rrset
+
+    def deny(self, name, rdtype, owner, nsec_type, text):
+        """Attach a signed NSEC/NSEC3 record to the NODATA answer for name/rdtype"""
+        denial = dns.rrset.from_text(owner, 300, 'IN', nsec_type, text)
+        self.denials.setdefault((dns.name.from_text(name), dns.rdatatype.from_text(rdtype)), []).append(denial)
+
+    def signature(self, rrset):
+        key = self.key
+        if (rrset.name, rrset.rdtype) in self.forged:
+            # Signed by a stray key under this zone's key tag: fails validation
+            key = ec.generate_private_key(ec.SECP256R1())
+        rrsig = dns.dnssec.sign(rrset, key, self.origin, self.dnskey, lifetime=3600)
+        return dns.rrset.from_rdata(rrset.name, rrset.ttl, rrsig)
+
+
+class _Tree:
+    """Signed root, ``test.`` and child zones answering DO+CD queries"""
+
+    def __init__(self):
+        self.zones = {}
+        self.root = self.zone('.')
+        self.tld = self.zone('test.', parent=self.root)
+        self.queries = 0
+
+    def zone(self, origin, parent=None, signed=True):
+        zone = _Zone(origin, signed)
+        self.zones[zone.origin] = zone
+        if parent is not None:
+            parent.add(origin, 'NS', 'ns.invalid.')
+            if signed:
+                ds = dns.dnssec.make_ds(zone.origin, zone.dnskey, 'SHA256')
+                parent.rrsets[(zone.origin, dns.rdatatype.DS)] = dns.rrset.from_rdata(zone.origin, 300, ds)
+        return zone
+
+    def trust_anchors(self):
+        return [dns.dnssec.make_ds(dns.name.root, self.root.dnskey, 'SHA256').to_text()]
+
+    def validator(self, **kwargs):
+        return DNSSECValidator(query=self.query, trust_anchors=self.trust_anchors(), **kwargs)
+
+    def query(self, name, rdtype):
+        self.queries += 1
+        zone = self._authority(name, parent_side=rdtype == dns.rdatatype.DS)
+        response = dns.message.make_response(dns.message.make_query(name, rdtype, want_dnssec=True))
+        response.use_edns(0, dns.flags.DO, 1232)
+
+        rrset = zone.rrsets.get((name, rdtype))
+        if rrset is None and rdtype != dns.rdatatype.CNAME:
+            rrset = zone.rrsets.get((name, dns.rdatatype.CNAME))
+        if rrset is not None:
+            self._append(response.answer, zone, rrset)
+        else:
+            self._append(response.authority, zone, zone.rrsets[(zone.origin, dns.rdatatype.SOA)])
+            for denial in zone.denials.get((name, rdtype), ()):
+                self._append(response.authority, zone, denial)
+        return response
+
+    def _authority(self, name, parent_side):
+        candidates = [origin for origin in self.zones
+                      if name.is_subdomain(origin) and not (parent_side and origin == name)]
+        return self.zones[max(candidates, key=len)]
+
+    @staticmethod
+    def _append(section, zone, rrset):
+        section.append(rrset)
+        if zone.key is not None:
+            section.append(zone.signature(rrset))
+
+
+def _nsec3(name):
+    return dns.dnssec.nsec3_hash(name, b'', 0, 1)
+
+
+@pytest.fixture
+def tree():
+    tree = _Tree()
+    secure = tree.zone('secure.test.', parent=tree.tld)
+    secure.add('www.secure.test.', 'A', '192.0.2.1')
+    return tree
+
+
+def test_secure_chain(tree):
+    result = tree.validator().validate('www.secure.test')
+    assert result == {'status': SECURE, 'chain': ['.', 'test.', 'secure.test.']}
+
+
+def test_forged_signature_is_bogus(tree):
+    tree.zones[dns.name.from_text('secure.test.')].forged.add(
+        (dns.name.from_text('www.secure.test.'), dns.rdatatype.A))
+    result = tree.validator().validate('www.secure.test')
+    assert result['status'] == BOGUS
+
+
+def test_nsec_unsigned_delegation_is_insecure(tree):
+    tree.zone('plain.test.', parent=tree.tld, signed=False)
+    tree.tld.deny('plain.test.', 'DS', 'plain.test.', 'NSEC', 'zzz.test. NS RRSIG NSEC')
+
+    result = tree.validator().validate('www.plain.test')
+    assert result['status'] == INSECURE
+    assert result['chain'] == ['.', 'test.', 'plain.test.']
+
+
+def test_nsec_with_ds_bit_is_bogus(tree):
+    tree.zone('plain.test.', parent=tree.tld, signed=False)
+    tree.tld.deny('plain.test.', 'DS', 'plain.test.', 'NSEC', 'zzz.test. NS DS RRSIG NSEC')
+    assert tree.validator().validate('www.plain.test')['status'] == BOGUS
+
+
+@pytest.mark.parametrize('types, status', [('NS', INSECURE), ('NS DS', BOGUS), ('A', BOGUS)])
+def test_nsec3_exact_match_checks_type_bits(tree, types, status):
+    tree.zone('plain.test.', parent=tree.tld, signed=False)
+    tree.tld.deny('plain.test.', 'DS', f'{_nsec3("plain.test.")}.test.', 'NSEC3', f'1 0 0 - {"V" * 32} {types}')
+    assert tree.validator().validate('www.plain.test')['status'] == status
+
+
+def test_nsec3_opt_out_with_closest_encloser_is_insecure(tree):
+    tree.zone('plain.test.', parent=tree.tld, signed=False)
+    tree.tld.deny('plain.test.', 'DS', f'{_nsec3("test.")}.test.', 'NSEC3',
+                  f'1 0 0 - {"V" * 32} NS SOA RRSIG DNSKEY NSEC3PARAM')
+    tree.tld.deny('plain.test.', 'DS', f'{FULL_RANGE[0]}.test.', 'NSEC3', f'1 1 0 - {FULL_RANGE[1]} NS')
+    assert tree.validator().validate('www.plain.test')['status'] == INSECURE
+
+
+def test_nsec3_opt_out_without_closest_encloser_is_bogus(tree):
+    tree.zone('plain.test.', parent=tree.tld, signed=False)
+    tree.tld.deny('plain.test.', 'DS', f'{FULL_RANGE[0]}.test.', 'NSEC3', f'1 1 0 - {FULL_RANGE[1]} NS')
+    assert tree.validator().validate('www.plain.test')['status'] == BOGUS
+
+
+def test_cname_target_is_validated(tree):
+    secure = tree.zones[dns.name.from_text('secure.test.')]
+    tree.zone('plain.test.', parent=tree.tld, signed=False)
+    tree.tld.deny('plain.test.', 'DS', 'plain.test.', 'NSEC', 'zzz.test. NS RRSIG NSEC')
+    secure.add('alias.secure.test.', 'CNAME', 'www.plain.test.')
+    secure.add('inner.secure.test.', 'CNAME', 'www.secure.test.')
+
+    validator = tree.validator()
+    insecure = validator.validate('alias.secure.test')
+    assert insecure['status'] == INSECURE
+    assert insecure['cname_chain'] == ['www.plain.test.']
+    assert validator.validate('inner.secure.test') == {
+        'status': SECURE, 'chain': ['.', 'test.', 'secure.test.'], 'cname_chain': ['www.secure.test.']}
+
+    secure.forged.add((dns.name.from_text('www.secure.test.'), dns.rdatatype.A))
+    assert tree.validator().validate('inner.secure.test')['status'] == BOGUS
+
+
+def test_validation_stops_at_the_time_budget(tree):
+    def slow(name, rdtype):
+        time.sleep(0.05)
+        return tree.query(name, rdtype)
+
+    validator = DNSSECValidator(query=slow, trust_anchors=tree.trust_anchors(), budget=0.12)
+    result = validator.validate('www.secure.test')
+    assert result['status'] == INDETERMINATE
+    assert 'budget' in result['reason']
+    assert tree.queries <= 4
@@ -0,0 +1,66 @@
+from privacylens.history import HistoryStore
+
+
+def _result(url, timestamp, score=80, services=(), resources=()):
+    return {
+        'url': url,
+        'domain': url.split('/')[2],
+        'timestamp': timestamp,
+        'privacy_score': score,
+        'analysis': {
+            'http_security': {'https_used': True, 'headers': {}},
+            'content_analysis': {
+                'analytics_tools': [{'service': name, 'url': f'https://{name}.example/t.js'}
+                                    for name in services],
+                'third_party_resources': [{'type': 'img', 'url': f'https://{domain}/p.gif', 'domain': domain}
+                                          for domain in resources],
+            },
+        },
+    }
+
+
+def test_services_index_holds_tracker_names_only(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.record([_result('https://a.example/', '2026-01-01T00:00:00+00:00',
+                          services=['Hotjar', 'Mixpanel'], resources=['pixel.tracker.example'])])
+
+    (row,) = store.query()
+    assert row['services'] == ['Hotjar', 'Mixpanel']
+    assert list(store.query(service='pixel.tracker.example')) == []
+    assert [row['domain'] for row in store.query(service='hotjar')] == ['a.example']
+    store.close()
+
+
+def test_query_is_a_single_statement(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.record([_result(f'https://site{index}.example/', f'2026-01-0{index + 1}T00:00:00+00:00',
+                          score=50 + index, services=['Hotjar'] if index % 2 else [])
+                  for index in range(5)])
+
+    statements = []
+    store._db.set_trace_callback(statements.append)
+    rows = list(store.query(score_above=50))
+    history = list(store.query(history=True, limit=2))
+
+    assert len(statements) == 2
+    assert [row['privacy_score'] for row in rows] == [54, 53, 52, 51]
+    assert [row['services'] for row in rows] == [[], ['Hotjar'], [], ['Hotjar']]
+    assert [row['domain'] for row in history] == ['site4.example', 'site3.example']
+    store.close()
+
+
+def test_added_reports_new_services(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.record([
+        _result('https://a.example/', '2026-01-01T00:00:00+00:00'),
+        _result('https://a.example/', '2026-02-02T00:00:00+00:00', services=['Hotjar', 'Mixpanel']),
+        _result('https://b.example/', '2026-01-01T00:00:00+00:00', services=['Hotjar']),
+        _result('https://b.example/', '2026-02-02T00:00:00+00:00', services=['Hotjar']),
+    ])
+
+    since = 1769904000  # 2026-02-01
+    (row,) = store.added('hotjar', since, until=since + 86400 * 7)
+    assert row['domain'] == 'a.example'
+    assert row['added'] == 'Hotjar'
+    assert row['services'] == ['Hotjar', 'Mixpanel']
+    store.close()
@@ -0,0 +1,238 @@
+import math
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import dns.asyncresolver
+import dns.message
+import dns.nameserver
+import dns.resolver
+import pytest
+import requests
+
+from privacylens.network import AddressPinner, HedgedResolver, LatencyTracker, PinnedHTTPAdapter, connect_racing
+
+
+def _nearest_rank(samples, rank):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+
+def test_percentiles_follow_the_sliding_window():
+    tracker = LatencyTracker(ceiling=10, min_samples=5, window=50)
+    rng = random.Random(7)
+    recorded = []
+    for _ in range(400):
+        value = round(rng.uniform(0.01, 3.0), 3)
+        tracker.record('http', value)
+        recorded.append(value)
+        window = recorded[-50:]
+        if len(window) >= 5:
+            assert tracker.percentile('http', 95) == _nearest_rank(window, 95)
+            assert tracker.percentile('http', 50) == _nearest_rank(window, 50)
+
+
+def test_timeout_uses_ceiling_until_enough_samples_and_on_timeouts():
+    tracker = LatencyTracker(ceiling=10, floor=0.5, min_samples=3, multiplier=2)
+    tracker.record('tls', 1.0)
+    assert tracker.timeout('tls') == 10
+    tracker.record('tls', 1.0)
+    tracker.record('tls', 1.5)
+    assert tracker.timeout('tls') == 3.0
+    for _ in range(3):
+        tracker.record_timeout('tls')
+    assert tracker.timeout('tls') == 10
+
+
+def test_summary_is_consistent_under_concurrent_records():
+    tracker = LatencyTracker(ceiling=10, min_samples=1, window=100)
+    stop = threading.Event()
+
+    def record():
+        while not stop.is_set():
+            tracker.record('dns', random.random())
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            stats = tracker.summary().get('dns')
+            if stats:
+                assert stats['samples'] <= 100
+                assert stats['p50'] <= stats['p95']
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def test_resolver_configuration_is_lazy(monkeypatch):
+    def unconfigured(*args, **kwargs):
+        raise dns.resolver.NoResolverConfiguration('no resolv.conf')
+
+    monkeypatch.setattr(dns.resolver, 'Resolver', unconfigured)
+    # Construction must not need a resolver configuration...
+    resolver = HedgedResolver(latency=LatencyTracker(ceiling=5))
+    # ...only resolving does
+    with pytest.raises(dns.resolver.NoResolverConfiguration):
+        resolver.resolve('example.com', 'A')
+
+
+def test_analyzer_builds_without_resolver_configuration(monkeypatch):
+    from privacylens.analyzer import PrivacyAnalyzer
+
+    def unconfigured(*args, **kwargs):
+        raise dns.resolver.NoResolverConfiguration('no resolv.conf')
+
+    monkeypatch.setattr(dns.resolver, 'Resolver', unconfigured)
+    PrivacyAnalyzer(adaptive_timeouts=True)
+
+
+class _DnsServer:
+    """UDP responder on localhost; answers A queries after ``delay`` (None: never)"""
+
+    def __init__(self, delay, address='192.0.2.1'):
+        self.delay = delay
+        self.address = address
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                data, peer = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            self.queries += 1
+            if self.delay is None:
+                continue
+            time.sleep(self.delay)
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            response.answer.append(dns.rrset.from_text(query.question[0].name, 60, 'IN', 'A', self.address))
+            self.sock.sendto(response.to_wire(), peer)
+
+    def nameserver(self):
+        return dns.nameserver.Do53Nameserver('127.0.0.1', self.port)
+
+    def close(self):
+        self.sock.close()
+
+
+def _async_resolver(server):
+    resolver = dns.asyncresolver.Resolver(configure=False)
+    resolver.nameservers = [server.nameserver()]
+    return resolver
+
+
+def test_hedged_query_wins_and_loser_is_cancelled():
+    silent = _DnsServer(delay=None)
+    fast = _DnsServer(delay=0, address='192.0.2.7')
+    try:
+        tracker = LatencyTracker(ceiling=5, min_samples=1)
+        tracker.record('dns', 0.05)
+        resolver = HedgedResolver(latency=tracker)
+        sync_primary = dns.resolver.Resolver(configure=False)
+        sync_primary.nameservers = [silent.nameserver()]
+        resolver._resolvers = (sync_primary, _async_resolver(silent), _async_resolver(fast))
+
+        threads_before = set(threading.enumerate())
+        start = time.monotonic()
+        answer = resolver.resolve('example.test.', 'A', lifetime=5)
+
+        assert time.monotonic() - start < 2
+        assert [record.address for record in answer] == ['192.0.2.7']
+        assert resolver.hedged == 1
+        assert silent.queries >= 1
+        # The race ran on its own event loop; no worker threads are left behind
+        assert set(threading.enumerate()) <= threads_before
+    finally:
+        silent.close()
+        fast.close()
+
+
+def test_repin_keeps_other_hosts_and_is_bounded(monkeypatch):
+    pinner = AddressPinner(resolver=None, max_hosts=2)
+    answers = {'a.test': '192.0.2.1', 'b.test': '192.0.2.2', 'c.test': '192.0.2.3'}
+    monkeypatch.setattr(pinner, '_lookup', lambda host: [(socket.AF_INET, answers[host])])
+
+    pinner.resolve('a.test')
+    pinner.resolve('b.test')
+    answers['a.test'] = '192.0.2.9'
+    pinner.repin('a.test')
+    assert pinner.pinned('a.test') == ['192.0.2.9']
+    assert pinner.pinned('b.test') == ['192.0.2.2']
+
+    # b.test is now the least recently used host
+    pinner.resolve('c.test')
+    assert pinner.pinned('b.test') == []
+    assert pinner.pinned('a.test') == ['192.0.2.9']
+
+
+def test_adapter_connects_through_the_pin(monkeypatch):
+    httpd = HTTPServer(('127.0.0.1', 0), _OkHandler)
+    thread = threading.Thread(target=httpd.handle_request, daemon=True)
+    thread.start()
+    try:
+        pinner = AddressPinner(resolver=None)
+        monkeypatch.setattr(pinner, '_lookup', lambda host: [(socket.AF_INET, '127.0.0.1')])
+        session = requests.Session()
+        session.trust_env = False
+        session.mount('http://', PinnedHTTPAdapter(pinner))
+
+        response = session.get(f'http://pinned.invalid:{httpd.server_address[1]}/', timeout=5)
+        assert response.status_code == 200
+        assert pinner.pinned('pinned.invalid') == ['127.0.0.1']
+    finally:
+        httpd.server_close()
+
+
+def test_connect_binds_the_source_address():
+    listener = socket.create_server(('127.0.0.1', 0))
+    source = socket.create_server(('127.0.0.1', 0))
+    source_port = source.getsockname()[1]
+    source.close()
+    try:
+        sock, winner = connect_racing([(socket.AF_INET, '127.0.0.1')], listener.getsockname()[1],
+                                      timeout=5, source_address=('127.0.0.1', source_port))
+        with sock:
+            assert winner == (socket.AF_INET, '127.0.0.1')
+            assert sock.getsockname() == ('127.0.0.1', source_port)
+    finally:
+        listener.close()
+
+
+def test_adapter_passes_the_source_address(monkeypatch):
+    pinner = AddressPinner(resolver=None)
+    calls = []
+
+    def connect(host, port, timeout=None, source_address=None):
+        calls.append(source_address)
+        raise OSError('refused')
+
+    monkeypatch.setattr(pinner, 'connect', connect)
+    session = requests.Session()
+    session.trust_env = False
+    adapter = PinnedHTTPAdapter(pinner)
+    adapter.init_poolmanager(10, 10, source_address=('127.0.0.1', 0))
+    session.mount('http://', adapter)
+    with pytest.raises(requests.ConnectionError):
+        session.get('http://pinned.invalid/', timeout=5)
+    assert calls and set(calls) == {('127.0.0.1', 0)}
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,75 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from privacylens import reporter as reporter_module
+from privacylens.reporter import Reporter
+from privacylens.results import ScanResult
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        if reporter_module.orjson is None:
+            pytest.skip('orjson not installed')
+    else:
+        monkeypatch.setattr(reporter_module, 'orjson', None)
+    return request.param
+
+
+def _result(i):
+    return {
+        'url': f'https://bücher{i}.example/',
+        'domain': f'bücher{i}.example',
+        'timestamp': datetime(2026, 1, 1, 12, 0, 0),
+        'analysis': {'http_security': {'https_used': True, 'headers': {}}},
+        'privacy_score': 90,
+        'recommendations': [],
+    }
+
+
+@pytest.mark.parametrize('output_format,compact', [('ndjson', False), ('json', True), ('json', False)])
+def test_write_results_to_text_stream(encoder, output_format, compact):
+    stream = io.StringIO()
+    Reporter(output_format=output_format, compact=compact).write_results(
+        (_result(i) for i in range(3)), stream)
+    text = stream.getvalue()
+
+    if output_format == 'ndjson':
+        decoded = [json.loads(line) for line in text.splitlines()]
+    else:
+        decoded = json.loads(text)
+    assert [item['domain'] for item in decoded] == ['bücher0.example', 'bücher1.example', 'bücher2.example']
+    assert decoded[0]['timestamp'] == '2026-01-01T12:00:00'
+    # Compact layouts write non-ASCII text as-is; pretty JSON keeps \u escapes
+    if compact or output_format == 'ndjson':
+        assert 'bücher0' in text
+    else:
+        assert 'b\\u00fccher0' in text and 'bücher0' not in text
+
+
+def test_pretty_matches_json_dumps_layout(encoder):
+    results = [_result(0), _result(1)]
+    stream = io.StringIO()
+    Reporter(output_format='json').write_results(results, stream)
+
+    expected = json.dumps(json.loads(stream.getvalue()), indent=2)
+    assert stream.getvalue() == expected + '\n'
+
+
+def test_compact_and_pretty_agree(encoder):
+    result = ScanResult.from_dict(dict(_result(0), timestamp='2026-01-01T12:00:00'))
+    compact = Reporter(output_format='json', compact=True).generate_report(result)
+    pretty = Reporter(output_format='json').generate_report(result)
+
+    assert json.loads(compact) == json.loads(pretty)
+    assert 'bücher0' in compact
+    assert pretty == json.dumps(json.loads(pretty), indent=2)
+
+
+def test_write_report_without_buffer(encoder):
+    stream = io.StringIO()
+    Reporter(output_format='ndjson').write_report(_result(0), stream)
+    assert json.loads(stream.getvalue())['url'] == 'https://bücher0.example/'
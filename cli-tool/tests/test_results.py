@@ -0,0 +1,99 @@
+import copy
+import json
+import tracemalloc
+
+from privacylens import results
+from privacylens.results import ScanResult, to_plain
+
+
+def _sample(i=0):
+    headers = {
+        name: {'present': bool(i % 2), 'value': 'max-age=31536000' if i % 2 else None, 'secure': bool(i % 2)}
+        for name in ('HSTS', 'CSP', 'X-Frame-Options', 'X-Content-Type-Options',
+                     'Referrer-Policy', 'Permissions-Policy', 'X-XSS-Protection')
+    }
+    return {
+        'url': f'https://site{i}.example/',
+        'domain': f'site{i}.example',
+        'timestamp': '2026-01-01T00:00:00',
+        'analysis': {
+            'http_security': {
+                'status_code': 200,
+                'final_url': f'https://site{i}.example/',
+                'https_used': True,
+                'redirect_chain': [],
+                'headers': headers,
+                'insecure_headers': [{'header': 'server', 'value': 'nginx', 'risk': 'Server version disclosed'}],
+            },
+            # Chain keys are merged in after the base certificate fields
+            'ssl_certificate': {
+                'valid': True,
+                'issuer': {'organizationName': "Let's Encrypt"},
+                'not_after': 'Jun  1 12:00:00 2027 GMT',
+                'days_until_expiry': 200,
+                'key': {'type': 'EC', 'size': 256, 'curve': 'secp256r1'},
+                'chain_issues': [],
+                'chain_source': 'aia',
+            },
+            'dns_security': {'error': 'timeout'},
+            'content_analysis': {
+                'tracking_scripts': [{'src': 'https://www.googletagmanager.com/gtm.js', 'service': 'Google Tag Manager'}],
+                'analytics_tools': [],
+                'third_party_resources': ['cdn.example'],
+            },
+        },
+        'privacy_score': 70 + i % 30,
+        'recommendations': [{'priority': 'high', 'category': 'HTTP Security', 'issue': 'Missing HSTS header'}],
+        'custom_field': {'b': 1, 'a': 2},
+    }
+
+
+def test_round_trip_preserves_values_and_key_order():
+    original = _sample()
+    compact = ScanResult.from_dict(copy.deepcopy(original))
+
+    assert compact.to_dict() == original
+    # Same serialization as the raw dict, so -o json and -o ndjson agree
+    assert json.dumps(compact.to_dict()) == json.dumps(original)
+    assert list(compact) == list(original)
+    assert json.dumps(to_plain(compact)) == json.dumps(original)
+
+
+def test_mapping_access():
+    compact = ScanResult.from_dict(_sample(3))
+
+    assert compact['domain'] == 'site3.example'
+    assert compact.get('missing') is None
+    assert compact['custom_field'] == {'b': 1, 'a': 2}
+    assert compact['analysis']['dns_security'] == {'error': 'timeout'}
+    assert len(compact) == len(_sample(3))
+
+
+def test_key_shape_table_is_bounded(monkeypatch):
+    monkeypatch.setattr(results, '_KEY_SHAPES', {})
+    monkeypatch.setattr(results, '_MAX_KEY_SHAPES', 10)
+
+    for i in range(100):
+        row = results._freeze({f'key{i}': i})
+        assert row.to_dict() == {f'key{i}': i}
+    assert len(results._KEY_SHAPES) == 10
+
+
+def _traced_size(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        return tracemalloc.get_traced_memory()[0] - before, kept
+    finally:
+        tracemalloc.stop()
+
+
+def test_compact_results_use_less_memory():
+    # Each result parsed separately, as when reading NDJSON
+    encoded = [json.dumps(_sample(i)) for i in range(2000)]
+
+    dict_size, _ = _traced_size(lambda: [json.loads(line) for line in encoded])
+    compact_size, _ = _traced_size(lambda: [ScanResult.from_dict(json.loads(line)) for line in encoded])
+
+    assert compact_size < dict_size * 0.6
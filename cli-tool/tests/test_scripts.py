@@ -0,0 +1,67 @@
+import io
+
+from privacylens.analyzer import PrivacyAnalyzer
+from privacylens.scripts import ScriptInspector
+
+FINGERPRINTER = b'c.toDataURL(); navigator.hardwareConcurrency; new OfflineAudioContext(1, 1, 1);'
+
+
+class _Response:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = io.BytesIO(body)
+
+    def iter_content(self, size):
+        return iter(lambda: self._body.read(size), b'')
+
+    def close(self):
+        pass
+
+
+def test_revalidation_uses_the_cached_classification():
+    requests = []
+
+    def fetch(url, headers):
+        requests.append(dict(headers))
+        if headers.get('If-None-Match') == '"v1"':
+            return _Response(304)
+        return _Response(200, FINGERPRINTER, {'etag': '"v1"'})
+
+    inspector = ScriptInspector(fetch, ttl=0)
+    (first,) = inspector.inspect(['https://cdn.example/fp.js'])
+    (second,) = inspector.inspect(['https://cdn.example/fp.js'])
+
+    assert first['fingerprinting'] is True and first['source'] == 'fetched'
+    assert second['source'] == 'not-modified' and second['techniques'] == first['techniques']
+    assert requests == [{}, {'If-None-Match': '"v1"'}]
+
+
+def test_not_modified_after_eviction_refetches_the_body():
+    requests = []
+    inspector = None
+
+    def fetch(url, headers):
+        requests.append(dict(headers))
+        if headers.get('If-None-Match') == '"v1"':
+            # The classification is evicted while the revalidation is in flight
+            inspector._hashes.clear()
+            return _Response(304)
+        return _Response(200, FINGERPRINTER, {'etag': '"v1"'})
+
+    inspector = ScriptInspector(fetch, ttl=0)
+    inspector.inspect(['https://cdn.example/fp.js'])
+    (result,) = inspector.inspect(['https://cdn.example/fp.js'])
+
+    assert 'error' not in result
+    assert result['fingerprinting'] is True and result['source'] == 'fetched'
+    assert requests == [{}, {'If-None-Match': '"v1"'}, {}]
+    assert inspector.summary()['errors'] == 0
+
+
+def test_script_fetches_have_their_own_latency_probe(monkeypatch):
+    analyzer = PrivacyAnalyzer(adaptive_timeouts=True)
+    monkeypatch.setattr(analyzer.session, 'get', lambda url, **kwargs: _Response(200, b'1;'))
+
+    analyzer._fetch_script('https://cdn.example/a.js', {})
+    assert set(analyzer.latency.summary()) == {'script'}